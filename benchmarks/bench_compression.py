@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Bandwidth and CPU trade-offs of response compression on generated histories.
+
+For the user with the longest history in a synthetic dataset (the same
+datasets as bench_models.py), builds the GET /api/sessions JSON body and the
+NDJSON and CSV exports. Each body is compressed with every available encoding
+and level, streamed through the compressors compression.py uses. The report
+shows size, ratio, compression CPU time and throughput, and the estimated
+time to deliver the body (CPU plus transfer) at --bandwidth-mbit.
+
+Usage:
+    python benchmarks/bench_compression.py [--size medium] [--bandwidth-mbit 20]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_models import Fixture, prepare_dataset, SIZES
+from compression import COMPRESSORS, available_encodings
+from export import generate_export, EXPORT_BATCH_SIZE
+from models import Session, SessionExercise
+
+LEVELS = {
+    'gzip': [1, 6, 9],
+    'br': [1, 4, 6, 11],
+    'zstd': [1, 3, 9, 19],
+}
+
+# Size of the chunks fed to the compressor, like a streamed response
+CHUNK_SIZE = 64 * 1024
+
+def sessions_body(user_id):
+    """GET /api/sessions as jsonify renders it (compact, sorted keys)."""
+    sessions = Session.get_by_user(user_id)
+    for session in sessions:
+        session['exercises'] = SessionExercise.get_by_session(session['id'])
+    return json.dumps(sessions, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+def export_body(user_id, fmt):
+    return b''.join(generate_export(Session.iter_history(user_id, EXPORT_BATCH_SIZE), fmt))
+
+def compress(encoding, level, body):
+    compressor = COMPRESSORS[encoding](level)
+    size = 0
+    started = time.process_time()
+    for offset in range(0, len(body), CHUNK_SIZE):
+        size += len(compressor.compress(body[offset:offset + CHUNK_SIZE]))
+    size += len(compressor.finish())
+    return size, time.process_time() - started
+
+def measure(encoding, level, body, min_time=0.2):
+    """Compressed size and the best CPU time over repeated runs."""
+    best = None
+    spent = 0.0
+    while spent < min_time or best is None:
+        size, cpu = compress(encoding, level, body)
+        best = cpu if best is None else min(best, cpu)
+        spent += cpu
+    return size, best
+
+def main():
+    parser = argparse.ArgumentParser(description='Compression ratio and CPU cost on generated histories')
+    parser.add_argument('--size', default='medium', choices=sorted(SIZES))
+    parser.add_argument('--bandwidth-mbit', type=float, default=20, help='Link speed for delivery time estimates')
+    parser.add_argument('--fresh', action='store_true', help='Regenerate the cached dataset')
+    args = parser.parse_args()
+
+    scratch = prepare_dataset(args.size, args.fresh)
+    fixture = Fixture()
+    bodies = {
+        'GET /api/sessions': sessions_body(fixture.user_id),
+        'export ndjson': export_body(fixture.user_id, 'ndjson'),
+        'export csv': export_body(fixture.user_id, 'csv'),
+    }
+    shutil.rmtree(os.path.dirname(scratch), ignore_errors=True)
+
+    encodings = available_encodings(LEVELS)
+    missing = sorted(set(LEVELS) - set(encodings))
+    if missing:
+        print(f"⚠️  Not installed, skipped: {', '.join(missing)} (pip install brotli zstandard)")
+
+    bytes_per_ms = args.bandwidth_mbit * 1e6 / 8 / 1000
+    for name, body in bodies.items():
+        print(f"\n📦 {name}: {len(body) / 1024:.1f} KB for {fixture.username} "
+              f"(uncompressed transfer {len(body) / bytes_per_ms:.1f} ms at {args.bandwidth_mbit:g} Mbit/s)")
+        print(f"{'encoding':<10} {'level':>5} {'KB':>9} {'ratio':>7} {'cpu ms':>8} {'MB/s':>8} {'deliver ms':>11}")
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                size, cpu = measure(encoding, level, body)
+                cpu_ms = cpu * 1000
+                print(f"{encoding:<10} {level:>5} {size / 1024:>9.1f} {len(body) / size:>6.1f}x "
+                      f"{cpu_ms:>8.2f} {len(body) / 1e6 / cpu if cpu else float('inf'):>8.0f} "
+                      f"{cpu_ms + size / bytes_per_ms:>11.1f}")
+
+if __name__ == '__main__':
+    main()
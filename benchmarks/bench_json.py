@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+JSON row-fetch and serialization cost on a 5k-session payload.
+
+Generates one synthetic user with a long history (cached in the temp
+directory), takes --sessions sessions with their exercises, the same shape
+GET /api/sessions returns, and times:
+- fetching the rows as sqlite3.Row plus a dict() copy per row (the old model
+  code) against db.fetch_dicts;
+- rendering the payload with Flask's default provider, with FastJSONProvider
+  backed by orjson, and with FastJSONProvider's stdlib fallback.
+
+Timings are the best of repeated runs, in milliseconds.
+
+Usage:
+    python benchmarks/bench_json.py [--sessions 5000] [--fresh]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(), 'workout-bench-logs'))
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import db
+import json_provider
+from json_provider import FastJSONProvider
+from synthetic import SyntheticGenerator
+
+DATASET_PATH = os.path.join(tempfile.gettempdir(), 'workout-bench-json.db')
+
+SESSIONS_SQL = """
+    SELECT s.*, t.name as template_name
+    FROM sessions s
+    JOIN templates t ON s.template_id = t.id
+    WHERE s.user_id = ?
+    ORDER BY s.session_date DESC
+    LIMIT ?
+"""
+EXERCISES_SQL = """
+    SELECT se.*, te.name as exercise_name
+    FROM session_exercises se
+    JOIN template_exercises te ON se.template_exercise_id = te.id
+    WHERE se.session_id IN (SELECT id FROM sessions WHERE user_id = ? ORDER BY session_date DESC LIMIT ?)
+    ORDER BY se.session_id, te.order_idx
+"""
+
+def prepare_dataset(fresh):
+    if fresh and os.path.exists(DATASET_PATH):
+        os.remove(DATASET_PATH)
+    db.DB_PATH = DATASET_PATH
+    if not os.path.exists(DATASET_PATH):
+        print(f"🏗️  Generating dataset {DATASET_PATH}")
+        # Over 5,000 sessions for the single user
+        SyntheticGenerator(users=1, years=18, sessions_per_week=10, seed=0, end_date=date(2026, 1, 1)).run()
+    db.init_db()
+    with db.get_db() as conn:
+        return conn.execute("SELECT id FROM users ORDER BY id LIMIT 1").fetchone()[0]
+
+def fetch_row_copies(conn, sql, params):
+    return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+def build_payload(fetch, user_id, limit):
+    """Sessions with their exercises, as GET /api/sessions nests them."""
+    with db.get_db() as conn:
+        sessions = fetch(conn, SESSIONS_SQL, (user_id, limit))
+        exercises = fetch(conn, EXERCISES_SQL, (user_id, limit))
+    by_session = {}
+    for exercise in exercises:
+        by_session.setdefault(exercise['session_id'], []).append(exercise)
+    for session in sessions:
+        session['exercises'] = by_session.get(session['id'], [])
+    return sessions
+
+def best_ms(func, min_time=1.0, min_rounds=5):
+    best = None
+    spent = 0.0
+    rounds = 0
+    while spent < min_time or rounds < min_rounds:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+        spent += elapsed
+        rounds += 1
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON fetch and serialization benchmark')
+    parser.add_argument('--sessions', type=int, default=5000, help='Sessions in the payload')
+    parser.add_argument('--fresh', action='store_true', help='Regenerate the cached dataset')
+    args = parser.parse_args()
+
+    user_id = prepare_dataset(args.fresh)
+    payload = build_payload(db.fetch_dicts, user_id, args.sessions)
+    rows = len(payload) + sum(len(s['exercises']) for s in payload)
+    print(f"📦 {len(payload)} sessions, {rows} rows")
+
+    print("\n🗄️  Row fetch")
+    for name, fetch in (('sqlite3.Row + dict()', fetch_row_copies), ('db.fetch_dicts', db.fetch_dicts)):
+        print(f"  {name:<28} {best_ms(lambda: build_payload(fetch, user_id, args.sessions)):>8.2f} ms")
+
+    app = Flask(__name__)
+    providers = [('Flask DefaultJSONProvider', DefaultJSONProvider(app))]
+    if json_provider.orjson is not None:
+        providers.append(('FastJSONProvider (orjson)', FastJSONProvider(app)))
+    else:
+        print("\n⚠️  orjson is not installed; only the stdlib fallback is measured (pip install orjson)")
+    providers.append(('FastJSONProvider (stdlib)', FastJSONProvider(app)))
+
+    print("\n🧾 jsonify() of the payload")
+    orjson = json_provider.orjson
+    with app.app_context():
+        for name, provider in providers:
+            json_provider.orjson = None if name.endswith('(stdlib)') else orjson
+            size = len(provider.response(payload).get_data())
+            print(f"  {name:<28} {best_ms(lambda: provider.response(payload)):>8.2f} ms  {size / 1024:>8.1f} KB")
+    json_provider.orjson = orjson
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for every public method in server/models.py and the request
+schemas in server/validation.py, at several dataset sizes.
+
+Each size is generated once with synthetic.py (cached in the temp directory)
+and copied to a scratch file per run, so write benchmarks never leak into the
+next run. Read benchmarks use the user with the longest history. Timings are
+medians in microseconds. They are compared against benchmarks/baselines/models.json
+and the script exits 1 when any benchmark is slower than its baseline by more
+than --threshold percent (and by more than --noise-floor-us).
+
+Baselines depend on the machine; record them on the machine that runs the
+comparison (CI runner or your laptop) with --update-baseline.
+
+Usage:
+    python benchmarks/bench_models.py                       # compare with baseline
+    python benchmarks/bench_models.py --sizes small --filter Session.
+    python benchmarks/bench_models.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(), 'workout-bench-logs'))
+
+import db
+from models import User, PasswordResetToken, Template, TemplateExercise, Session, SessionExercise
+from synthetic import SyntheticGenerator, SYNTHETIC_PASSWORD
+from validation import (
+    compile_schema, TEMPLATE_CREATION_SCHEMA, TEMPLATE_UPDATE_SCHEMA, SESSION_CREATION_SCHEMA
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'models.json')
+
+# Dataset sizes: synthetic users and years of history each
+SIZES = {
+    'small': {'users': 50, 'years': 0.5},
+    'medium': {'users': 300, 'years': 2},
+    'large': {'users': 1000, 'years': 4},
+}
+
+DATASET_END_DATE = date(2026, 1, 1)
+NEW_PASSWORD = 'Different456!'
+
+class Fixture:
+    """IDs used by the benchmarks, plus helpers creating throwaway rows."""
+
+    def __init__(self):
+        with db.get_db() as conn:
+            row = conn.execute("""
+                SELECT user_id, COUNT(*) AS n FROM sessions GROUP BY user_id ORDER BY n DESC, user_id LIMIT 1
+            """).fetchone()
+            self.user_id = row['user_id']
+            user = conn.execute("SELECT username, email FROM users WHERE id = ?", (self.user_id,)).fetchone()
+            self.username = user['username']
+            self.email = user['email']
+            self.template_id = conn.execute(
+                "SELECT id FROM templates WHERE user_id = ? ORDER BY id LIMIT 1", (self.user_id,)
+            ).fetchone()[0]
+            self.template_exercise_id = conn.execute(
+                "SELECT id FROM template_exercises WHERE template_id = ? ORDER BY order_idx LIMIT 1",
+                (self.template_id,)
+            ).fetchone()[0]
+            self.session_id = conn.execute(
+                "SELECT id FROM sessions WHERE user_id = ? ORDER BY session_date DESC LIMIT 1", (self.user_id,)
+            ).fetchone()[0]
+        self.counter = 0
+
+    def unique(self, prefix):
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def new_user(self):
+        with db.get_db() as conn:
+            password_hash = conn.execute(
+                "SELECT password_hash FROM users WHERE id = ?", (self.user_id,)
+            ).fetchone()[0]
+            cursor = conn.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)",
+                (self.unique('bench'), None, password_hash)
+            )
+            conn.commit()
+            return cursor.lastrowid
+
+    def new_template(self):
+        return Template.create(self.user_id, self.unique('Bench Template '))
+
+    def new_template_with_exercises(self):
+        template_id = self.new_template()
+        for order_idx in range(5):
+            TemplateExercise.create(template_id, f'Exercise {order_idx}', order_idx)
+        return template_id
+
+    def new_session(self):
+        session_id = Session.create(self.user_id, self.template_id)
+        SessionExercise.create(session_id, self.template_exercise_id, 100, 5, 5)
+        return session_id
+
+def _consume(iterator):
+    return sum(len(batch) for batch in iterator)
+
+# name -> (args factory run untimed before every call, timed callable)
+def model_cases(f):
+    session_payload = {
+        'template_id': f.template_id,
+        'session_date': '2026-01-01T10:00:00Z',
+        'exercises': [
+            {'template_exercise_id': f.template_exercise_id + i, 'weight_kg': 60 + i * 2.5, 'reps': 8, 'sets': 3}
+            for i in range(20)
+        ],
+    }
+    validate_template = compile_schema(TEMPLATE_CREATION_SCHEMA)
+    validate_template_update = compile_schema(TEMPLATE_UPDATE_SCHEMA)
+    validate_session = compile_schema(SESSION_CREATION_SCHEMA)
+
+    return {
+        'User.get_password_policy': (lambda: (), User.get_password_policy),
+        'User.validate_password_strength': (lambda: ('Sup3r$ecret',), User.validate_password_strength),
+        'User.create': (lambda: (f.unique('benchuser'), SYNTHETIC_PASSWORD), User.create),
+        'User.get_by_username': (lambda: (f.username,), User.get_by_username),
+        'User.verify_password': (lambda: (f.username, SYNTHETIC_PASSWORD), User.verify_password),
+        'User.change_password': (lambda: (f.new_user(), SYNTHETIC_PASSWORD, NEW_PASSWORD), User.change_password),
+        'User.get_by_email': (lambda: (f.email,), User.get_by_email),
+        'User.get_by_id': (lambda: (f.user_id,), User.get_by_id),
+        'User.is_active': (lambda: (f.user_id,), User.is_active),
+        'User.get_all_users': (lambda: (), User.get_all_users),
+        'User.list_users': (lambda: (), User.list_users),
+        'User.list_users (search)': (lambda: (), lambda: User.list_users(search='synth00001')),
+        'User.list_users (role)': (lambda: (), lambda: User.list_users(role='admin')),
+        'User.list_users (cursor)': (lambda: (f.user_id,), lambda user_id: User.list_users(cursor=user_id)),
+        'User.list_users (role, cursor)': (lambda: (f.user_id,),
+                                           lambda user_id: User.list_users(role='user', cursor=user_id)),
+        'User.list_users (search, cursor)': (lambda: (f.user_id,),
+                                             lambda user_id: User.list_users(search='synth', cursor=user_id)),
+        'User.update_user': (lambda: (f.new_user(),), lambda user_id: User.update_user(user_id, role='user')),
+        'User.delete_user': (lambda: (f.new_user(),), User.delete_user),
+        'User.reset_user_password': (lambda: (f.new_user(), NEW_PASSWORD), User.reset_user_password),
+        'PasswordResetToken.create': (lambda: (f.user_id,), PasswordResetToken.create),
+        'PasswordResetToken.verify_and_use': (lambda: (PasswordResetToken.create(f.user_id),),
+                                              PasswordResetToken.verify_and_use),
+        'PasswordResetToken.reset_password_with_token': (
+            lambda: (PasswordResetToken.create(f.new_user()), NEW_PASSWORD),
+            PasswordResetToken.reset_password_with_token),
+        'Template.create': (lambda: (f.user_id, f.unique('Template ')), Template.create),
+        'Template.get_all_by_user': (lambda: (f.user_id,), Template.get_all_by_user),
+        'Template.get_by_id': (lambda: (f.template_id, f.user_id), Template.get_by_id),
+        'Template.update': (lambda: (f.new_template(), f.user_id, f.unique('Renamed ')), Template.update),
+        'Template.delete': (lambda: (f.new_template_with_exercises(), f.user_id), Template.delete),
+        'TemplateExercise.create': (lambda: (f.template_id, f.unique('Exercise '), 99), TemplateExercise.create),
+        'TemplateExercise.get_by_template': (lambda: (f.template_id,), TemplateExercise.get_by_template),
+        'TemplateExercise.delete_by_template': (lambda: (f.new_template_with_exercises(),),
+                                                TemplateExercise.delete_by_template),
+        'TemplateExercise.validate_ownership': (lambda: (f.template_exercise_id, f.user_id),
+                                                TemplateExercise.validate_ownership),
+        'TemplateExercise.get_by_id': (lambda: (f.template_exercise_id,), TemplateExercise.get_by_id),
+        'Session.create': (lambda: (f.user_id, f.template_id), Session.create),
+        'Session.get_by_user': (lambda: (f.user_id,), Session.get_by_user),
+        'Session.get_by_user (template)': (lambda: (f.user_id, f.template_id), Session.get_by_user),
+        'Session.iter_history': (lambda: (f.user_id,), lambda user_id: _consume(Session.iter_history(user_id))),
+        'Session.delete': (lambda: (f.new_session(), f.user_id), Session.delete),
+        'SessionExercise.create': (lambda: (f.session_id, f.template_exercise_id, 100, 5, 5), SessionExercise.create),
+        'SessionExercise.get_latest_by_template_exercise': (lambda: (f.template_exercise_id, f.user_id),
+                                                            SessionExercise.get_latest_by_template_exercise),
+        'SessionExercise.get_by_session': (lambda: (f.session_id,), SessionExercise.get_by_session),
+        'validation: TEMPLATE_CREATION_SCHEMA': (lambda: ({'name': 'Push Day', 'exercises': ['Bench Press'] * 20},),
+                                                 validate_template),
+        'validation: TEMPLATE_UPDATE_SCHEMA': (lambda: ({'name': 'Push Day', 'exercises': ['Bench Press'] * 20},),
+                                               validate_template_update),
+        'validation: SESSION_CREATION_SCHEMA': (lambda: (session_payload,), validate_session),
+    }
+
+def run_case(make_args, func, min_time, min_rounds, max_rounds):
+    """Median and minimum time of one call, in microseconds."""
+    timings = []
+    spent = 0.0
+    while len(timings) < max_rounds and (len(timings) < min_rounds or spent < min_time):
+        args = make_args()
+        started = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        spent += elapsed
+    return statistics.median(timings) * 1e6, min(timings) * 1e6, len(timings)
+
+def prepare_dataset(size, fresh):
+    cached = os.path.join(tempfile.gettempdir(), f'workout-bench-models-{size}.db')
+    if fresh or not os.path.exists(cached):
+        if os.path.exists(cached):
+            os.remove(cached)
+        print(f"🏗️  Generating '{size}' dataset {cached}")
+        db.DB_PATH = cached
+        SyntheticGenerator(seed=0, end_date=DATASET_END_DATE, **SIZES[size]).run()
+        with db.get_db() as conn:
+            conn.execute("ANALYZE")
+            conn.commit()
+    scratch = os.path.join(tempfile.mkdtemp(prefix='workout-bench-'), 'bench.db')
+    shutil.copyfile(cached, scratch)
+    db.DB_PATH = scratch
+    # Cached datasets may predate the current schema
+    db.init_db()
+    return scratch
+
+def main():
+    parser = argparse.ArgumentParser(description='Model and validation microbenchmarks')
+    parser.add_argument('--sizes', default=','.join(SIZES), help='Comma separated dataset sizes')
+    parser.add_argument('--filter', default='', help='Only run benchmarks whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.3, help='Seconds spent per benchmark')
+    parser.add_argument('--min-rounds', type=int, default=5)
+    parser.add_argument('--max-rounds', type=int, default=2000)
+    parser.add_argument('--threshold', type=float, default=25, help='Allowed slowdown in percent')
+    parser.add_argument('--noise-floor-us', type=float, default=5, help='Ignore slowdowns smaller than this')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Record results as the new baseline')
+    parser.add_argument('--fresh', action='store_true', help='Regenerate cached datasets')
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    regressions = []
+    for size in args.sizes.split(','):
+        scratch = prepare_dataset(size, args.fresh)
+        fixture = Fixture()
+        print(f"\n📏 {size}: {SIZES[size]['users']} users, {SIZES[size]['years']} years "
+              f"(benchmark user {fixture.username})")
+        print(f"{'benchmark':<50} {'median µs':>12} {'min µs':>12} {'rounds':>7} {'baseline':>12} {'change':>8}")
+        results[size] = {}
+        for name, (make_args, func) in model_cases(fixture).items():
+            if args.filter not in name:
+                continue
+            median, minimum, rounds = run_case(make_args, func, args.min_time, args.min_rounds, args.max_rounds)
+            results[size][name] = round(median, 1)
+
+            previous = baseline.get(size, {}).get(name)
+            change = ''
+            flag = ''
+            if previous:
+                change = f'{(median - previous) / previous * 100:+.1f}%'
+                if median > previous * (1 + args.threshold / 100) and median - previous > args.noise_floor_us:
+                    flag = '  ❌'
+                    regressions.append((size, name, previous, median))
+            print(f"{name:<50} {median:>12.1f} {minimum:>12.1f} {rounds:>7} "
+                  f"{previous if previous else '-':>12} {change:>8}{flag}")
+        shutil.rmtree(os.path.dirname(scratch), ignore_errors=True)
+
+    if args.update_baseline:
+        merged = {size: {**baseline.get(size, {}), **values} for size, values in results.items()}
+        merged.update({size: values for size, values in baseline.items() if size not in merged})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'processor': platform.machine()},
+                'results': merged,
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Baseline written to {args.baseline}")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0f}%:")
+        for size, name, previous, median in regressions:
+            print(f"   [{size}] {name}: {previous:.1f} µs -> {median:.1f} µs")
+        sys.exit(1)
+    elif baseline:
+        print("\n✅ No regressions against baseline")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Restore time from a WAL replica of a multi-GB database, and commit latency
+with the replicator running.
+
+Builds a database of --size-gb of sessions and exercises (cached in the
+temp directory) and puts it in WAL mode. It then measures commit latency of
+app-like writes (a session with five exercises per transaction) in three
+phases:
+- no replication (SQLite's own automatic checkpoints);
+- while `replicate.py --watch`, as a separate process, takes the first
+  snapshot;
+- while it ships the WAL every REPLICA_SYNC_INTERVAL seconds.
+
+It then restores the latest state and a point in the middle of the
+replication phase, and prints the time spent on the snapshot, on replaying
+segments and on integrity_check.
+
+Usage:
+    python benchmarks/bench_restore.py [--size-gb 2] [--write-seconds 10] [--fresh]
+"""
+
+import argparse
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server')
+sys.path.insert(0, SERVER_DIR)
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+os.environ.setdefault('LOG_DIR', os.path.join(tempfile.gettempdir(), 'workout-bench-logs'))
+
+import db
+import replicate
+
+WORK_DIR = os.path.join(tempfile.gettempdir(), 'workout-bench-restore')
+DATASET_PATH = os.path.join(WORK_DIR, 'workout.db')
+USERS = 1000
+SESSIONS_PER_BATCH = 200000
+
+def build_dataset(size_gb):
+    """Fill the schema with synthetic history until the file reaches size_gb."""
+    db.init_db()
+    conn = sqlite3.connect(DATASET_PATH)
+    conn.executescript(f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {USERS})
+        INSERT INTO users(username, password_hash) SELECT 'user' || i, 'x' FROM n;
+        INSERT INTO templates(user_id, name) SELECT id, 'Full body' FROM users;
+        WITH RECURSIVE k(j) AS (SELECT 0 UNION ALL SELECT j + 1 FROM k WHERE j < 4)
+        INSERT INTO template_exercises(template_id, name, order_idx)
+        SELECT t.id, 'Exercise ' || k.j, k.j FROM templates t, k;
+    """)
+    conn.commit()
+    target = size_gb * 1024 ** 3
+    started = time.perf_counter()
+    while os.path.getsize(DATASET_PATH) < target:
+        last_id = conn.execute("SELECT coalesce(max(id), 0) FROM sessions").fetchone()[0]
+        conn.execute(f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {SESSIONS_PER_BATCH})
+            INSERT INTO sessions(user_id, template_id, session_date)
+            SELECT (i % {USERS}) + 1, (i % {USERS}) + 1, date('2015-01-01', '+' || (i % 4000) || ' days') FROM n
+        """)
+        conn.execute("""
+            INSERT INTO session_exercises(session_id, template_exercise_id, weight_kg, reps, sets)
+            SELECT s.id, te.id, abs(random() % 2000) / 10.0, abs(random() % 12) + 1, abs(random() % 5) + 1
+            FROM sessions s JOIN template_exercises te ON te.template_id = s.template_id
+            WHERE s.id > ?
+        """, (last_id,))
+        conn.commit()
+        print(f"   {os.path.getsize(DATASET_PATH) / 1024 ** 3:5.2f} GB  ({time.perf_counter() - started:.0f}s)", flush=True)
+    conn.close()
+
+def prepare_dataset(size_gb, fresh):
+    os.makedirs(WORK_DIR, exist_ok=True)
+    if fresh:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(DATASET_PATH + suffix):
+                os.remove(DATASET_PATH + suffix)
+    db.DB_PATH = DATASET_PATH
+    if not os.path.exists(DATASET_PATH) or os.path.getsize(DATASET_PATH) < size_gb * 1024 ** 3 * 0.95:
+        print(f"🏗️  Generating {size_gb} GB dataset {DATASET_PATH}")
+        build_dataset(size_gb)
+    conn = sqlite3.connect(DATASET_PATH)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+
+class Writer:
+    """App-like write transactions on a thread, with commit latencies per phase."""
+
+    def __init__(self, pause=0.01):
+        self.pause = pause
+        self.phase = None
+        self.latencies = {}
+        self.marks = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self, phase):
+        self.phase = phase
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            with db.get_db() as conn:
+                cursor = conn.execute("INSERT INTO sessions(user_id, template_id, session_date) VALUES (1, 1, date('now'))")
+                conn.executemany(
+                    "INSERT INTO session_exercises(session_id, template_exercise_id, weight_kg, reps, sets) VALUES (?, ?, 60, 8, 3)",
+                    [(cursor.lastrowid, exercise) for exercise in range(1, 6)])
+                conn.commit()
+                session_id = cursor.lastrowid
+            self.latencies.setdefault(self.phase, []).append(time.perf_counter() - started)
+            self.marks.append((datetime.now(timezone.utc), session_id))
+            time.sleep(self.pause)
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+def max_session(path):
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        return conn.execute("SELECT max(id) FROM sessions").fetchone()[0]
+    finally:
+        conn.close()
+
+def shipped_all(replica_dir, generation):
+    """Whether the replica has every frame committed to the WAL (no writes running)."""
+    segments = replicate.list_segments(replica_dir, generation)
+    header = replicate.read_wal_header(DATASET_PATH + '-wal')
+    if not segments or header is None or header['salt'] != segments[-1]['position']['salt']:
+        return False
+    return replicate.read_frames(DATASET_PATH + '-wal', segments[-1]['position'])[2] == 0
+
+def main():
+    parser = argparse.ArgumentParser(description='WAL replica restore benchmark')
+    parser.add_argument('--size-gb', type=float, default=2.0, help='Database size to generate')
+    parser.add_argument('--write-seconds', type=float, default=10, help='Length of each write phase')
+    parser.add_argument('--fresh', action='store_true', help='Regenerate the cached dataset')
+    args = parser.parse_args()
+
+    prepare_dataset(args.size_gb, args.fresh)
+    replica_dir = os.path.join(WORK_DIR, 'replica')
+    shutil.rmtree(replica_dir, ignore_errors=True)
+    print(f"📦 {os.path.getsize(DATASET_PATH) / 1024 ** 3:.2f} GB database, replica in {replica_dir}")
+
+    writer = Writer()
+    writer.start('no replication')
+    time.sleep(args.write_seconds)
+
+    db.register_connection_hook(replicate.disable_autocheckpoint)
+    env = dict(os.environ, DATABASE_PATH=DATASET_PATH, REPLICA_DIR=replica_dir, FLASK_ENV='development')
+    watcher = subprocess.Popen([sys.executable, os.path.join(SERVER_DIR, 'replicate.py'), '--watch'],
+                               env=env, stdout=subprocess.DEVNULL)
+    writer.phase = 'first snapshot'
+    started = time.perf_counter()
+    while not replicate.list_generations(replica_dir):
+        if watcher.poll() is not None:
+            raise SystemExit("❌ replicate.py --watch exited")
+        time.sleep(0.1)
+    snapshot_seconds = time.perf_counter() - started
+
+    writer.phase = 'replicating'
+    replicating_from = len(writer.marks)
+    time.sleep(args.write_seconds)
+    writer.stop()
+    # Until the last commit is shipped: the WAL written during the first
+    # snapshot is shipped in one go, so this is the lag it leaves
+    started = time.perf_counter()
+    generation = replicate.list_generations(replica_dir)[-1]
+    while not shipped_all(replica_dir, generation['generation']):
+        if time.perf_counter() - started > 600:
+            raise SystemExit("❌ Replica did not catch up within 10 minutes")
+        time.sleep(0.1)
+    catch_up_seconds = time.perf_counter() - started
+    watcher.send_signal(signal.SIGINT)
+    watcher.wait()
+
+    segments = replicate.list_segments(replica_dir, generation['generation'])
+    print(f"🧬 snapshot {generation['size'] / 1024 ** 2:.0f} MB in {snapshot_seconds:.1f}s, "
+          f"{len(segments)} segments ({sum(s['size'] for s in segments) / 1024:.0f} KB), "
+          f"caught up {catch_up_seconds:.1f}s after the last commit")
+
+    print("\n⏱️  Commit latency (ms)")
+    print(f"  {'phase':<16} {'commits':>8} {'p50':>8} {'p99':>8} {'max':>8}")
+    for phase, values in writer.latencies.items():
+        print(f"  {phase:<16} {len(values):>8} {percentile(values, 0.5):>8.2f} "
+              f"{percentile(values, 0.99):>8.2f} {max(values) * 1000:>8.2f}")
+
+    # Middle of the replication phase, a second after a commit
+    at, _ = writer.marks[(replicating_from + len(writer.marks)) // 2]
+    cases = [('latest', None, writer.marks[-1][1]), ('point in time', at, None)]
+    print("\n♻️  Restore (s)")
+    print(f"  {'target':<14} {'snapshot':>9} {'replay':>8} {'verify':>8} {'total':>8}  sessions")
+    for name, moment, expected in cases:
+        target = os.path.join(WORK_DIR, 'restored.db')
+        result = replicate.restore(replica_dir, target, at=moment, verify=moment is None)
+        restored = max_session(target)
+        if moment is None:
+            ok = restored == expected
+        else:
+            # Nothing that began after the segment was read, and everything
+            # committed before the one before it was read
+            restored_to = replicate._parse_time(result['restored_to'])
+            previous = max((replicate._parse_time(s['created_at']) for s in segments
+                            if replicate._parse_time(s['created_at']) < restored_to),
+                           default=replicate._parse_time(generation['created_at']))
+            expected = max(s for t, s in writer.marks if t <= previous)
+            later = [s for t, s in writer.marks if t > restored_to]
+            ok = expected <= restored <= (later[0] if later else restored)
+        status = '✅' if ok else f'❌ expected {expected}'
+        print(f"  {name:<14} {result['snapshot_seconds']:>9.2f} {result['replay_seconds']:>8.2f} "
+              f"{result.get('verify_seconds', 0):>8.2f} {result['seconds']:>8.2f}  {restored} {status}")
+        os.remove(target)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: cost of validating a session payload with 50 exercises
+through validate_request(SESSION_CREATION_SCHEMA), plus password policy checks.
+
+Usage:
+    python benchmarks/bench_validation.py [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+os.environ.setdefault('LOG_DIR', os.path.join(os.environ.get('TMPDIR', '/tmp'), 'workout-bench-logs'))
+
+from flask import Flask
+from validation import validate_request, SESSION_CREATION_SCHEMA, TEMPLATE_CREATION_SCHEMA
+from models import User
+
+SESSION_PAYLOAD = {
+    'template_id': 12,
+    'session_date': '2024-01-15T10:30:00Z',
+    'exercises': [
+        {'template_exercise_id': 100 + i, 'weight_kg': 60 + i * 2.5, 'reps': 8, 'sets': 3}
+        for i in range(50)
+    ],
+}
+
+TEMPLATE_PAYLOAD = {
+    'name': 'Push Day',
+    'exercises': [f'Exercise {i}' for i in range(20)],
+}
+
+def bench_schema(app, schema, payload, iterations):
+    view = validate_request(schema)(lambda: ('', 204))
+    with app.test_request_context(method='POST', json=payload):
+        assert view() == ('', 204), 'payload should validate'
+        seconds = timeit.timeit(view, number=iterations)
+    return seconds / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    results = {
+        'session payload (50 exercises)': bench_schema(app, SESSION_CREATION_SCHEMA, SESSION_PAYLOAD, args.iterations),
+        'template payload (20 exercises)': bench_schema(app, TEMPLATE_CREATION_SCHEMA, TEMPLATE_PAYLOAD, args.iterations),
+        'password strength check': timeit.timeit(
+            lambda: User.validate_password_strength('Sup3r$ecret'), number=args.iterations
+        ) / args.iterations * 1e6,
+    }
+    for name, micros in results.items():
+        print(f"{name:<34} {micros:10.1f} µs/op")
+
+if __name__ == '__main__':
+    main()
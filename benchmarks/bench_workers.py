@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Compare server models under the same load.
+
+Runs loadtest.py --start-server once per worker class (gunicorn sync, gthread,
+and gevent when it is installed, with server/gunicorn.conf.py defaults for
+that class; asgi is uvicorn serving asgi.py when uvicorn and a2wsgi are
+installed), then prints throughput and latency side by side. Use --workers 1
+to compare the concurrency of a single process.
+
+Usage:
+    python benchmarks/bench_workers.py [--users 20] [--duration 30] [--profile small]
+    python benchmarks/bench_workers.py --worker-class sync --worker-class gthread
+    python benchmarks/bench_workers.py --workers 1 --users 50
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKER_CLASSES = ['sync', 'gthread', 'gevent', 'asgi']
+
+# Modules each worker class needs beyond the base requirements
+REQUIRED_MODULES = {'gevent': ['gevent'], 'asgi': ['uvicorn', 'a2wsgi']}
+
+def missing_modules(worker_class):
+    return [m for m in REQUIRED_MODULES.get(worker_class, []) if importlib.util.find_spec(m) is None]
+
+def run(worker_class, args, output):
+    if worker_class == 'asgi':
+        env, server = dict(os.environ), 'uvicorn'
+    else:
+        env, server = dict(os.environ, GUNICORN_WORKER_CLASS=worker_class), 'gunicorn'
+    command = [sys.executable, os.path.join(BENCH_DIR, 'loadtest.py'), '--start-server', '--server', server,
+               '--profile', args.profile, '--users', str(args.users), '--duration', str(args.duration),
+               '--warmup', str(args.warmup), '--think-ms', str(args.think_ms), '--output', output]
+    if args.workers:
+        command += ['--workers', str(args.workers)]
+    subprocess.run(command, env=env, check=True)
+    with open(output) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare server models with the load test')
+    parser.add_argument('--worker-class', action='append', choices=WORKER_CLASSES,
+                        help='Worker class to test (repeatable, default: all installed)')
+    parser.add_argument('--workers', type=int, help='Override the worker count for every class')
+    parser.add_argument('--profile', default='small')
+    parser.add_argument('--users', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--think-ms', type=float, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    workdir = tempfile.mkdtemp(prefix='workout-bench-workers-')
+    for worker_class in args.worker_class or WORKER_CLASSES:
+        missing = missing_modules(worker_class)
+        if missing:
+            print(f"⏭️  Skipping {worker_class}: {', '.join(missing)} not installed")
+            continue
+        print(f"\n⚙️  Worker class: {worker_class}")
+        results[worker_class] = run(worker_class, args, os.path.join(workdir, f'{worker_class}.json'))
+
+    print(f"\n{'worker class':<14} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for worker_class, result in results.items():
+        stats = result['summary']
+        print(f"{worker_class:<14} {stats['rps']:>8.1f} {stats['error_rate'] * 100:>5.1f}% "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f}")
+    print(f"\n💾 Per-class results in {workdir}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN QUERY PLAN regression check for the SQL issued by server/models.py.
+
+Every public model method is called once (using the fixtures from
+bench_models.py) against a migrated, ANALYZEd synthetic dataset. Every
+statement issued from models.py is recorded with its parameters and the
+method that issued it, and then explained. A plan fails the check when it
+shows a full SCAN of a table, a primary key range open on one side (a walk
+from a cursor to the end of the table) or a temp B-tree for ORDER BY, unless
+the statement (whitespace-normalized SQL) and plan line are listed together
+in query_plan_allowlist.json with a reason. Entries name one statement, so a
+new scan elsewhere in the same method still fails. An entry with "sizes"
+only applies to those datasets, for plans the planner picks on purpose for
+tables of a few dozen rows.
+
+Usage:
+    python benchmarks/check_query_plans.py [--size medium] [--verbose]
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_models import Fixture, model_cases, prepare_dataset, SIZES
+import db
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+ALLOWLIST_PATH = os.path.join(ROOT, 'benchmarks', 'query_plan_allowlist.json')
+
+MODELS_FILE = os.path.join('server', 'models.py')
+
+# Statements that have no query plan worth checking
+_SKIPPED = re.compile(r'^\s*(PRAGMA|BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|CREATE|ALTER|ANALYZE)\b', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+# SQLite reports index lookups as SEARCH; SCAN walks a whole table or index
+_FULL_SCAN = re.compile(r'^SCAN (?!CONSTANT ROW)\w+')
+_OPEN_RANGE = re.compile(r'^SEARCH \w+ USING INTEGER PRIMARY KEY \(rowid[<>]=?\?\)$')
+_TEMP_ORDER_BY = 'USE TEMP B-TREE FOR ORDER BY'
+
+def _models_origin():
+    """Qualified name of the innermost models.py frame on the stack, if any."""
+    frame = sys._getframe(2)
+    while frame:
+        if frame.f_code.co_filename.endswith(MODELS_FILE):
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+    return None
+
+class _RecordingCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        self.connection.record(sql, parameters)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self.connection.record(sql, seq_of_parameters[0] if seq_of_parameters else ())
+        return super().executemany(sql, seq_of_parameters)
+
+class RecordingConnection(sqlite3.Connection):
+    """Connection that records statements issued from models.py."""
+
+    statements = {}  # normalized SQL -> {'sql', 'params', 'origins'}
+
+    def record(self, sql, params):
+        if _SKIPPED.match(sql):
+            return
+        origin = _models_origin()
+        if origin is None:
+            return
+        key = _WHITESPACE.sub(' ', sql).strip()
+        entry = self.statements.setdefault(key, {'sql': sql, 'params': params, 'origins': set()})
+        entry['origins'].add(origin)
+
+    def cursor(self, factory=_RecordingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def violations(plan):
+    """Plan lines that indicate a full scan or a sort without an index."""
+    found = []
+    for detail in plan:
+        if _FULL_SCAN.match(detail) or _OPEN_RANGE.match(detail) or detail == _TEMP_ORDER_BY:
+            found.append(detail)
+    return found
+
+def load_allowlist(path, size):
+    """Allowlist entries that apply to the dataset size."""
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [entry for entry in json.load(f) if size in entry.get('sizes', SIZES)]
+
+def is_allowed(allowlist, sql, detail):
+    return any(entry['sql'] == sql and entry['plan'] == detail for entry in allowlist)
+
+def main():
+    parser = argparse.ArgumentParser(description='Check query plans of the SQL issued by models.py')
+    parser.add_argument('--size', default='medium', choices=sorted(SIZES), help='Dataset used for statistics')
+    parser.add_argument('--allowlist', default=ALLOWLIST_PATH)
+    parser.add_argument('--verbose', action='store_true', help='Print every statement and its plan')
+    args = parser.parse_args()
+
+    scratch = prepare_dataset(args.size, fresh=False)
+    db.set_connection_factory(RecordingConnection)
+    fixture = Fixture()
+    for name, (make_args, func) in model_cases(fixture).items():
+        func(*make_args())
+    db.set_connection_factory(sqlite3.Connection)
+
+    allowlist = load_allowlist(args.allowlist, args.size)
+    used_allowlist = set()
+    failures = []
+    conn = sqlite3.connect(scratch)
+    for key, entry in sorted(RecordingConnection.statements.items()):
+        plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {entry['sql']}", entry['params'] or ())]
+        bad = []
+        for detail in violations(plan):
+            if is_allowed(allowlist, key, detail):
+                used_allowlist.add((key, detail))
+            else:
+                bad.append(detail)
+        if bad:
+            failures.append((entry, key, bad))
+        if args.verbose or bad:
+            print(f"{'❌' if bad else '✅'} {', '.join(sorted(entry['origins']))}\n   {key}")
+            for detail in plan:
+                print(f"     {detail}")
+    conn.close()
+
+    stale = [entry for entry in allowlist if (entry['sql'], entry['plan']) not in used_allowlist]
+    for entry in stale:
+        print(f"⚠️  Unused allowlist entry: {entry['method']}: {entry['plan']}\n   {entry['sql']}")
+
+    print(f"\n🔎 Checked {len(RecordingConnection.statements)} statements from models.py")
+    if failures:
+        print(f"❌ {len(failures)} statement(s) scan a table or sort without an index.")
+        print(f"   Add an index, or allowlist the statement and plan line in {os.path.relpath(args.allowlist, ROOT)}:")
+        for entry, key, bad in failures:
+            for detail in bad:
+                print(json.dumps({'method': ', '.join(sorted(entry['origins'])), 'sql': key,
+                                  'plan': detail, 'reason': '...'}, indent=2, ensure_ascii=False))
+        sys.exit(1)
+    print("✅ All query plans use indexes")
+
+if __name__ == '__main__':
+    main()
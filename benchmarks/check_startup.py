@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Cold start budget for a worker: `python -X importtime -c "import wsgi"`.
+
+Importing wsgi imports the app and runs create_app(), so the cumulative
+import time of wsgi is what a worker (or the preloading gunicorn master)
+spends before it can serve. The fastest of --runs fresh interpreters (the
+least disturbed by other load on the machine) is compared against benchmarks/baselines/startup.json, and the script exits 1
+when it is more than --threshold percent slower, or when a module that should
+load lazily on first use (DEFERRED_MODULES) is imported at startup.
+
+Usage:
+    python benchmarks/check_startup.py [--runs 7] [--top 15]
+    python benchmarks/check_startup.py --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import secrets
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT, 'server')
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baselines', 'startup.json')
+
+# Only needed by code paths most workers never take
+DEFERRED_MODULES = [
+    'smtplib',               # email_service: first email sent
+    'email.mime.multipart',  # email_service: first email sent
+    'email.mime.text',       # email_service: first email sent
+]
+
+def measure(env):
+    """Parse one `-X importtime` run into {module: (depth, cumulative µs)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import wsgi'],
+        cwd=SERVER_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f'❌ import wsgi failed:\n{result.stderr[-2000:]}')
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.setdefault(name.strip(), (depth, int(cumulative)))
+    return modules
+
+def main():
+    parser = argparse.ArgumentParser(description='Check worker cold start time against a budget')
+    parser.add_argument('--runs', type=int, default=7, help='Fresh interpreters to measure')
+    parser.add_argument('--top', type=int, default=15, help='Slowest imports to list')
+    parser.add_argument('--threshold', type=float, default=20, help='Allowed slowdown in percent')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true', help='Record the fastest run as the new budget')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='workout-startup-')
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_PATH=os.path.join(workdir, 'workout.db'),
+        LOG_DIR=os.path.join(workdir, 'logs'),
+        SECRET_KEY=secrets.token_hex(32),
+        JWT_SECRET_KEY=secrets.token_hex(32),
+        PURGE_INTERVAL='0',
+        STATS_ROLLUP_INTERVAL='0',
+    )
+    # First run creates the schema and byte-compiles; workers restart against an existing database
+    measure(env)
+    runs = [measure(env) for _ in range(args.runs)]
+
+    total_ms = min(run['wsgi'][1] for run in runs) / 1000
+    median_ms = statistics.median(run['wsgi'][1] for run in runs) / 1000
+    # Direct dependencies of wsgi and app, by median cumulative time
+    names = {name for name, (depth, _) in runs[0].items() if 1 <= depth <= 2}
+    breakdown = sorted(
+        ((statistics.median(run[name][1] for run in runs if name in run) / 1000, name) for name in names),
+        reverse=True
+    )
+    print(f"{'module':<40} {'cumulative ms':>14}")
+    for ms, name in breakdown[:args.top]:
+        print(f"{name:<40} {ms:>14.1f}")
+    print(f"{'import wsgi (incl. create_app)':<40} {median_ms:>14.1f}")
+    print(f"{'import wsgi, fastest run':<40} {total_ms:>14.1f}")
+
+    eager = [name for name in DEFERRED_MODULES if name in runs[0]]
+    for name in eager:
+        print(f"❌ {name} is imported at startup; it should load on first use")
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('budget_ms')
+
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                            'processor': platform.machine()},
+                'budget_ms': round(total_ms, 1),
+            }, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Budget written to {args.baseline}")
+    elif baseline and total_ms > baseline * (1 + args.threshold / 100):
+        print(f"\n❌ Cold start {total_ms:.1f} ms is over the {baseline:.1f} ms budget "
+              f"by more than {args.threshold:.0f}%")
+        sys.exit(1)
+    elif baseline:
+        print(f"\n✅ Cold start {total_ms:.1f} ms within the {baseline:.1f} ms budget (+{args.threshold:.0f}%)")
+
+    if eager:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
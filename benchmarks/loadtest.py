@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+HTTP load test: scripted user journeys against the API with latency
+percentiles, throughput and error rates.
+
+Each virtual user logs in as one synthetic user (see server/synthetic.py) and
+then repeatedly runs weighted journeys: list templates, start a workout
+(template exercises plus the last weights for each), log a session, browse
+history, and occasionally log in again. The client is plain asyncio with
+keep-alive connections, so there are no extra dependencies.
+
+With --start-server a gunicorn serving wsgi:application (or, with
+--server uvicorn, uvicorn serving asgi:application) is started on a
+generated dataset (created once with seed.py and reused) and stopped at the end.
+Results are written as sorted, indented JSON so runs can be diffed across
+commits, and --compare exits non-zero when p95 latency or the error rate
+regresses.
+
+Usage:
+    python benchmarks/loadtest.py --start-server --profile small --users 20 --duration 60 \\
+        --output results/loadtest-$(git rev-parse --short HEAD).json
+    python benchmarks/loadtest.py --base-url http://127.0.0.1:8080 --duration 30
+    python benchmarks/loadtest.py --start-server --compare results/loadtest-main.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from urllib.parse import urlsplit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SERVER_DIR = os.path.join(ROOT, 'server')
+
+# Synthetic users are named like synthetic.py does and share its password
+USERNAME_FORMAT = 'synth{:07d}'
+PASSWORD = 'Synthetic123!'
+
+# Fixed end date so the generated dataset is identical on every machine
+DATASET_END_DATE = '2026-01-01'
+
+# Journey name -> relative weight
+JOURNEYS = {
+    'list_templates': 30,
+    'start_workout': 25,
+    'log_session': 20,
+    'browse_history': 20,
+    'login': 5,
+}
+
+# Endpoints with fewer samples are not used to flag regressions
+MIN_SAMPLES_FOR_COMPARE = 50
+
+class HTTPError(Exception):
+    pass
+
+class Connection:
+    """Minimal HTTP/1.1 client connection with keep-alive and reconnects."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except OSError:
+                pass
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers=None, body=None):
+        for attempt in (1, 2):
+            if self.writer is None:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                return await self._exchange(method, path, headers or {}, body)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # The server closed an idle keep-alive connection; retry once on a new one
+                await self.close()
+                if attempt == 2:
+                    raise
+
+    async def _exchange(self, method, path, headers, body):
+        lines = [f'{method} {path} HTTP/1.1', f'Host: {self.host}:{self.port}']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        lines.append(f'Content-Length: {len(body) if body else 0}')
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b''))
+        await self.writer.drain()
+
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = head.decode('latin-1').split('\r\n')
+        status = int(status_line.split(' ', 2)[1])
+        response_headers = {}
+        for line in header_lines:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                chunks.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            payload = b''.join(chunk[:-2] for chunk in chunks)
+        else:
+            payload = await self.reader.readexactly(int(response_headers.get('content-length', 0)))
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+        return status, payload
+
+class Recorder:
+    """Collect (endpoint, latency, ok) samples after the warm-up period."""
+
+    def __init__(self, record_after):
+        self.record_after = record_after
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, name, seconds, ok):
+        if time.monotonic() < self.record_after:
+            return
+        self.samples.setdefault(name, []).append(seconds * 1000)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+class VirtualUser:
+    def __init__(self, index, base_url, recorder, rng, think_ms):
+        url = urlsplit(base_url)
+        self.connection = Connection(url.hostname, url.port or 80)
+        self.username = USERNAME_FORMAT.format(index + 1)
+        self.recorder = recorder
+        self.rng = rng
+        self.think_ms = think_ms
+        self.token = None
+        self.templates = []
+
+    async def call(self, method, path, name, payload=None, expect=(200,)):
+        headers = {'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        body = None
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+            body = json.dumps(payload).encode('utf-8')
+
+        started = time.monotonic()
+        try:
+            status, data = await self.connection.request(method, path, headers, body)
+        except (OSError, asyncio.IncompleteReadError) as e:
+            self.recorder.add(name, time.monotonic() - started, False)
+            raise HTTPError(f'{name}: {e}')
+        self.recorder.add(name, time.monotonic() - started, status in expect)
+
+        if status == 401 and self.token:
+            self.token = None
+        if status not in expect:
+            raise HTTPError(f'{name}: HTTP {status}')
+        return json.loads(data) if data else None
+
+    async def think(self):
+        if self.think_ms:
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.think_ms / 1000)
+
+    async def login(self):
+        self.token = None
+        data = await self.call('POST', '/api/auth/login', 'POST /api/auth/login',
+                               {'username': self.username, 'password': PASSWORD})
+        self.token = data['access_token']
+
+    async def list_templates(self):
+        self.templates = await self.call('GET', '/api/templates', 'GET /api/templates')
+
+    async def _pick_template(self):
+        if not self.templates:
+            await self.list_templates()
+        if not self.templates:
+            raise HTTPError(f'{self.username} has no templates')
+        return self.rng.choice(self.templates)
+
+    async def start_workout(self):
+        template = await self._pick_template()
+        exercises = await self.call('GET', f"/api/templates/{template['id']}/exercises",
+                                    'GET /api/templates/{id}/exercises')
+        latest = {}
+        for exercise in exercises:
+            latest[exercise['id']] = await self.call('GET', f"/api/sessions/latest/{exercise['id']}",
+                                                     'GET /api/sessions/latest/{id}')
+        return template, exercises, latest
+
+    async def log_session(self):
+        template, exercises, latest = await self.start_workout()
+        await self.think()
+        payload = {
+            'template_id': template['id'],
+            'exercises': [
+                {
+                    'template_exercise_id': exercise['id'],
+                    'weight_kg': (latest[exercise['id']].get('weight_kg') or 20) + 2.5,
+                    'reps': latest[exercise['id']].get('reps') or 8,
+                    'sets': latest[exercise['id']].get('sets') or 3,
+                }
+                for exercise in exercises
+            ],
+        }
+        await self.call('POST', '/api/sessions', 'POST /api/sessions', payload, expect=(201,))
+
+    async def browse_history(self):
+        template = await self._pick_template()
+        await self.call('GET', f"/api/sessions?template={template['id']}", 'GET /api/sessions?template={id}')
+
+    async def run(self, deadline):
+        journeys = list(JOURNEYS)
+        weights = list(JOURNEYS.values())
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    if not self.token:
+                        await self.login()
+                    journey = self.rng.choices(journeys, weights)[0]
+                    await getattr(self, journey)()
+                except HTTPError:
+                    pass
+                await self.think()
+        finally:
+            await self.connection.close()
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(samples, errors, seconds):
+    values = sorted(samples)
+    return {
+        'requests': len(values),
+        'errors': errors,
+        'error_rate': round(errors / len(values), 4) if values else 0.0,
+        'rps': round(len(values) / seconds, 1),
+        'p50_ms': round(percentile(values, 50), 2),
+        'p95_ms': round(percentile(values, 95), 2),
+        'p99_ms': round(percentile(values, 99), 2),
+        'max_ms': round(values[-1], 2) if values else 0.0,
+    }
+
+async def run_load(base_url, users, duration, warmup, think_ms, seed):
+    start = time.monotonic()
+    recorder = Recorder(start + warmup)
+    deadline = start + warmup + duration
+    vusers = [VirtualUser(i, base_url, recorder, random.Random(seed * 10007 + i), think_ms) for i in range(users)]
+    await asyncio.gather(*(vu.run(deadline) for vu in vusers))
+
+    endpoints = {
+        name: summarize(values, recorder.errors.get(name, 0), duration)
+        for name, values in recorder.samples.items()
+    }
+    all_samples = [value for values in recorder.samples.values() for value in values]
+    return summarize(all_samples, sum(recorder.errors.values()), duration), endpoints
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def prepare_dataset(db_path, profile, seed, env):
+    if os.path.exists(db_path):
+        print(f"📂 Reusing dataset {db_path}")
+        return
+    print(f"🏗️  Generating '{profile}' dataset in {db_path} (first run only)")
+    subprocess.run(
+        [sys.executable, 'seed.py', '--profile', profile, '--seed', str(seed), '--end-date', DATASET_END_DATE],
+        cwd=SERVER_DIR, env=env, check=True, stdout=subprocess.DEVNULL
+    )
+
+def start_server(args, port):
+    workdir = tempfile.mkdtemp(prefix='workout-loadtest-')
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f'workout-loadtest-{args.profile}-{args.seed}.db')
+    env = dict(
+        os.environ,
+        FLASK_ENV='production',
+        DATABASE_PATH=os.path.abspath(db_path),
+        LOG_DIR=os.path.join(workdir, 'logs'),
+        SECRET_KEY=secrets.token_hex(32),
+        JWT_SECRET_KEY=secrets.token_hex(32),
+        JWT_EXPIRES_MINUTES='120',
+        # The load generator is a single client IP; keep the limiter out of the measurement
+        RATE_LIMIT_DEFAULT='10000000 per minute',
+        RATE_LIMIT_AUTH_LOGIN='10000000 per minute',
+        PURGE_INTERVAL='0',
+        STATS_ROLLUP_INTERVAL='0',
+    )
+    prepare_dataset(db_path, args.profile, args.seed, env)
+
+    if args.server == 'uvicorn':
+        command = ['uvicorn', '--app-dir', SERVER_DIR, '--host', '127.0.0.1', '--port', str(port),
+                   '--no-proxy-headers', '--no-access-log', '--log-level', 'warning']
+        if args.workers:
+            command += ['--workers', str(args.workers)]
+        command += ['asgi:application']
+    else:
+        command = ['gunicorn', '--config', os.path.join(SERVER_DIR, 'gunicorn.conf.py'),
+                   '--bind', f'127.0.0.1:{port}', '--log-level', 'warning']
+        if args.workers:
+            command += ['--workers', str(args.workers)]
+        command += args.gunicorn_arg + ['wsgi:application']
+    log_path = os.path.join(workdir, f'{args.server}.log')
+    print(f"🏃 {' '.join(command)} (log: {log_path})")
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    health_url = f'http://127.0.0.1:{port}/health'
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(health_url, timeout=1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise SystemExit(f'❌ {args.server} exited during startup, see {log_path}')
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f'❌ {args.server} did not become healthy')
+
+def compare(baseline, current, threshold_pct):
+    """Print per-endpoint deltas; return True when something regressed."""
+    regressed = False
+    print(f"\n{'endpoint':<38} {'p95 before':>11} {'p95 after':>10} {'change':>8} {'rps before':>11} {'rps after':>10}")
+    rows = [('TOTAL', baseline['summary'], current['summary'])]
+    rows += [(name, baseline['endpoints'].get(name), stats) for name, stats in sorted(current['endpoints'].items())]
+    for name, before, after in rows:
+        if not before:
+            print(f"{name:<38} {'-':>11} {after['p95_ms']:>10.1f}")
+            continue
+        change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        flag = ''
+        if after['requests'] >= MIN_SAMPLES_FOR_COMPARE and before['requests'] >= MIN_SAMPLES_FOR_COMPARE:
+            if change > threshold_pct or after['error_rate'] > before['error_rate'] + 0.01:
+                flag = '  ❌'
+                regressed = True
+        print(f"{name:<38} {before['p95_ms']:>11.1f} {after['p95_ms']:>10.1f} {change:>+7.1f}% "
+              f"{before['rps']:>11.1f} {after['rps']:>10.1f}{flag}")
+    return regressed
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API with scripted user journeys')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                        help='Server to test (ignored with --start-server)')
+    parser.add_argument('--start-server', action='store_true', help='Start a server on a generated dataset')
+    parser.add_argument('--server', default='gunicorn', choices=['gunicorn', 'uvicorn'],
+                        help='Server for --start-server: gunicorn (wsgi.py) or uvicorn (asgi.py)')
+    parser.add_argument('--profile', default='small', help='Dataset preset for --start-server')
+    parser.add_argument('--db', help='Dataset path for --start-server (generated if missing)')
+    parser.add_argument('--workers', type=int, help='Worker processes for --start-server (default: gunicorn.conf.py, 1 for uvicorn)')
+    parser.add_argument('--gunicorn-arg', action='append', default=[], help='Extra gunicorn argument (repeatable)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--users', type=int, default=20, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=60, help='Measured seconds')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds before measuring starts')
+    parser.add_argument('--think-ms', type=float, default=0, help='Mean pause between steps (0 = closed loop)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=20, help='Allowed p95 increase in percent')
+    args = parser.parse_args()
+
+    process = None
+    base_url = args.base_url
+    if args.start_server:
+        process = start_server(args, args.port)
+        base_url = f'http://127.0.0.1:{args.port}'
+
+    try:
+        print(f"🔥 {args.users} users for {args.duration:.0f}s (+{args.warmup:.0f}s warm-up) against {base_url}")
+        summary, endpoints = asyncio.run(
+            run_load(base_url, args.users, args.duration, args.warmup, args.think_ms, args.seed)
+        )
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'date': datetime.utcnow().replace(microsecond=0).isoformat(),
+            'base_url': base_url,
+            'profile': args.profile if args.start_server else None,
+            'workers': args.workers if args.start_server else None,
+            'server': args.server if args.start_server else None,
+            'worker_class': (
+                os.environ.get('GUNICORN_WORKER_CLASS', 'gthread') if args.start_server and args.server == 'gunicorn' else None
+            ),
+            'users': args.users,
+            'duration_s': args.duration,
+            'think_ms': args.think_ms,
+            'seed': args.seed,
+        },
+        'summary': summary,
+        'endpoints': endpoints,
+    }
+
+    print(f"\n{'endpoint':<38} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, stats in sorted(endpoints.items()) + [('TOTAL', summary)]:
+        print(f"{name:<38} {stats['requests']:>7} {stats['rps']:>8.1f} {stats['error_rate'] * 100:>5.1f}% "
+              f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, results, args.threshold):
+            print(f"\n❌ Regression: p95 up more than {args.threshold:.0f}% or error rate up more than 1 point")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+if __name__ == '__main__':
+    main()
@@ -68,7 +68,7 @@ chown -R $APP_USER:$APP_USER $APP_DIR
 print_status "Installing application files..."
 cp -r server/* $APP_DIR/server/
 cp -r public/* $APP_DIR/public/
-cp requirements-production.txt $APP_DIR/
+cp requirements-production.txt requirements-asgi.txt $APP_DIR/
 cp .env.example $APP_DIR/
 
 # Set up Python virtual environment
@@ -98,6 +98,11 @@ else
     print_status "Environment file already exists"
 fi
 
+# Fingerprint and precompress static assets
+print_status "Building static assets..."
+su - $APP_USER -c "cd $APP_DIR && venv/bin/python server/build_static.py --source public --output build/public"
+grep -q '^STATIC_DIR=' $APP_DIR/.env || echo "STATIC_DIR=$APP_DIR/build/public" >> $APP_DIR/.env
+
 # Initialize database
 print_status "Initializing database..."
 su - $APP_USER -c "cd $APP_DIR/server && FLASK_ENV=production DATABASE_PATH=$APP_DIR/data/workout.db ../venv/bin/python seed.py"
@@ -146,27 +151,22 @@ EOF
 
 # Set up backup script
 print_status "Installing backup script..."
+grep -q '^BACKUP_DIR=' $APP_DIR/.env || echo "BACKUP_DIR=$APP_DIR/backups" >> $APP_DIR/.env
 cat > /usr/local/bin/workout-tracker-backup << 'EOF'
 #!/bin/bash
-BACKUP_DIR="/opt/workout-tracker/backups"
-DB_PATH="/opt/workout-tracker/data/workout.db"
-DATE=$(date +%Y%m%d_%H%M%S)
-BACKUP_FILE="$BACKUP_DIR/workout_backup_$DATE.sqlite"
-
-mkdir -p $BACKUP_DIR
-sqlite3 $DB_PATH ".backup $BACKUP_FILE"
-gzip $BACKUP_FILE
-
-# Clean old backups (keep 30 days)
-find $BACKUP_DIR -name "workout_backup_*.sqlite.gz" -mtime +30 -delete
-
-echo "Backup completed: $BACKUP_FILE.gz"
+# Online backup with integrity check and retention (see server/backup.py).
+# Extra arguments are passed on: --list, --verify [NAME], --restore NAME --to PATH
+cd /opt/workout-tracker/server || exit 1
+set -a
+. ../.env
+set +a
+exec ../venv/bin/python backup.py "$@"
 EOF
 
 chmod +x /usr/local/bin/workout-tracker-backup
 
-# Set up daily backup cron job
-echo "0 2 * * * root /usr/local/bin/workout-tracker-backup" > /etc/cron.d/workout-tracker-backup
+# Set up daily backup cron job (runs as the app user so files keep its ownership)
+echo "0 2 * * * $APP_USER /usr/local/bin/workout-tracker-backup" > /etc/cron.d/workout-tracker-backup
 
 # Set correct permissions
 print_status "Setting file permissions..."
@@ -22,8 +22,12 @@ else
     echo "📂 Database already exists, skipping initialization"
 fi
 
+# Shared directory for per-worker Prometheus samples (gunicorn.conf.py wipes it on start)
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus-multiproc}"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
 echo "🏃 Starting Gunicorn server..."
 
 # Start the application
 cd /app
-exec gunicorn --bind 0.0.0.0:8080 --workers 2 --timeout 120 --chdir server wsgi:application
+exec gunicorn --config server/gunicorn.conf.py --bind 0.0.0.0:8080 wsgi:application
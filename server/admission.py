@@ -0,0 +1,129 @@
+"""
+Admission control: shed API requests fast when the worker is saturated.
+
+Every /api/ request is put in a priority class:
+- critical: auth and session writes (what users are in the middle of);
+- low: exports, imports, backup downloads and the admin dashboard (bulk
+  work that can wait);
+- normal: everything else.
+
+A request is shed with 503 and Retry-After instead of being run when
+- it waited in front of the worker (nginx accept to here, from the
+  X-Request-Start header nginx sets) longer than its class's share of the
+  queue budget, so the client would likely time out anyway; or
+- the requests already in flight in this worker use up its class's share of
+  the worker's threads, so bulk work cannot take the slots writes need.
+
+The decision is a header parse and a counter, so it runs on every request.
+Admitted and shed requests are counted in workout_admission_total, and
+queue waits are recorded in workout_request_queue_wait_seconds.
+"""
+
+import json
+import threading
+import time
+from werkzeug.wsgi import ClosingIterator
+from metrics import ADMISSION_DECISIONS, QUEUE_WAIT
+
+CRITICAL, NORMAL, LOW = 'critical', 'normal', 'low'
+
+# Multiplier applied to the queue budget per class
+QUEUE_BUDGET_FACTORS = {CRITICAL: 3.0, NORMAL: 1.0, LOW: 0.5}
+# Share of the worker's threads a class may fill
+CAPACITY_SHARES = {CRITICAL: 1.0, NORMAL: 0.75, LOW: 0.5}
+
+LOW_PRIORITY_PREFIXES = ('/api/export', '/api/import', '/api/admin/stats', '/api/admin/backups')
+WRITE_METHODS = ('POST', 'PUT', 'DELETE')
+
+def classify(method, path):
+    """Priority class of an API request."""
+    if path.startswith('/api/auth/'):
+        return CRITICAL
+    if path.startswith('/api/sessions') and method in WRITE_METHODS:
+        return CRITICAL
+    if path.startswith(LOW_PRIORITY_PREFIXES) or path.endswith('/export'):
+        return LOW
+    return NORMAL
+
+def queue_wait(request_start, now):
+    """
+    Seconds since the proxy received the request, from an X-Request-Start
+    value ('t=<seconds>' as nginx's $msec, or milli/microseconds), or None.
+    """
+    if not request_start:
+        return None
+    try:
+        started = float(request_start[2:] if request_start.startswith('t=') else request_start)
+    except ValueError:
+        return None
+    if started > 1e14:
+        started /= 1e6
+    elif started > 1e11:
+        started /= 1e3
+    return max(0.0, now - started)
+
+class AdmissionMiddleware:
+    """Shed /api/ requests by priority once queue wait or concurrency is over budget."""
+
+    def __init__(self, wsgi_app, capacity=1, queue_budget_ms=1000, retry_after=2):
+        self.wsgi_app = wsgi_app
+        # A single-threaded worker never sees another request in flight; capacity 1
+        # is also the default under threaded dev servers, which must not shed
+        self.limits = None
+        if capacity > 1:
+            self.limits = {name: max(1, int(capacity * share)) for name, share in CAPACITY_SHARES.items()}
+        self.budgets = {name: queue_budget_ms / 1000.0 * factor for name, factor in QUEUE_BUDGET_FACTORS.items()}
+        self.retry_after = str(retry_after)
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith('/api/'):
+            return self.wsgi_app(environ, start_response)
+
+        priority = classify(environ.get('REQUEST_METHOD', 'GET'), path)
+        waited = queue_wait(environ.get('HTTP_X_REQUEST_START'), time.time())
+        if waited is not None:
+            QUEUE_WAIT.labels(priority).observe(waited)
+            if self.budgets[priority] and waited > self.budgets[priority]:
+                return self._shed(priority, 'queue', start_response)
+
+        with self._lock:
+            if self.limits and self.in_flight >= self.limits[priority]:
+                admitted = False
+            else:
+                admitted = True
+                self.in_flight += 1
+        if not admitted:
+            return self._shed(priority, 'capacity', start_response)
+        ADMISSION_DECISIONS.labels(priority, 'admitted').inc()
+
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except Exception:
+            self._release()
+            raise
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if isinstance(file_wrapper, type) and isinstance(app_iter, file_wrapper):
+            # Wrapping a file response would stop the server from using sendfile();
+            # the kernel does the copy, so the slot is released at hand-over
+            self._release()
+            return app_iter
+        # Streamed responses hold their slot until the server closes the body
+        return ClosingIterator(app_iter, self._release)
+
+    def _release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def _shed(self, priority, reason, start_response):
+        ADMISSION_DECISIONS.labels(priority, f'shed_{reason}').inc()
+        body = json.dumps({'error': 'Server is busy, please retry shortly'}).encode('utf-8')
+        start_response('503 Service Unavailable', [
+            ('Content-Type', 'application/json'),
+            ('Content-Length', str(len(body))),
+            ('Retry-After', self.retry_after),
+            ('Cache-Control', 'no-store'),
+        ])
+        return [body]
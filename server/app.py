@@ -1,14 +1,28 @@
 import os
-from flask import Flask, jsonify, request
-from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_jwt_extended import JWTManager, jwt_required
+from flask import Flask, Response, jsonify, request, send_file, send_from_directory
+from flask_jwt_extended import JWTManager
 from config import config
-from db import init_db
-from auth import login, register, change_password, get_password_policy, get_current_user_id, require_admin, forgot_password, reset_password, get_current_user
+from db import init_db, register_connection_hook
+from auth import jwt_required, login, register, change_password, get_password_policy, get_current_user_id, require_admin, forgot_password, reset_password, get_current_user
 from models import Template, TemplateExercise, Session, SessionExercise, User, PasswordResetToken
 from email_service import email_service
+from export import generate_export, export_filename, EXPORT_FORMATS, EXPORT_BATCH_SIZE
+from importer import import_history, IMPORT_FORMATS
+from stats import run_rollup, get_dashboard
+from jobs import start_periodic
+from purge import run_purge_jobs, get_purge_jobs
+from backup import run_scheduled_backup, list_backups, latest_backup, backup_path, BACKUP_CHECK_INTERVAL
+from replicate import Replicator, disable_autocheckpoint
+from metrics import init_metrics
+from sql_tracer import init_sql_tracer
+from profiler import ProfilerMiddleware, PROFILE_HEADER, create_profile_token, list_profiles
+from tracing import init_tracing
+from health import init_health, readiness
+from static_files import StaticFiles
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware
+from body_limits import LimitedRequest, spool_body
+from json_provider import FastJSONProvider
 from validation import (
     validate_request, validate_json_size, ValidationError,
     TEMPLATE_CREATION_SCHEMA, TEMPLATE_UPDATE_SCHEMA, SESSION_CREATION_SCHEMA,
@@ -17,7 +31,17 @@ from validation import (
 from security_logger import log_data_access, log_access_denied, log_security_event
 
 def create_app():
+    # Flask-Limiter (with limits and its async storage backends) and Flask-CORS
+    # are only needed once an app is built, not by scripts importing this module
+    from flask_cors import CORS
+    from flask_limiter import Limiter
+    from flask_limiter.util import get_remote_address
+
     app = Flask(__name__)
+    # Per-route body caps that also apply to chunked uploads (validate_json_size)
+    app.request_class = LimitedRequest
+    # orjson-backed jsonify()/get_json(); set before init_tracing wraps app.json.response
+    app.json = FastJSONProvider(app)
     
     # Load configuration
     config_name = os.environ.get('FLASK_ENV', 'development')
@@ -25,11 +49,17 @@ def create_app():
     app.config.from_object(config_obj)
     
     # Configure static files (use absolute path)
-    app.static_folder = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'public'))
+    app.static_folder = os.path.abspath(config_obj.STATIC_DIR)
     
     # Initialize extensions
     jwt = JWTManager(app)
     
+    # Tokens of accounts disabled for deletion (or already deleted) stop
+    # working at once instead of when they expire
+    @jwt.token_in_blocklist_loader
+    def token_revoked(jwt_header, jwt_payload):
+        return not User.is_active(int(jwt_payload[app.config['JWT_IDENTITY_CLAIM']]))
+    
     # Configure rate limiting
     limiter = Limiter(
         app=app,
@@ -45,9 +75,73 @@ def create_app():
          allow_headers=['Content-Type', 'Authorization'],
          methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'])
     
+    # Log files are opened on first use, but readiness checks free space in
+    # LOG_DIR from the first probe on
+    os.makedirs(config_obj.LOG_DIR, exist_ok=True)
+    
+    # Request, database and auth instrumentation
+    init_metrics(app, config_obj.METRICS_TOKEN, limiter)
+    init_health(app)
+    init_tracing(
+        app,
+        config_obj.TRACING_EXPORTER,
+        jsonl_path=config_obj.TRACING_FILE,
+        otlp_endpoint=config_obj.TRACING_OTLP_ENDPOINT
+    )
+    if config_obj.SQL_TRACE:
+        init_sql_tracer(
+            app,
+            slow_query_ms=config_obj.SQL_SLOW_QUERY_MS,
+            expose_headers=config_name != 'production',
+            log_dir=config_obj.LOG_DIR
+        )
+    
+    # Negotiated gzip / br / zstd for API and static responses
+    if config_obj.COMPRESSION_ENCODINGS:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            encodings=config_obj.COMPRESSION_ENCODINGS,
+            min_size=config_obj.COMPRESSION_MIN_SIZE,
+            levels={
+                'gzip': config_obj.COMPRESSION_GZIP_LEVEL,
+                'br': config_obj.COMPRESSION_BR_LEVEL,
+                'zstd': config_obj.COMPRESSION_ZSTD_LEVEL,
+            }
+        )
+    
+    # Sampled / on-demand request profiling
+    app.wsgi_app = ProfilerMiddleware(
+        app.wsgi_app,
+        profile_dir=config_obj.PROFILE_DIR,
+        sample_rate=config_obj.PROFILE_SAMPLE_RATE,
+        keep=config_obj.PROFILE_KEEP,
+        secret=config_obj.SECRET_KEY
+    )
+    
+    # Outermost, so shedding happens before any other work
+    if config_obj.ADMISSION_CONTROL:
+        app.wsgi_app = AdmissionMiddleware(
+            app.wsgi_app,
+            capacity=config_obj.WORKER_THREADS,
+            queue_budget_ms=config_obj.ADMISSION_QUEUE_BUDGET_MS,
+            retry_after=config_obj.ADMISSION_RETRY_AFTER
+        )
+    
     # Initialize database
     init_db()
     
+    # Keep admin dashboard rollups current
+    start_periodic('stats-rollup', config_obj.STATS_ROLLUP_INTERVAL, run_rollup)
+    start_periodic('account-purge', config_obj.PURGE_INTERVAL, run_purge_jobs)
+    if config_obj.BACKUP_INTERVAL > 0:
+        start_periodic('backup', min(config_obj.BACKUP_INTERVAL, BACKUP_CHECK_INTERVAL),
+                       lambda: run_scheduled_backup(config_obj))
+    if config_obj.REPLICA_DIR:
+        # One worker wins the replica lock and ships the WAL; the rest only
+        # leave checkpoints to it
+        register_connection_hook(disable_autocheckpoint)
+        start_periodic('replicate', config_obj.REPLICA_SYNC_INTERVAL, Replicator.from_config(config_obj).sync)
+    
     # Register routes
     register_routes(app, limiter, config_obj)
     
@@ -89,12 +183,104 @@ def register_routes(app, limiter, config_obj):
     def auth_reset_password():
         return reset_password()
 
+    def export_response(user):
+        """Stream a user's history as NDJSON or CSV, optionally gzipped."""
+        fmt = request.args.get('format', 'ndjson').lower()
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': 'Format must be ndjson or csv'}), 400
+        compress = request.args.get('gzip', 'false').lower() in ('1', 'true')
+
+        chunks = generate_export(Session.iter_history(user['id'], EXPORT_BATCH_SIZE), fmt, compress)
+        filename = export_filename(user['username'], fmt, compress)
+        response = Response(
+            chunks,
+            mimetype='application/gzip' if compress else EXPORT_FORMATS[fmt]
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    # Export routes
+    @app.route('/api/export', methods=['GET'])
+    @jwt_required()
+    @limiter.limit("10 per hour")
+    def export_history():
+        user = get_current_user()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        log_data_access(user['id'], 'export', user['id'], 'EXPORT')
+        return export_response(user)
+
+    # Import routes
+    @app.route('/api/import', methods=['POST'])
+    @jwt_required()
+    @limiter.limit("5 per hour")
+    @validate_json_size(config_obj.IMPORT_MAX_SIZE_KB)
+    def import_sessions():
+        user_id = get_current_user_id()
+        fmt = request.args.get('format', 'csv').lower()
+        if fmt not in IMPORT_FORMATS:
+            return jsonify({'error': 'Format must be csv or ndjson'}), 400
+
+        # Spooled first, so an oversized upload is rejected before anything is imported
+        body = spool_body(request.stream)
+        try:
+            stats = import_history(user_id, body, fmt)
+        finally:
+            body.close()
+        log_data_access(user_id, 'import', f"{stats['sessions']} sessions", 'IMPORT')
+        if stats['sessions']:
+            return jsonify(stats), 201
+        # Nothing new, but a re-run of an earlier import is not an error
+        return jsonify(stats), 200 if stats['duplicate_sessions'] else 400
+
     # Admin routes
+    @app.route('/api/admin/users/<int:user_id>/export', methods=['GET'])
+    @require_admin
+    def admin_export_user(user_id):
+        user = User.get_by_id(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        log_data_access(get_current_user_id(), 'export', user_id, 'ADMIN_EXPORT')
+        return export_response(user)
+
+    @app.route('/api/admin/stats', methods=['GET'])
+    @require_admin
+    def admin_get_stats():
+        try:
+            days = int(request.args.get('days', 30))
+        except ValueError:
+            return jsonify({'error': 'days must be an integer'}), 400
+        if not 1 <= days <= 366:
+            return jsonify({'error': 'days must be between 1 and 366'}), 400
+        return jsonify(get_dashboard(days))
+
     @app.route('/api/admin/users', methods=['GET'])
     @require_admin
     def admin_get_users():
-        users = User.get_all_users()
-        return jsonify(users)
+        try:
+            limit = int(request.args.get('limit', 50))
+            cursor = request.args.get('cursor')
+            cursor = int(cursor) if cursor else None
+        except ValueError:
+            return jsonify({'error': 'limit and cursor must be integers'}), 400
+        if not 1 <= limit <= 200:
+            return jsonify({'error': 'limit must be between 1 and 200'}), 400
+        
+        role = request.args.get('role')
+        if role and role not in ['admin', 'user']:
+            return jsonify({'error': 'Role must be admin or user'}), 400
+        search = request.args.get('q', '').strip()[:100]
+        
+        users, next_cursor, total, total_capped = User.list_users(
+            limit=limit, cursor=cursor, search=search or None, role=role
+        )
+        return jsonify({
+            'users': users,
+            'next_cursor': next_cursor,
+            'total': total,
+            'total_capped': total_capped
+        })
     
     @app.route('/api/admin/users', methods=['POST'])
     @require_admin
@@ -168,11 +354,56 @@ def register_routes(app, limiter, config_obj):
         if current_user['id'] == user_id:
             return jsonify({'error': 'Cannot delete your own account'}), 400
         
-        success = User.delete_user(user_id)
-        if success:
-            return '', 204
-        else:
+        job_id = User.delete_user(user_id)
+        if job_id is None:
             return jsonify({'error': 'User not found'}), 404
+        
+        log_security_event('USER_DELETION_QUEUED', f'User {user_id} disabled and queued for deletion',
+                           user_id=current_user['id'], additional_data={'purge_job_id': job_id})
+        return jsonify({'message': 'User disabled and queued for deletion', 'job_id': job_id}), 202
+    
+    @app.route('/api/admin/profiles', methods=['GET'])
+    @require_admin
+    def admin_list_profiles():
+        return jsonify(list_profiles(config_obj.PROFILE_DIR))
+    
+    @app.route('/api/admin/profiles/<path:name>', methods=['GET'])
+    @require_admin
+    def admin_download_profile(name):
+        return send_from_directory(os.path.abspath(config_obj.PROFILE_DIR), name, as_attachment=True)
+    
+    @app.route('/api/admin/backups', methods=['GET'])
+    @require_admin
+    def admin_list_backups():
+        return jsonify(list_backups(config_obj.BACKUP_DIR))
+    
+    @app.route('/api/admin/backups/latest', methods=['GET'])
+    @require_admin
+    def admin_download_latest_backup():
+        latest = latest_backup(config_obj.BACKUP_DIR)
+        path = latest and backup_path(config_obj.BACKUP_DIR, latest['name'])
+        if not path:
+            return jsonify({'error': 'No backups available'}), 404
+        log_data_access(get_current_user_id(), 'backup', latest['name'], 'ADMIN_BACKUP_DOWNLOAD')
+        # A file response: gunicorn sends it with sendfile() via wsgi.file_wrapper
+        response = send_file(os.path.abspath(path), mimetype='application/gzip', as_attachment=True,
+                             download_name=latest['name'], conditional=True)
+        response.headers['X-Backup-SHA256'] = latest['sha256']
+        return response
+    
+    @app.route('/api/admin/profiles/token', methods=['POST'])
+    @require_admin
+    def admin_create_profile_token():
+        if not config_obj.SECRET_KEY:
+            return jsonify({'error': 'SECRET_KEY is required for profiling tokens'}), 400
+        token, expires = create_profile_token(config_obj.SECRET_KEY)
+        log_security_event('PROFILE_TOKEN_ISSUED', 'Profiling token issued', user_id=get_current_user_id())
+        return jsonify({'header': PROFILE_HEADER, 'value': token, 'expires_at': expires})
+    
+    @app.route('/api/admin/purge-jobs', methods=['GET'])
+    @require_admin
+    def admin_get_purge_jobs():
+        return jsonify(get_purge_jobs())
     
     @app.route('/api/admin/users/<int:user_id>/reset-password', methods=['POST'])
     @require_admin
@@ -370,6 +601,17 @@ def register_routes(app, limiter, config_obj):
             'auth_method': 'jwt'
         }), 200
 
+    @app.route('/health/live', methods=['GET'])
+    @limiter.exempt
+    def health_live():
+        return jsonify({'status': 'alive'}), 200
+
+    @app.route('/health/ready', methods=['GET'])
+    @limiter.exempt
+    def health_ready():
+        result, cached = readiness(config_obj)
+        return jsonify({**result, 'cached': cached}), 503 if result['status'] == 'not_ready' else 200
+
     # Authentication status endpoint
     @app.route('/api/auth/status', methods=['GET'])
     @jwt_required()
@@ -380,14 +622,24 @@ def register_routes(app, limiter, config_obj):
             'user': user_info
         })
 
+    # Body over the route's cap, found while reading (chunked) or by Werkzeug
+    @app.errorhandler(413)
+    def request_too_large(e):
+        limit = request.max_content_length
+        if limit:
+            return jsonify({'error': f'Request too large (max {limit // 1024}KB)'}), 413
+        return jsonify({'error': 'Request too large'}), 413
+
     # Serve static files for PWA
+    static_files = StaticFiles(config_obj.STATIC_DIR)
+
     @app.route('/')
     def serve_index():
-        return app.send_static_file('index.html')
+        return static_files.send('index.html')
 
     @app.route('/<path:path>')
     def serve_static(path):
-        return app.send_static_file(path)
+        return static_files.send(path)
 
 # For development
 if __name__ == '__main__':
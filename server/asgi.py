@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+ASGI entry point for production deployment under uvicorn.
+
+    pip install -r requirements-asgi.txt
+    uvicorn --app-dir server asgi:application --host 127.0.0.1 --port 8080 --no-proxy-headers
+
+This is the application wsgi.py serves, with the same routes, JWT handling,
+rate limits and validation. Only the server model is different. uvicorn's
+event loop owns the sockets, so idle keep-alive connections and slow clients
+do not hold a thread. Each request runs in a bounded thread pool
+(ASGI_THREADS per process), and the blocking work there (SQLite, SMTP,
+password hashing) stays off the event loop.
+
+Run one process per CPU with --workers. Each process imports the app and
+starts its own background jobs. --no-proxy-headers keeps REMOTE_ADDR the
+socket peer, as under gunicorn, so rate limits are keyed the same way.
+
+Environment overrides:
+    ASGI_THREADS   requests handled concurrently per process (default 8)
+"""
+import os
+import sys
+
+# Add the server directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+threads = int(os.environ.get('ASGI_THREADS', 8))
+# Concurrent requests one process can hold, used by the readiness pool check
+# (config.py reads it on import)
+os.environ['WORKER_THREADS'] = str(threads)
+
+from a2wsgi import WSGIMiddleware
+from app import create_app
+
+# Set production environment
+os.environ.setdefault('FLASK_ENV', 'production')
+
+def input_terminated(app):
+    """
+    Mark wsgi.input as ending with the body. a2wsgi's stream does (chunked
+    bodies included) but does not say so, and without the flag Werkzeug reads
+    a body without Content-Length as empty and skips the request body cap.
+    """
+    def wrapped(environ, start_response):
+        environ['wsgi.input_terminated'] = True
+        return app(environ, start_response)
+    return wrapped
+
+application = WSGIMiddleware(input_terminated(create_app()), workers=threads)
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(application, host='127.0.0.1', port=8080, proxy_headers=False)
@@ -1,9 +1,10 @@
-from flask import jsonify, request
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask import current_app, jsonify, request
+from flask_jwt_extended import create_access_token, get_jwt_identity, verify_jwt_in_request
 from models import User, PasswordResetToken
 from security_logger import log_auth_success, log_auth_failure, log_security_event
 from validation import validate_username
 from email_service import email_service
+from tracing import span
 from functools import wraps
 
 def login():
@@ -109,11 +110,24 @@ def get_password_policy():
     
     return jsonify({
         'requirements': requirements,
-        'policy': policy
+        'policy': dict(policy)
     }), 200
 
+def jwt_required(optional=False, fresh=False, refresh=False, locations=None,
+                 verify_type=True, skip_revocation_check=False):
+    """flask_jwt_extended.jwt_required with JWT verification traced as a span."""
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            with span('auth.verify_jwt'):
+                verify_jwt_in_request(optional, fresh, refresh, locations, verify_type, skip_revocation_check)
+            return current_app.ensure_sync(fn)(*args, **kwargs)
+        return decorator
+    return wrapper
+
 def get_current_user_id():
-    return int(get_jwt_identity())
+    with span('auth.get_current_user_id'):
+        return int(get_jwt_identity())
 
 def get_current_user():
     """Get current user data."""
@@ -141,7 +155,7 @@ def forgot_password():
     email = data['email'].lower().strip()
     user = User.get_by_email(email)
     
-    if user:
+    if user and not user['disabled_at']:
         # Create reset token
         token = PasswordResetToken.create(user['id'])
         
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Online backups of the live SQLite database.
+
+The database is copied with sqlite3's backup API, BACKUP_PAGES_PER_STEP
+pages at a time with a short sleep between steps. A writer therefore waits
+for one step at most, never for the whole copy. SQLite restarts a stepped
+copy whenever another connection writes. If the stepped copy has not
+finished after BACKUP_MAX_STEPPED_SECONDS, or after BACKUP_MAX_RESTARTS
+restarts, a WAL-mode database (replication on) is copied in a single step,
+since its readers never block writers. In rollback-journal mode a single
+step would lock writers out for the whole pass (seconds per GB), so the
+backup is given up instead and the scheduler tries again at its next check.
+
+Each copy is checked with PRAGMA integrity_check before it is kept. It is
+then gzipped into BACKUP_DIR as workout-<UTC timestamp>.db.gz next to a
+.json sidecar recording its size, SHA-256, page count and check result.
+Files only get their final name once complete, so a crash never leaves a
+torn backup behind.
+
+Retention keeps the newest BACKUP_KEEP_LAST backups, plus the newest backup
+of each of the last BACKUP_KEEP_DAILY days and BACKUP_KEEP_WEEKLY ISO weeks
+that have one. Everything else is deleted after each run.
+
+The app checks every few minutes and takes a backup once the newest one is
+BACKUP_INTERVAL seconds old (0 disables). A lock file keeps workers from
+backing up at the same time. From the command line or cron:
+
+    python backup.py                     # back up now and apply retention
+    python backup.py --list
+    python backup.py --verify [NAME]     # checksum and integrity of a stored backup
+    python backup.py --restore NAME --to restored.db
+"""
+
+import argparse
+import fcntl
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import db
+
+logger = logging.getLogger('backup')
+
+# Pages copied per backup step (4 KB pages: 1 MB) and the pause between steps
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.005
+
+# Stepped copies restarted by writes this often, or running this long, are
+# redone in a single step
+BACKUP_MAX_RESTARTS = 3
+BACKUP_MAX_STEPPED_SECONDS = 60
+
+# Seconds between checks whether a scheduled backup is due
+BACKUP_CHECK_INTERVAL = 300
+
+BACKUP_PREFIX = 'workout-'
+BACKUP_SUFFIX = '.db.gz'
+TIMESTAMP_FORMAT = '%Y%m%dT%H%M%SZ'
+LOCK_FILE = '.backup.lock'
+CHUNK_SIZE = 1024 * 1024
+
+class BackupError(Exception):
+    """A backup could not be taken, verified or restored."""
+
+class BackupBusy(BackupError):
+    """Writes kept restarting the copy; try again later."""
+
+class _SteppedCopyTooSlow(Exception):
+    pass
+
+def _sidecar(path):
+    return path[:-len(BACKUP_SUFFIX)] + '.json'
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def write_json(path, data):
+    partial = path + '.partial'
+    with open(partial, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write('\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+def integrity_check(path):
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        conn.close()
+    return ('ok' if rows == ['ok'] else '; '.join(rows[:10])), page_count
+
+def use_rollback_journal(path):
+    """
+    Mark a copied database as rollback-journal mode (header bytes 18-19), so
+    opening it never creates -wal/-shm files next to it. The app switches it
+    back to WAL when replication is on.
+    """
+    with open(path, 'r+b') as f:
+        f.seek(18)
+        f.write(b'\x01\x01')
+
+def discard_wal(path):
+    """Remove -wal/-shm files left by the database previously at path."""
+    for suffix in ('-wal', '-shm'):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+def _copy_database(source_path, target_path):
+    """
+    Copy the live database into target_path; return 'stepped' or 'single'.
+    Raises BackupBusy when a rollback-journal database keeps restarting the
+    stepped copy.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        deadline = time.monotonic() + BACKUP_MAX_STEPPED_SECONDS
+        state = {'remaining': None, 'restarts': 0}
+
+        def progress(status, remaining, total):
+            # A write from another connection starts the copy over
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+            state['remaining'] = remaining
+            if state['restarts'] >= BACKUP_MAX_RESTARTS or time.monotonic() > deadline:
+                raise _SteppedCopyTooSlow()
+
+        try:
+            source.backup(target, pages=BACKUP_PAGES_PER_STEP, progress=progress, sleep=BACKUP_STEP_SLEEP)
+            return 'stepped'
+        except _SteppedCopyTooSlow:
+            if source.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+                raise BackupBusy(f"Database too busy for a stepped copy ({state['restarts']} restarts); "
+                                  f"not copying in one step while writers would wait for it")
+            logger.warning("Stepped backup restarted %s times, copying in one step", state['restarts'])
+            source.backup(target, pages=-1)
+            return 'single'
+    finally:
+        target.close()
+        source.close()
+
+def create_backup(backup_dir, db_path=None, level=6):
+    """Take, verify and compress a backup; return its metadata."""
+    db_path = db_path or db.DB_PATH
+    if not os.path.isfile(db_path):
+        raise BackupError(f"No database at {db_path}")
+    os.makedirs(backup_dir, exist_ok=True)
+    started = time.monotonic()
+    created_at = datetime.now(timezone.utc)
+    name = BACKUP_PREFIX + created_at.strftime(TIMESTAMP_FORMAT) + BACKUP_SUFFIX
+    path = os.path.join(backup_dir, name)
+
+    scratch = tempfile.mkdtemp(prefix='.backup-', dir=backup_dir)
+    try:
+        copy_path = os.path.join(scratch, 'copy.db')
+        mode = _copy_database(db_path, copy_path)
+        integrity, page_count = integrity_check(copy_path)
+        if integrity != 'ok':
+            raise BackupError(f"Backup copy failed integrity_check: {integrity}")
+
+        partial = path + '.partial'
+        with open(copy_path, 'rb') as src, open(partial, 'wb') as raw:
+            with gzip.GzipFile(filename='workout.db', mode='wb', fileobj=raw, compresslevel=level, mtime=0) as out:
+                shutil.copyfileobj(src, out, CHUNK_SIZE)
+            raw.flush()
+            os.fsync(raw.fileno())
+        metadata = {
+            'name': name,
+            'created_at': created_at.replace(microsecond=0).isoformat().replace('+00:00', 'Z'),
+            'size': os.path.getsize(partial),
+            'sha256': _file_sha256(partial),
+            'db_bytes': os.path.getsize(copy_path),
+            'page_count': page_count,
+            'integrity': integrity,
+            'copy_mode': mode,
+            'seconds': round(time.monotonic() - started, 2),
+        }
+        os.replace(partial, path)
+        write_json(_sidecar(path), metadata)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    logger.info("Backup %s written (%s bytes in %ss)", name, metadata['size'], metadata['seconds'])
+    return metadata
+
+def list_backups(backup_dir):
+    """Metadata of complete backups, newest first."""
+    backups = []
+    for path in sorted(glob.glob(os.path.join(backup_dir, BACKUP_PREFIX + '*' + BACKUP_SUFFIX)), reverse=True):
+        try:
+            with open(_sidecar(path)) as f:
+                backups.append(json.load(f))
+        except (OSError, ValueError):
+            # No sidecar: interrupted between the rename and the metadata write
+            continue
+    return backups
+
+def latest_backup(backup_dir):
+    backups = list_backups(backup_dir)
+    return backups[0] if backups else None
+
+def backup_path(backup_dir, name):
+    """Path of a stored backup, or None for names that are not backups."""
+    if os.path.basename(name) != name or not (name.startswith(BACKUP_PREFIX) and name.endswith(BACKUP_SUFFIX)):
+        return None
+    path = os.path.join(backup_dir, name)
+    return path if os.path.isfile(path) else None
+
+def _decompress(path, target_path):
+    with gzip.open(path, 'rb') as src, open(target_path, 'wb') as out:
+        shutil.copyfileobj(src, out, CHUNK_SIZE)
+
+def verify_backup(backup_dir, name):
+    """Re-check a stored backup's checksum and run integrity_check on its contents."""
+    path = backup_path(backup_dir, name)
+    if path is None:
+        raise BackupError(f"No backup named {name}")
+    with open(_sidecar(path)) as f:
+        metadata = json.load(f)
+    result = {'name': name, 'sha256_ok': _file_sha256(path) == metadata['sha256']}
+    scratch = tempfile.mkdtemp(prefix='.verify-', dir=backup_dir)
+    try:
+        copy_path = os.path.join(scratch, 'verify.db')
+        _decompress(path, copy_path)
+        result['integrity'], result['page_count'] = integrity_check(copy_path)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    result['ok'] = result['sha256_ok'] and result['integrity'] == 'ok'
+    return result
+
+def restore_backup(backup_dir, name, target_path):
+    """Decompress and check a backup into target_path (which must not be in use)."""
+    path = backup_path(backup_dir, name)
+    if path is None:
+        raise BackupError(f"No backup named {name}")
+    partial = target_path + '.partial'
+    _decompress(path, partial)
+    use_rollback_journal(partial)
+    integrity, _ = integrity_check(partial)
+    if integrity != 'ok':
+        os.remove(partial)
+        raise BackupError(f"Backup {name} failed integrity_check: {integrity}")
+    # A stale WAL would be replayed onto the restored file
+    discard_wal(target_path)
+    os.replace(partial, target_path)
+
+def retained(backups, keep_last, keep_daily, keep_weekly):
+    """Names to keep from backups (newest first) under the retention policy."""
+    keep = set()
+    days, weeks = set(), set()
+    for index, backup in enumerate(backups):
+        created = datetime.strptime(backup['name'][len(BACKUP_PREFIX):-len(BACKUP_SUFFIX)], TIMESTAMP_FORMAT)
+        day, week = created.date(), created.isocalendar()[:2]
+        if index < max(1, keep_last):
+            keep.add(backup['name'])
+        if day not in days and len(days) < keep_daily:
+            days.add(day)
+            keep.add(backup['name'])
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.add(week)
+            keep.add(backup['name'])
+    return keep
+
+def prune_backups(backup_dir, keep_last, keep_daily=0, keep_weekly=0):
+    """Delete backups outside the retention policy; return their names."""
+    backups = list_backups(backup_dir)
+    keep = retained(backups, keep_last, keep_daily, keep_weekly)
+    removed = []
+    for backup in backups:
+        if backup['name'] not in keep:
+            path = os.path.join(backup_dir, backup['name'])
+            for stale in (path, _sidecar(path)):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            removed.append(backup['name'])
+    return removed
+
+@contextmanager
+def _exclusive(backup_dir):
+    """Yield True when this process holds the backup lock, False when another does."""
+    os.makedirs(backup_dir, exist_ok=True)
+    with open(os.path.join(backup_dir, LOCK_FILE), 'w') as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def _backup_due(backup_dir, interval):
+    latest = latest_backup(backup_dir)
+    if not latest:
+        return True
+    created = datetime.strptime(latest['created_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - created).total_seconds() >= interval
+
+def _backup_locked(config_obj):
+    metadata = create_backup(config_obj.BACKUP_DIR, level=config_obj.BACKUP_COMPRESSION_LEVEL)
+    prune_backups(config_obj.BACKUP_DIR, config_obj.BACKUP_KEEP_LAST,
+                  config_obj.BACKUP_KEEP_DAILY, config_obj.BACKUP_KEEP_WEEKLY)
+    return metadata
+
+def backup_now(config_obj):
+    """Back up and apply retention; None when another process is backing up."""
+    with _exclusive(config_obj.BACKUP_DIR) as acquired:
+        if not acquired:
+            return None
+        return _backup_locked(config_obj)
+
+def run_scheduled_backup(config_obj):
+    """
+    Back up when the newest backup is at least BACKUP_INTERVAL seconds old.
+    A backup given up under heavy writes is retried at the next check.
+    """
+    if not _backup_due(config_obj.BACKUP_DIR, config_obj.BACKUP_INTERVAL):
+        return None
+    with _exclusive(config_obj.BACKUP_DIR) as acquired:
+        # Checked again under the lock: a worker that saw the same stale
+        # backup may have finished a new one in the meantime
+        if not acquired or not _backup_due(config_obj.BACKUP_DIR, config_obj.BACKUP_INTERVAL):
+            return None
+        try:
+            return _backup_locked(config_obj)
+        except BackupBusy as e:
+            logger.warning("Scheduled backup skipped: %s", e)
+            return None
+
+def main():
+    from config import config
+
+    parser = argparse.ArgumentParser(description='Online SQLite backups')
+    parser.add_argument('--list', action='store_true', help='List stored backups')
+    parser.add_argument('--verify', nargs='?', const='', metavar='NAME', help='Verify a backup (default: latest)')
+    parser.add_argument('--restore', metavar='NAME', help='Restore a backup (use with --to)')
+    parser.add_argument('--to', help='Database path to restore into (the app must be stopped)')
+    args = parser.parse_args()
+
+    config_obj = config[os.environ.get('FLASK_ENV', 'development')]()
+    backup_dir = config_obj.BACKUP_DIR
+
+    if args.list:
+        for backup in list_backups(backup_dir):
+            print(f"📦 {backup['name']}  {backup['size'] / 1024 / 1024:8.1f} MB  "
+                  f"sha256 {backup['sha256'][:12]}  {backup['integrity']}")
+        return
+    if args.verify is not None:
+        name = args.verify or (latest_backup(backup_dir) or {}).get('name')
+        if not name:
+            raise SystemExit(f"❌ No backups in {backup_dir}")
+        result = verify_backup(backup_dir, name)
+        if not result['ok']:
+            raise SystemExit(f"❌ {name}: sha256 {'ok' if result['sha256_ok'] else 'MISMATCH'}, "
+                             f"integrity {result['integrity']}")
+        print(f"✅ {name}: checksum and integrity_check ok ({result['page_count']} pages)")
+        return
+    if args.restore:
+        if not args.to:
+            raise SystemExit("❌ --restore needs --to PATH")
+        restore_backup(backup_dir, args.restore, args.to)
+        print(f"✅ Restored {args.restore} to {args.to}")
+        return
+
+    metadata = backup_now(config_obj)
+    if metadata is None:
+        raise SystemExit("❌ Another backup is running")
+    print(f"✅ Backup {metadata['name']} written to {backup_dir} "
+          f"({metadata['size'] / 1024 / 1024:.1f} MB, {metadata['seconds']}s, integrity {metadata['integrity']})")
+
+if __name__ == '__main__':
+    try:
+        main()
+    except BackupError as e:
+        raise SystemExit(f"❌ {e}")
@@ -0,0 +1,81 @@
+"""
+Request body caps that also hold for bodies sent without a Content-Length.
+
+A declared Content-Length above the cap is rejected before reading, and
+Werkzeug never reads past a declared length. A chunked body has no length,
+so Werkzeug's own cap (max_content_length) is all that bounds it. In 2.3
+that cap stops read() silently at the limit, and get_json() then sees a
+truncated document. LimitedRequest reads chunked bodies through
+CappedStream instead, which raises 413 as soon as a byte beyond the cap
+arrives. The cap is the route's body_limit (set by
+validation.validate_json_size) or the app-wide MAX_CONTENT_LENGTH.
+"""
+
+import io
+import shutil
+import tempfile
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import cached_property
+
+# Bytes copied per read when spooling a body
+SPOOL_CHUNK_SIZE = 64 * 1024
+# Spooled bodies larger than this move from memory to a temporary file
+SPOOL_MEMORY_SIZE = 1024 * 1024
+
+class CappedStream(io.RawIOBase):
+    """Read a stream to its end, raising 413 once more than limit bytes arrive."""
+
+    def __init__(self, stream, limit):
+        self._stream = stream
+        self._remaining = limit
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        # One byte past the cap is enough to tell an oversized body from a full one
+        data = self._stream.read(min(len(b), self._remaining + 1))
+        if len(data) > self._remaining:
+            raise RequestEntityTooLarge()
+        self._remaining -= len(data)
+        b[:len(data)] = data
+        return len(data)
+
+class LimitedRequest(Request):
+    """Flask request whose body cap can be set per route."""
+
+    # Bytes; None falls back to MAX_CONTENT_LENGTH. Set before the body is read.
+    body_limit = None
+
+    @property
+    def max_content_length(self):
+        if self.body_limit is not None:
+            return self.body_limit
+        return super().max_content_length
+
+    @cached_property
+    def stream(self):
+        limit = self.max_content_length
+        # Servers set wsgi.input_terminated when they end chunked bodies themselves
+        chunked = self.content_length is None and 'wsgi.input_terminated' in self.environ
+        if limit is None or not chunked or self.shallow:
+            return super().stream
+        return CappedStream(self.environ['wsgi.input'], limit)
+
+def spool_body(stream):
+    """
+    Copy a request body into a temporary file and return it rewound.
+
+    Reading through the capped request.stream raises 413 before anything
+    past the cap is stored, so a route can reject an oversized upload before
+    doing any work, with at most SPOOL_MEMORY_SIZE bytes of it in memory.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_SIZE)
+    try:
+        shutil.copyfileobj(stream, spool, SPOOL_CHUNK_SIZE)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
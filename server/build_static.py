@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Build public/ into a deployable static directory.
+
+- .js and .css files (except sw.js, whose URL must stay stable) are renamed
+  to name.<content hash>.ext, and references to them in index.html and sw.js
+  are rewritten;
+- the precacheAndRoute() list in sw.js gets fingerprinted URLs (revision
+  null) and a content revision for everything else, so a deploy updates
+  exactly the changed entries in installed service workers;
+- every text file gets .gz and, with the brotli module installed, .br
+  siblings that static_files.py serves without compressing per request;
+- asset-manifest.json maps original to fingerprinted names.
+
+Point STATIC_DIR at the output to serve it.
+
+Usage:
+    python server/build_static.py [--source public] [--output build/public]
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from static_files import ASSET_MANIFEST
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Build configuration, not served
+EXCLUDED = {'workbox-config.js'}
+# Served from a fixed URL: browsers check it for updates on every navigation
+UNFINGERPRINTED = {'sw.js'}
+FINGERPRINTED_EXTENSIONS = ('.js', '.css')
+# Files whose references to fingerprinted assets are rewritten
+REWRITTEN_EXTENSIONS = ('.html', '.js')
+COMPRESSED_EXTENSIONS = ('.html', '.js', '.css', '.json', '.svg', '.txt', '.webmanifest')
+HASH_LENGTH = 10
+
+_PRECACHE = re.compile(r'precacheAndRoute\(\[(.*?)\]\)', re.DOTALL)
+_PRECACHE_URL = re.compile(r"url:\s*'([^']+)'")
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def fingerprinted_name(name, data):
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{content_hash(data)}{ext}'
+
+def rewrite_references(text, renamed):
+    """Point quoted absolute URLs of renamed assets at their new names."""
+    for original, hashed in renamed.items():
+        for quote in ('"', "'"):
+            text = text.replace(f'{quote}/{original}{quote}', f'{quote}/{hashed}{quote}')
+    return text
+
+def rewrite_precache(sw_source, renamed, outputs):
+    """Regenerate the precacheAndRoute() list with fingerprints and revisions."""
+    match = _PRECACHE.search(sw_source)
+    if not match:
+        return sw_source
+    entries = []
+    for url in _PRECACHE_URL.findall(match.group(1)):
+        name = 'index.html' if url == '/' else url.lstrip('/')
+        if name in renamed:
+            entries.append(f"  {{ url: '/{renamed[name]}', revision: null }}")
+        elif name in outputs:
+            entries.append(f"  {{ url: '{url}', revision: '{content_hash(outputs[name])}' }}")
+        else:
+            raise SystemExit(f'❌ sw.js precaches {url}, which is not in the build')
+    return sw_source[:match.start()] + 'precacheAndRoute([\n' + ',\n'.join(entries) + '\n])' + sw_source[match.end():]
+
+def build(source, output):
+    sources = {}
+    for dirpath, _, filenames in os.walk(source):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, source).replace(os.sep, '/')
+            if name not in EXCLUDED:
+                with open(path, 'rb') as f:
+                    sources[name] = f.read()
+
+    renamed = {
+        name: fingerprinted_name(name, data)
+        for name, data in sources.items()
+        if name.endswith(FINGERPRINTED_EXTENSIONS) and name not in UNFINGERPRINTED
+    }
+
+    outputs = {}
+    for name, data in sources.items():
+        if name.endswith(REWRITTEN_EXTENSIONS) and name not in renamed and name != 'sw.js':
+            data = rewrite_references(data.decode('utf-8'), renamed).encode('utf-8')
+        outputs[renamed.get(name, name)] = data
+    if 'sw.js' in outputs:
+        # Revisions are taken from the rewritten files, so this runs last
+        outputs['sw.js'] = rewrite_precache(outputs['sw.js'].decode('utf-8'), renamed, outputs).encode('utf-8')
+    outputs[ASSET_MANIFEST] = (json.dumps(renamed, indent=2, sort_keys=True) + '\n').encode('utf-8')
+
+    shutil.rmtree(output, ignore_errors=True)
+    totals = {'files': 0, 'bytes': 0, 'gzip': 0, 'br': 0}
+    for name, data in sorted(outputs.items()):
+        path = os.path.join(output, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        totals['files'] += 1
+        totals['bytes'] += len(data)
+        if not name.endswith(COMPRESSED_EXTENSIONS) or name == ASSET_MANIFEST:
+            continue
+        variants = {'gzip': ('.gz', gzip.compress(data, compresslevel=9, mtime=0))}
+        if brotli is not None:
+            variants['br'] = ('.br', brotli.compress(data, quality=11))
+        for encoding, (suffix, compressed) in variants.items():
+            # Tiny files can grow when compressed
+            if len(compressed) < len(data):
+                with open(path + suffix, 'wb') as f:
+                    f.write(compressed)
+                totals[encoding] += len(compressed)
+    return renamed, totals
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress the static assets')
+    parser.add_argument('--source', default=os.path.join(ROOT, 'public'))
+    parser.add_argument('--output', default=os.path.join(ROOT, 'build', 'public'))
+    args = parser.parse_args()
+
+    renamed, totals = build(args.source, args.output)
+    for original, hashed in sorted(renamed.items()):
+        print(f"🔖 {original} -> {hashed}")
+    print(f"📦 {totals['files']} files, {totals['bytes'] / 1024:.1f} KB "
+          f"(gzip {totals['gzip'] / 1024:.1f} KB, brotli {totals['br'] / 1024:.1f} KB)")
+    if brotli is None:
+        print("⚠️  brotli is not installed; only .gz variants were written (pip install brotli)")
+    print(f"✅ Static build written to {args.output}; set STATIC_DIR to serve it")
+
+if __name__ == '__main__':
+    main()
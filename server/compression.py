@@ -0,0 +1,150 @@
+"""
+Negotiated response compression (gzip, br, zstd) as WSGI middleware.
+
+The encoding is picked from Accept-Encoding in the configured order of
+preference. br needs the brotli module and zstd the zstandard module; an
+encoding whose module is missing is never offered. Only compressible
+content types are compressed. Responses smaller than min_size are skipped
+(responses without a Content-Length, such as streamed exports, are always
+compressed). So are responses that already carry a Content-Encoding (the
+precompressed static files) and responses marked Cache-Control: no-transform.
+
+Bodies are compressed chunk by chunk as the application yields them, so
+generator responses keep streaming with constant memory.
+"""
+
+import importlib.util
+import zlib
+from werkzeug.http import parse_accept_header, parse_options_header
+
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'application/manifest+json',
+    'application/xml',
+    'image/svg+xml',
+}
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+
+class _GzipCompressor:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+class _BrotliCompressor:
+    def __init__(self, level):
+        import brotli
+        self._compressor = brotli.Compressor(quality=level, mode=brotli.MODE_TEXT)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+class _ZstdCompressor:
+    def __init__(self, level):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+COMPRESSORS = {'gzip': _GzipCompressor, 'br': _BrotliCompressor, 'zstd': _ZstdCompressor}
+
+# Module each encoding needs (imported on first use; zstandard alone costs ~25 ms)
+MODULES = {'gzip': 'zlib', 'br': 'brotli', 'zstd': 'zstandard'}
+
+def available_encodings(preference):
+    """Encodings from preference whose compression module is installed."""
+    return [
+        encoding for encoding in preference
+        if encoding in MODULES and importlib.util.find_spec(MODULES[encoding]) is not None
+    ]
+
+def is_compressible(content_type):
+    mimetype = parse_options_header(content_type)[0].lower()
+    return mimetype.startswith('text/') or mimetype in COMPRESSIBLE_TYPES
+
+def negotiate(accept_encoding, encodings):
+    """First of encodings (server preference) the client accepts, or None."""
+    accepted = parse_accept_header(accept_encoding)
+    for encoding in encodings:
+        if accepted[encoding]:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """Compress response bodies with the best encoding the client accepts."""
+
+    def __init__(self, wsgi_app, encodings=('zstd', 'br', 'gzip'), min_size=1024, levels=None):
+        self.wsgi_app = wsgi_app
+        self.encodings = available_encodings(encodings)
+        self.min_size = min_size
+        self.levels = {**DEFAULT_LEVELS, **(levels or {})}
+
+    def _eligible(self, environ, status, headers):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or status[:3] in ('204', '206', '304'):
+            return False
+        content_type = content_length = None
+        for name, value in headers:
+            name = name.lower()
+            if name == 'content-encoding':
+                return False
+            if name == 'cache-control' and 'no-transform' in value.lower():
+                return False
+            if name == 'content-type':
+                content_type = value
+            elif name == 'content-length':
+                content_length = value
+        if not content_type or not is_compressible(content_type):
+            return False
+        return content_length is None or int(content_length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if not self.encodings:
+            return self.wsgi_app(environ, start_response)
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING', ''), self.encodings)
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            if self._eligible(environ, status, headers):
+                vary = ', '.join(value for name, value in headers if name.lower() == 'vary')
+                if 'accept-encoding' not in vary.lower():
+                    headers = [(name, value) for name, value in headers if name.lower() != 'vary']
+                    headers.append(('Vary', f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'))
+                if encoding:
+                    state['compressor'] = COMPRESSORS[encoding](self.levels[encoding])
+                    headers = [
+                        (name, 'W/' + value if name.lower() == 'etag' and not value.startswith('W/') else value)
+                        for name, value in headers
+                        if name.lower() not in ('content-length', 'accept-ranges')
+                    ]
+                    headers.append(('Content-Encoding', encoding))
+            return start_response(status, headers, exc_info)
+
+        app_iter = self.wsgi_app(environ, compressing_start_response)
+        if 'compressor' not in state:
+            return app_iter
+        return self._compressed_body(app_iter, state['compressor'])
+
+    def _compressed_body(self, app_iter, compressor):
+        try:
+            for chunk in app_iter:
+                data = compressor.compress(chunk)
+                if data:
+                    yield data
+            yield compressor.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
@@ -46,6 +46,83 @@ class Config:
     RATE_LIMIT_AUTH_REGISTER = os.environ.get('RATE_LIMIT_AUTH_REGISTER', '3 per minute')
     RATE_LIMIT_STORAGE_URI = os.environ.get('RATE_LIMIT_STORAGE_URI', 'memory://')
     
+    # Bulk import
+    IMPORT_MAX_SIZE_KB = int(os.environ.get('IMPORT_MAX_SIZE_KB', 51200))
+    
+    # Request body cap for routes without their own validate_json_size limit
+    # (enforced while reading, so chunked bodies are capped too)
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_REQUEST_BODY_KB', 100)) * 1024
+    
+    # Admin dashboard rollups (seconds between runs, 0 to rely on cron)
+    STATS_ROLLUP_INTERVAL = int(os.environ.get('STATS_ROLLUP_INTERVAL', 300))
+    
+    # Background account deletion (seconds between queue checks)
+    PURGE_INTERVAL = int(os.environ.get('PURGE_INTERVAL', 10))
+    
+    # Online backups (seconds between scheduled backups, 0 to rely on cron)
+    # and retention: newest N, plus newest per day / ISO week for N days / weeks
+    BACKUP_DIR = os.environ.get('BACKUP_DIR', 'backups')
+    BACKUP_INTERVAL = int(os.environ.get('BACKUP_INTERVAL', 0))
+    BACKUP_KEEP_LAST = int(os.environ.get('BACKUP_KEEP_LAST', 7))
+    BACKUP_KEEP_DAILY = int(os.environ.get('BACKUP_KEEP_DAILY', 30))
+    BACKUP_KEEP_WEEKLY = int(os.environ.get('BACKUP_KEEP_WEEKLY', 12))
+    BACKUP_COMPRESSION_LEVEL = int(os.environ.get('BACKUP_COMPRESSION_LEVEL', 6))
+    
+    # Continuous WAL replication into REPLICA_DIR for point-in-time restore
+    # (empty disables; puts the database in WAL mode). Shipped every
+    # REPLICA_SYNC_INTERVAL seconds; a new snapshot generation starts every
+    # REPLICA_SNAPSHOT_INTERVAL seconds and is kept REPLICA_RETENTION seconds
+    # after the next one starts
+    REPLICA_DIR = os.environ.get('REPLICA_DIR', '')
+    REPLICA_SYNC_INTERVAL = float(os.environ.get('REPLICA_SYNC_INTERVAL', 1))
+    REPLICA_SNAPSHOT_INTERVAL = int(os.environ.get('REPLICA_SNAPSHOT_INTERVAL', 86400))
+    REPLICA_RETENTION = int(os.environ.get('REPLICA_RETENTION', 259200))
+    
+    # Prometheus /metrics (Bearer token; endpoint disabled when unset)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    
+    # Per-request SQL tracing (opt-in) and slow-query log threshold
+    SQL_TRACE = os.environ.get('SQL_TRACE', 'false').lower() == 'true'
+    SQL_SLOW_QUERY_MS = int(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    LOG_DIR = os.environ.get('LOG_DIR', 'logs')
+    
+    # Sampling profiler (fraction of requests; signed admin header always works)
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(LOG_DIR, 'profiles')
+    PROFILE_KEEP = int(os.environ.get('PROFILE_KEEP', 50))
+    
+    # Readiness probe (/health/ready): cache, DB probe bound and thresholds
+    HEALTH_CACHE_SECONDS = float(os.environ.get('HEALTH_CACHE_SECONDS', 5))
+    HEALTH_DB_TIMEOUT_MS = int(os.environ.get('HEALTH_DB_TIMEOUT_MS', 1000))
+    HEALTH_MIN_FREE_MB = int(os.environ.get('HEALTH_MIN_FREE_MB', 100))
+    HEALTH_MAX_WAL_MB = int(os.environ.get('HEALTH_MAX_WAL_MB', 256))
+    HEALTH_MAX_EMAIL_BACKLOG = int(os.environ.get('HEALTH_MAX_EMAIL_BACKLOG', 50))
+    # Request threads per worker process (capacity for the readiness pool check)
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 1))
+    
+    # Admission control: shed /api/ requests with 503 once they queued longer
+    # than the budget (from nginx's X-Request-Start; 0 disables that check) or
+    # their priority class's share of WORKER_THREADS is in use
+    ADMISSION_CONTROL = os.environ.get('ADMISSION_CONTROL', 'true').lower() == 'true'
+    ADMISSION_QUEUE_BUDGET_MS = int(os.environ.get('ADMISSION_QUEUE_BUDGET_MS', 1000))
+    ADMISSION_RETRY_AFTER = int(os.environ.get('ADMISSION_RETRY_AFTER', 2))
+    
+    # Request tracing spans ('' disables, 'jsonl' writes a file, 'otlp' posts to a collector)
+    TRACING_EXPORTER = os.environ.get('TRACING_EXPORTER', '').lower()
+    TRACING_FILE = os.environ.get('TRACING_FILE') or os.path.join(LOG_DIR, 'traces.jsonl')
+    TRACING_OTLP_ENDPOINT = os.environ.get('TRACING_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+    
+    # Response compression: encodings in order of preference (br needs brotli,
+    # zstd needs zstandard), smallest body worth compressing, and levels
+    COMPRESSION_ENCODINGS = [e.strip() for e in os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',') if e.strip()]
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BR_LEVEL = int(os.environ.get('COMPRESSION_BR_LEVEL', 4))
+    COMPRESSION_ZSTD_LEVEL = int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+    
+    # Static files (build_static.py output for fingerprinted, precompressed assets)
+    STATIC_DIR = os.environ.get('STATIC_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'public')
+    
     # Password Policy Configuration
     PASSWORD_MIN_LENGTH = int(os.environ.get('PASSWORD_MIN_LENGTH', 8))
     PASSWORD_MAX_LENGTH = int(os.environ.get('PASSWORD_MAX_LENGTH', 128))
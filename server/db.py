@@ -1,13 +1,22 @@
 import sqlite3
 import os
+import re
 from contextlib import contextmanager
 
 # Use environment variable for database path in production
 DB_PATH = os.environ.get('DATABASE_PATH') or os.path.join(os.path.dirname(__file__), 'workout.db')
 
+# Stored in PRAGMA user_version once the schema below is in place. Bump it
+# whenever a table, index or migration is added so existing databases upgrade.
+SCHEMA_VERSION = 3
+
 def init_db():
-    """Initialize the database with the required schema."""
+    """Initialize the database with the required schema (skipped when current)."""
     with sqlite3.connect(DB_PATH) as conn:
+        # One header read instead of the full script on every worker start
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+
         conn.executescript("""
             PRAGMA foreign_keys = ON;
 
@@ -18,7 +27,8 @@ def init_db():
                 password_hash TEXT NOT NULL,
                 role TEXT NOT NULL DEFAULT 'user',
                 must_change_password BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                disabled_at TIMESTAMP
             );
 
             CREATE TABLE IF NOT EXISTS templates (
@@ -35,15 +45,17 @@ def init_db():
                 order_idx INTEGER NOT NULL
             );
 
+            -- AUTOINCREMENT: the stats rollup reads rows past the last id it
+            -- saw, so the id of a deleted newest row must not be handed out again
             CREATE TABLE IF NOT EXISTS sessions (
-                id INTEGER PRIMARY KEY,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
                 template_id INTEGER REFERENCES templates(id) ON DELETE CASCADE,
                 session_date TIMESTAMP NOT NULL
             );
 
             CREATE TABLE IF NOT EXISTS session_exercises (
-                id INTEGER PRIMARY KEY,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
                 session_id INTEGER REFERENCES sessions(id) ON DELETE CASCADE,
                 template_exercise_id INTEGER REFERENCES template_exercises(id) ON DELETE CASCADE,
                 weight_kg REAL NOT NULL,
@@ -59,14 +71,159 @@ def init_db():
                 used BOOLEAN DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
+
+            -- Admin user search (prefix match) and role filtering
+            CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(lower(username));
+            CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(lower(email));
+            CREATE INDEX IF NOT EXISTS idx_users_role ON users(role, id);
+
+            -- Admin dashboard rollups (maintained by stats.py)
+            CREATE TABLE IF NOT EXISTS daily_stats (
+                day TEXT PRIMARY KEY,
+                sessions_logged INTEGER NOT NULL DEFAULT 0,
+                exercises_logged INTEGER NOT NULL DEFAULT 0,
+                active_users_sketch BLOB
+            );
+
+            CREATE TABLE IF NOT EXISTS table_stats (
+                day TEXT NOT NULL,
+                table_name TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                bytes INTEGER,
+                PRIMARY KEY (day, table_name)
+            );
+
+            CREATE TABLE IF NOT EXISTS rollup_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+
+            -- Background account deletion (processed by purge.py)
+            CREATE TABLE IF NOT EXISTS purge_jobs (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                username TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                rows_deleted INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_at TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            -- Foreign key lookups used by per-user queries and cascades
+            CREATE INDEX IF NOT EXISTS idx_sessions_user_date ON sessions(user_id, session_date);
+            CREATE INDEX IF NOT EXISTS idx_sessions_template ON sessions(template_id);
+            CREATE INDEX IF NOT EXISTS idx_session_exercises_session ON session_exercises(session_id);
+            CREATE INDEX IF NOT EXISTS idx_session_exercises_template_exercise ON session_exercises(template_exercise_id);
+            CREATE INDEX IF NOT EXISTS idx_template_exercises_template ON template_exercises(template_id, order_idx);
+            CREATE INDEX IF NOT EXISTS idx_password_reset_tokens_user ON password_reset_tokens(user_id);
+            CREATE INDEX IF NOT EXISTS idx_purge_jobs_user ON purge_jobs(user_id, status);
         """)
 
+        # Columns added after the first release
+        _add_column(conn, 'users', 'disabled_at', 'TIMESTAMP')
+        _add_column(conn, 'purge_jobs', 'attempts', 'INTEGER NOT NULL DEFAULT 0')
+        _add_column(conn, 'purge_jobs', 'retry_at', 'TIMESTAMP')
+        # Purges that failed before they were retried get their retries now
+        conn.execute("UPDATE purge_jobs SET status = 'pending' WHERE status = 'failed' AND attempts = 0")
+
+        # Tables created before ids were AUTOINCREMENT
+        for table in ('sessions', 'session_exercises'):
+            _use_autoincrement(conn, table)
+
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+def _add_column(conn, table, column, definition):
+    """Add a column to an existing table if it is missing."""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+def _use_autoincrement(conn, table):
+    """
+    Rebuild a table whose INTEGER PRIMARY KEY lacks AUTOINCREMENT. The id
+    sequence starts past both the newest row and the stats rollup watermark,
+    so ids the rollup has already counted are never reused.
+    """
+    sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone()[0]
+    if 'AUTOINCREMENT' in sql.upper():
+        return
+    indexes = [row[0] for row in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    )]
+    new_sql = re.sub(r'^CREATE TABLE\s+(IF NOT EXISTS\s+)?"?\w+"?', f'CREATE TABLE {table}_new', sql)
+    new_sql = re.sub(r'\bid INTEGER PRIMARY KEY\b', 'id INTEGER PRIMARY KEY AUTOINCREMENT', new_sql, count=1)
+    row = conn.execute("SELECT value FROM rollup_state WHERE name = ?", (table,)).fetchone()
+    watermark = row[0] if row else 0
+    # Foreign keys off, or dropping the old table would cascade to child rows
+    conn.commit()
+    conn.execute("PRAGMA foreign_keys = OFF")
+    conn.executescript(f"""
+        BEGIN IMMEDIATE;
+        {new_sql};
+        INSERT INTO {table}_new SELECT * FROM {table};
+        DROP TABLE {table};
+        ALTER TABLE {table}_new RENAME TO {table};
+        {';'.join(indexes)};
+        DELETE FROM sqlite_sequence WHERE name = '{table}';
+        INSERT INTO sqlite_sequence (name, seq)
+        VALUES ('{table}', max((SELECT coalesce(max(id), 0) FROM {table}), {int(watermark)}));
+        COMMIT;
+    """)
+    conn.execute("PRAGMA foreign_keys = ON")
+
+def next_row_id(conn, table):
+    """
+    First free id of a table for bulk inserts with explicit ids. AUTOINCREMENT
+    tables continue after their sqlite_sequence entry (ids of deleted rows stay
+    retired); an explicit id past it advances the sequence on insert.
+    """
+    next_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        if row:
+            next_id = max(next_id, row[0] + 1)
+    return next_id
+
+# Callables run on every connection handed out by get_db (instrumentation)
+_connection_hooks = []
+
+# sqlite3.Connection subclass used by get_db (swapped in by the SQL tracer)
+_connection_factory = sqlite3.Connection
+
+def set_connection_factory(factory):
+    """Use a sqlite3.Connection subclass for connections from get_db."""
+    global _connection_factory
+    _connection_factory = factory
+
+def register_connection_hook(hook):
+    """Register hook(conn) to be called for each connection from get_db."""
+    if hook not in _connection_hooks:
+        _connection_hooks.append(hook)
+
+def fetch_dicts(conn, sql, params=()):
+    """
+    Run a query and return its rows as plain dicts, built straight from the
+    row tuples (no sqlite3.Row per row and no dict() copy of it).
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(sql, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
 @contextmanager
 def get_db():
     """Get a database connection with foreign keys enabled."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, factory=_connection_factory)
     conn.execute("PRAGMA foreign_keys = ON")
     conn.row_factory = sqlite3.Row
+    for hook in _connection_hooks:
+        hook(conn)
     try:
         yield conn
     finally:
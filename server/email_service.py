@@ -1,8 +1,6 @@
-import smtplib
 import os
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 from security_logger import log_security_event
+from metrics import track_email
 
 class EmailService:
     """Basic SMTP email service for password resets."""
@@ -18,6 +16,10 @@ class EmailService:
     
     def send_password_reset_email(self, to_email, username, reset_token):
         """Send password reset email."""
+        # smtplib and the MIME classes load on first send; most workers never send mail
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
         try:
             reset_url = f"{self.app_url}/reset-password?token={reset_token}"
             
@@ -70,7 +72,7 @@ class EmailService:
             msg.attach(html_part)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            with track_email(), smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
                 if self.smtp_use_tls:
                     server.starttls()
                 if self.smtp_username and self.smtp_password:
@@ -86,6 +88,10 @@ class EmailService:
     
     def send_admin_created_user_email(self, to_email, username, temp_password):
         """Send email when admin creates a new user."""
+        # smtplib and the MIME classes load on first send; most workers never send mail
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
         try:
             login_url = f"{self.app_url}"
             
@@ -142,7 +148,7 @@ class EmailService:
             msg.attach(html_part)
             
             # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
+            with track_email(), smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
                 if self.smtp_use_tls:
                     server.starttls()
                 if self.smtp_username and self.smtp_password:
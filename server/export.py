@@ -0,0 +1,67 @@
+"""
+Streaming export of a user's training history.
+
+Rows are read from a SQLite cursor in batches and serialized chunk by chunk,
+so memory use stays constant no matter how long the history is.
+"""
+
+import csv
+import io
+import zlib
+from json_provider import dumps_bytes
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+EXPORT_COLUMNS = [
+    'session_id', 'session_date', 'template_id', 'template_name',
+    'session_exercise_id', 'exercise_name', 'weight_kg', 'reps', 'sets'
+]
+
+# Rows serialized per yielded chunk
+EXPORT_BATCH_SIZE = 500
+
+def _ndjson_chunks(batches):
+    for batch in batches:
+        yield b''.join(dumps_bytes(dict(row), sort_keys=False) + b'\n' for row in batch)
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only when the history is empty
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def _gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31 = gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def generate_export(batches, fmt='ndjson', compress=False):
+    """
+    Serialize batches of rows (as yielded by Session.iter_history) into
+    NDJSON or CSV byte chunks, optionally gzip-compressed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    chunks = _ndjson_chunks(batches) if fmt == 'ndjson' else _csv_chunks(batches)
+    if compress:
+        chunks = _gzip_chunks(chunks)
+    return chunks
+
+def export_filename(username, fmt, compress=False):
+    """Build the download filename for an export."""
+    filename = f"workout-history-{username}.{fmt}"
+    return filename + '.gz' if compress else filename
@@ -0,0 +1,81 @@
+"""
+Gunicorn configuration for the Workout Tracker.
+
+    gunicorn --config server/gunicorn.conf.py wsgi:application
+
+The app is preloaded once in the master (migrations run once, workers start
+fast and share the imported code copy-on-write). Anything that does not
+survive fork is started again in post_fork: the trace exporter thread and the
+periodic background jobs.
+
+Environment overrides:
+    GUNICORN_BIND          default 127.0.0.1:8080
+    GUNICORN_WORKER_CLASS  sync, gthread (default) or gevent
+    GUNICORN_WORKERS       default depends on the worker class and CPU count
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    GUNICORN_WORKER_CONNECTIONS  concurrent requests per gevent worker (default 200)
+"""
+
+import os
+import shutil
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+if worker_class == 'gevent':
+    # Must happen before anything imports socket, ssl or threading users
+    from gevent import monkey
+    monkey.patch_all()
+
+chdir = os.path.dirname(os.path.abspath(__file__))
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8080')
+
+try:
+    cpu_count = len(os.sched_getaffinity(0))
+except AttributeError:
+    cpu_count = os.cpu_count() or 1
+
+# Request handlers mostly wait on SQLite, which serializes writes, so more
+# than a few concurrent requests per CPU only adds lock contention.
+if worker_class == 'gthread':
+    default_workers = cpu_count + 1
+elif worker_class == 'gevent':
+    default_workers = cpu_count
+else:
+    default_workers = 2 * cpu_count + 1
+
+workers = int(os.environ.get('GUNICORN_WORKERS', default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 200))
+
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+preload_app = True
+
+# Concurrent requests one worker can hold, used by the readiness pool check
+os.environ['WORKER_THREADS'] = str(worker_connections if worker_class == 'gevent' else threads)
+# Background jobs start in each worker (post_fork), never in the master
+os.environ['JOBS_START_AFTER_FORK'] = 'true'
+
+# The preloaded app opens its metric files here before on_starting runs, so
+# the directory has to exist as soon as the config is read
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+def on_starting(server):
+    # Samples from workers of a previous run would be summed into this one
+    multiproc_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+def post_fork(server, worker):
+    import jobs
+    import tracing
+    tracing.reset_after_fork()
+    jobs.start_deferred()
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
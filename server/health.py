@@ -0,0 +1,137 @@
+"""
+Liveness and readiness probes.
+
+/health/live only proves the worker answers requests. /health/ready checks
+what the worker needs in order to serve traffic:
+
+- database: a read plus a write-lock probe, bounded by HEALTH_DB_TIMEOUT_MS;
+- wal: size of the SQLite write-ahead log;
+- request_pool: requests in flight in this worker against its thread capacity;
+- email: emails waiting to be handed to the SMTP server;
+- disk: free space next to the database and the logs.
+
+A failing database or disk check returns 503. WAL size, pool saturation and
+email backlog only mark the worker 'degraded'. Results are cached for
+HEALTH_CACHE_SECONDS, and concurrent probes share one check, so frequent
+probing adds no load.
+"""
+
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from flask import g
+import db
+from metrics import email_backlog
+
+_cache = {'at': None, 'result': None}
+_cache_lock = threading.Lock()
+
+_in_flight = 0
+_in_flight_lock = threading.Lock()
+
+def _request_started():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    g.counted_in_flight = True
+
+def _request_finished(exc=None):
+    global _in_flight
+    # Skipped when an earlier before_request handler (e.g. the rate limiter) answered
+    if g.pop('counted_in_flight', False):
+        with _in_flight_lock:
+            _in_flight -= 1
+
+def check_database(timeout_ms):
+    """Read from and briefly take the write lock on the database within timeout_ms."""
+    started = time.monotonic()
+    deadline = started + timeout_ms / 1000.0
+    try:
+        conn = sqlite3.connect(db.DB_PATH, timeout=timeout_ms / 1000.0)
+        try:
+            # Abort statements still running at the deadline
+            conn.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 1000)
+            journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+            conn.execute("SELECT 1 FROM users LIMIT 1").fetchall()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return {'ok': False, 'error': str(e), 'latency_ms': round((time.monotonic() - started) * 1000, 1)}
+    return {'ok': True, 'journal_mode': journal_mode, 'latency_ms': round((time.monotonic() - started) * 1000, 1)}
+
+def check_wal(max_wal_mb):
+    try:
+        size = os.path.getsize(db.DB_PATH + '-wal')
+    except OSError:
+        size = 0
+    return {'ok': size <= max_wal_mb * 1024 * 1024, 'bytes': size}
+
+def check_request_pool(capacity):
+    # The probe itself is one of the requests in flight
+    in_flight = max(0, _in_flight - 1)
+    saturation = round(in_flight / capacity, 2) if capacity else None
+    return {'ok': saturation is None or saturation < 0.9, 'in_flight': in_flight,
+            'capacity': capacity, 'saturation': saturation}
+
+def check_email(max_backlog):
+    backlog = email_backlog()
+    return {'ok': backlog <= max_backlog, 'backlog': backlog}
+
+def check_disk(paths, min_free_mb):
+    result = {'ok': True, 'paths': {}}
+    for path in paths:
+        try:
+            free = shutil.disk_usage(path).free
+        except OSError as e:
+            result['paths'][path] = {'error': str(e)}
+            result['ok'] = False
+            continue
+        result['paths'][path] = {'free_bytes': free}
+        if free < min_free_mb * 1024 * 1024:
+            result['ok'] = False
+    return result
+
+def run_checks(config_obj):
+    checks = {
+        'database': check_database(config_obj.HEALTH_DB_TIMEOUT_MS),
+        'wal': check_wal(config_obj.HEALTH_MAX_WAL_MB),
+        'request_pool': check_request_pool(config_obj.WORKER_THREADS),
+        'email': check_email(config_obj.HEALTH_MAX_EMAIL_BACKLOG),
+        'disk': check_disk(
+            sorted({os.path.dirname(os.path.abspath(db.DB_PATH)), os.path.abspath(config_obj.LOG_DIR)}),
+            config_obj.HEALTH_MIN_FREE_MB
+        ),
+    }
+    if not (checks['database']['ok'] and checks['disk']['ok']):
+        status = 'not_ready'
+    elif all(check['ok'] for check in checks.values()):
+        status = 'ready'
+    else:
+        status = 'degraded'
+    return {'status': status, 'checked_at': datetime.utcnow().isoformat(), 'checks': checks}
+
+def readiness(config_obj):
+    """Cached readiness result and whether it came from the cache."""
+    ttl = config_obj.HEALTH_CACHE_SECONDS
+    at = _cache['at']
+    if at is not None and time.monotonic() - at < ttl:
+        return _cache['result'], True
+    with _cache_lock:
+        # Another probe may have refreshed the result while we waited
+        at = _cache['at']
+        if at is not None and time.monotonic() - at < ttl:
+            return _cache['result'], True
+        result = run_checks(config_obj)
+        _cache['result'] = result
+        _cache['at'] = time.monotonic()
+        return result, False
+
+def init_health(app):
+    """Count in-flight requests per worker for the request_pool check."""
+    app.before_request(_request_started)
+    app.teardown_request(_request_finished)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Command line bulk import of historical workouts.
+
+Usage:
+    python import_data.py --user testuser history.csv
+    python import_data.py --user testuser --format ndjson history.ndjson
+    cat history.csv | python import_data.py --user testuser -
+"""
+
+import argparse
+import sys
+import time
+from db import init_db
+from models import User
+from importer import import_history, IMPORT_FORMATS, IMPORT_CHUNK_SIZE
+
+def main():
+    parser = argparse.ArgumentParser(description='Import workout history from CSV or NDJSON')
+    parser.add_argument('path', help="File to import, or '-' for stdin")
+    parser.add_argument('--user', required=True, help='Username that will own the imported sessions')
+    parser.add_argument('--format', choices=IMPORT_FORMATS, help='Input format (default: from file extension)')
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows per transaction')
+    args = parser.parse_args()
+
+    fmt = args.format or ('ndjson' if args.path.endswith(('.ndjson', '.jsonl', '.json')) else 'csv')
+
+    init_db()
+    user = User.get_by_username(args.user)
+    if not user:
+        print(f"❌ User not found: {args.user}")
+        sys.exit(1)
+
+    started = time.time()
+
+    def report(stats):
+        elapsed = time.time() - started
+        print(f"⏳ {stats['sessions']} sessions, {stats['exercises']} exercises "
+              f"({stats['exercises'] / elapsed if elapsed else 0:.0f} rows/s)")
+
+    if args.path == '-':
+        stats = import_history(user['id'], sys.stdin.buffer, fmt, args.chunk_size, report)
+    else:
+        with open(args.path, 'rb') as f:
+            stats = import_history(user['id'], f, fmt, args.chunk_size, report)
+
+    print(f"✅ Imported {stats['sessions']} sessions and {stats['exercises']} exercises "
+          f"in {time.time() - started:.1f}s")
+    print(f"   Created {stats['templates_created']} templates and "
+          f"{stats['template_exercises_created']} template exercises")
+    if stats['duplicate_sessions']:
+        print(f"   Skipped {stats['duplicate_sessions']} sessions that were already imported")
+    if stats['rejected_rows']:
+        print(f"⚠️  Rejected {stats['rejected_rows']} rows:")
+        for error in stats['errors']:
+            print(f"   line {error['line']}: {error['error']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,255 @@
+"""
+Bulk import of historical workouts from CSV or NDJSON.
+
+Rows use the same columns as the export (session_date, template_name,
+exercise_name, weight_kg, reps, sets and optionally session_id). Consecutive
+rows sharing a session_id (or session_date + template_name when there is no
+session_id) become one session. Missing templates and template exercises are
+created on the fly, and rows are written with executemany in chunked
+transactions.
+
+A session whose date and template the user already has is skipped, so
+running an import again (say after it failed halfway) adds only the sessions
+that are still missing.
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from db import get_db, next_row_id
+from validation import (
+    ValidationError, validate_template_name, validate_exercise_name, validate_workout_data
+)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+# Session and session exercise rows buffered per transaction
+IMPORT_CHUNK_SIZE = 5000
+
+# Row errors kept in the summary; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+def parse_rows(stream, fmt='csv'):
+    """Yield (line_number, row dict) pairs from a binary or text stream."""
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+
+    if isinstance(stream, (io.TextIOBase, io.StringIO)):
+        text = stream
+    else:
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(text, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                yield line_number, None
+                continue
+            yield line_number, row if isinstance(row, dict) else None
+
+def _validate_date(value):
+    if not value or not isinstance(value, str):
+        raise ValidationError("session_date is required")
+    try:
+        datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValidationError("session_date must be an ISO 8601 date")
+    return value
+
+class HistoryImporter:
+    """Import rows for a single user in chunked executemany transactions."""
+
+    def __init__(self, user_id, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+        self.progress = progress
+        self.templates = {}          # template name -> id
+        self.exercises = {}          # (template id, exercise name) -> template exercise id
+        self.next_order_idx = {}     # template id -> next order_idx
+        self.valid_names = {}        # validator -> names it accepted
+        self.imported = set()        # (template name, session_date) of the user's sessions
+        self.stats = {
+            'rows': 0,
+            'sessions': 0,
+            'duplicate_sessions': 0,
+            'exercises': 0,
+            'templates_created': 0,
+            'template_exercises_created': 0,
+            'rejected_rows': 0,
+            'errors': [],
+        }
+
+    def _load_catalog(self, conn):
+        self.templates.clear()
+        self.exercises.clear()
+        self.next_order_idx.clear()
+        self.imported.clear()
+        for row in conn.execute(
+            "SELECT id, name FROM templates WHERE user_id = ?", (self.user_id,)
+        ):
+            self.templates[row['name']] = row['id']
+        for row in conn.execute("""
+            SELECT te.id, te.template_id, te.name, te.order_idx
+            FROM template_exercises te
+            JOIN templates t ON te.template_id = t.id
+            WHERE t.user_id = ?
+        """, (self.user_id,)):
+            self.exercises[(row['template_id'], row['name'])] = row['id']
+            self.next_order_idx[row['template_id']] = max(
+                self.next_order_idx.get(row['template_id'], 0), row['order_idx'] + 1
+            )
+        for row in conn.execute("""
+            SELECT t.name, s.session_date
+            FROM sessions s
+            JOIN templates t ON s.template_id = t.id
+            WHERE s.user_id = ?
+        """, (self.user_id,)):
+            self.imported.add((row['name'], row['session_date']))
+
+    def _reject(self, line_number, message):
+        self.stats['rejected_rows'] += 1
+        if len(self.stats['errors']) < MAX_REPORTED_ERRORS:
+            self.stats['errors'].append({'line': line_number, 'error': message})
+
+    def _check_name(self, validator, name):
+        # Names repeat on nearly every row, so only validate each one once
+        # (per validator: template and exercise names follow different rules)
+        valid = self.valid_names.setdefault(validator, set())
+        if name not in valid:
+            validator(name)
+            valid.add(name)
+
+    def _validate(self, row):
+        """Return (session key, session_date, template name, exercise tuple or None)."""
+        session_date = _validate_date(row.get('session_date'))
+        template_name = (row.get('template_name') or '').strip()
+        self._check_name(validate_template_name, template_name)
+
+        exercise = None
+        exercise_name = (row.get('exercise_name') or '').strip()
+        if exercise_name:
+            self._check_name(validate_exercise_name, exercise_name)
+            validate_workout_data(row.get('weight_kg'), row.get('reps'), row.get('sets'))
+            exercise = (exercise_name, float(row['weight_kg']), int(row['reps']), int(row['sets']))
+
+        key = row.get('session_id') or (session_date, template_name)
+        return key, session_date, template_name, exercise
+
+    def _template_id(self, conn, name):
+        template_id = self.templates.get(name)
+        if template_id is None:
+            template_id = conn.execute(
+                "INSERT INTO templates (user_id, name) VALUES (?, ?)", (self.user_id, name)
+            ).lastrowid
+            self.templates[name] = template_id
+            self.stats['templates_created'] += 1
+        return template_id
+
+    def _template_exercise_id(self, conn, template_id, name):
+        exercise_id = self.exercises.get((template_id, name))
+        if exercise_id is None:
+            order_idx = self.next_order_idx.get(template_id, 0)
+            exercise_id = conn.execute(
+                "INSERT INTO template_exercises (template_id, name, order_idx) VALUES (?, ?, ?)",
+                (template_id, name, order_idx)
+            ).lastrowid
+            self.exercises[(template_id, name)] = exercise_id
+            self.next_order_idx[template_id] = order_idx + 1
+            self.stats['template_exercises_created'] += 1
+        return exercise_id
+
+    def _write_chunk(self, conn, sessions):
+        """Write buffered sessions in one transaction with explicit row IDs."""
+        created = (self.stats['templates_created'], self.stats['template_exercises_created'])
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            next_id = next_row_id(conn, 'sessions')
+            session_rows = []
+            exercise_rows = []
+            for session_date, template_name, exercises in sessions:
+                template_id = self._template_id(conn, template_name)
+                session_rows.append((next_id, self.user_id, template_id, session_date))
+                for name, weight_kg, reps, sets in exercises:
+                    exercise_id = self._template_exercise_id(conn, template_id, name)
+                    exercise_rows.append((next_id, exercise_id, weight_kg, reps, sets))
+                next_id += 1
+
+            conn.executemany(
+                "INSERT INTO sessions (id, user_id, template_id, session_date) VALUES (?, ?, ?, ?)",
+                session_rows
+            )
+            conn.executemany(
+                "INSERT INTO session_exercises (session_id, template_exercise_id, weight_kg, reps, sets) VALUES (?, ?, ?, ?, ?)",
+                exercise_rows
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            # The cached ids of templates created in this chunk are gone with it
+            self.stats['templates_created'], self.stats['template_exercises_created'] = created
+            self._load_catalog(conn)
+            raise
+
+        self.stats['sessions'] += len(session_rows)
+        self.stats['exercises'] += len(exercise_rows)
+        if self.progress:
+            self.progress(self.stats)
+
+    def run(self, rows):
+        """Import (line_number, row) pairs and return the summary stats."""
+        with get_db() as conn:
+            self._load_catalog(conn)
+
+            pending = []            # (session_date, template_name, [exercises])
+            pending_rows = 0
+            current_key = None
+            duplicate = False
+
+            for line_number, row in rows:
+                self.stats['rows'] += 1
+                if row is None:
+                    self._reject(line_number, "Row is not a valid JSON object")
+                    continue
+                try:
+                    key, session_date, template_name, exercise = self._validate(row)
+                except (ValidationError, ValueError, TypeError) as e:
+                    self._reject(line_number, str(e))
+                    continue
+
+                if key != current_key:
+                    current_key = key
+                    duplicate = (template_name, session_date) in self.imported
+                    if duplicate:
+                        self.stats['duplicate_sessions'] += 1
+                        continue
+                    self.imported.add((template_name, session_date))
+                    if pending_rows >= self.chunk_size:
+                        self._write_chunk(conn, pending)
+                        pending = []
+                        pending_rows = 0
+                    pending.append((session_date, template_name, []))
+                    pending_rows += 1
+                elif duplicate:
+                    continue
+                if exercise:
+                    pending[-1][2].append(exercise)
+                    pending_rows += 1
+
+            if pending:
+                self._write_chunk(conn, pending)
+
+        return self.stats
+
+def import_history(user_id, stream, fmt='csv', chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """Parse and import a CSV/NDJSON stream for a user."""
+    importer = HistoryImporter(user_id, chunk_size=chunk_size, progress=progress)
+    return importer.run(parse_rows(stream, fmt))
@@ -0,0 +1,57 @@
+"""
+Minimal background job runner for periodic maintenance work.
+
+Jobs run on daemon threads inside the process that starts them. Each job must
+be safe to run concurrently from several processes (gunicorn workers), which
+the jobs in this project guarantee by doing their writes inside
+BEGIN IMMEDIATE transactions.
+
+When the app is preloaded in the gunicorn master, JOBS_START_AFTER_FORK=true
+(set by gunicorn.conf.py) holds jobs back until start_deferred() runs in each
+worker, so the master never runs jobs or forks with job threads mid-query.
+"""
+
+import logging
+import os
+import threading
+
+logger = logging.getLogger('jobs')
+
+_jobs = {}
+_deferred = {}
+
+def _start(name, interval_seconds, func):
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval_seconds):
+            try:
+                func()
+            except Exception:
+                logger.exception("Background job %s failed", name)
+
+    thread = threading.Thread(target=loop, name=f"job-{name}", daemon=True)
+    thread.start()
+    _jobs[name] = (thread, stop)
+    return thread
+
+def start_periodic(name, interval_seconds, func):
+    """Run func every interval_seconds on a daemon thread (once per process)."""
+    if not interval_seconds or interval_seconds <= 0 or name in _jobs:
+        return None
+    if os.environ.get('JOBS_START_AFTER_FORK') == 'true':
+        _deferred[name] = (interval_seconds, func)
+        return None
+    return _start(name, interval_seconds, func)
+
+def start_deferred():
+    """Start jobs held back by JOBS_START_AFTER_FORK (call in each worker after fork)."""
+    for name, (interval_seconds, func) in list(_deferred.items()):
+        if name not in _jobs:
+            _start(name, interval_seconds, func)
+
+def stop_all():
+    """Signal every running job to stop."""
+    for thread, stop in _jobs.values():
+        stop.set()
+    _jobs.clear()
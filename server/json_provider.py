@@ -0,0 +1,85 @@
+"""
+JSON provider for every jsonify() response and request.get_json() body.
+
+orjson is used when it is installed, and the stdlib json module otherwise.
+Both produce the same documents as Flask's default provider: sorted keys,
+compact outside debug mode, and the same handling of UUIDs, dataclasses and
+__html__ objects. Two types are serialized differently:
+- datetime and date become ISO 8601 strings in both modes (Flask's default
+  uses RFC 822 HTTP dates);
+- Decimal becomes a string, as in Flask.
+sqlite3.Row is serialized as an object, so rows can be returned without a
+dict() copy, although models already return plain dicts (see db.fetch_dicts).
+"""
+
+import dataclasses
+import decimal
+import json
+import sqlite3
+import uuid
+from datetime import date, datetime, time
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(o):
+    """Serialize the types neither encoder handles natively."""
+    if isinstance(o, sqlite3.Row):
+        return dict(o)
+    if isinstance(o, (datetime, date, time)):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+def dumps_bytes(obj, sort_keys=True, indent=False):
+    """Compact UTF-8 JSON, with orjson when available."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=_default, option=option)
+        except TypeError:
+            # Integers beyond 64 bits and the like; the stdlib handles or reports them
+            pass
+    if indent:
+        text = json.dumps(obj, default=_default, sort_keys=sort_keys, indent=2)
+    else:
+        text = json.dumps(obj, default=_default, sort_keys=sort_keys, separators=(',', ':'))
+    return text.encode('utf-8')
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, falling back to the stdlib."""
+
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        # Explicit json.dumps() options are only understood by the stdlib
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, sort_keys=self.sort_keys).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            dumps_bytes(obj, sort_keys=self.sort_keys, indent=indent) + b'\n',
+            mimetype=self.mimetype
+        )
@@ -0,0 +1,145 @@
+"""
+Prometheus metrics for the API.
+
+Records per-endpoint request counts, status codes and latency, SQL statements
+and connection checkouts per request, password hashing time, admission
+control decisions and queue wait, and the number of emails waiting to be
+sent. Exposed in Prometheus text format on /metrics, which requires
+METRICS_TOKEN as a Bearer token (the endpoint is disabled when no token is
+configured).
+
+Under gunicorn, set PROMETHEUS_MULTIPROC_DIR to an empty, writable directory
+before the workers start; every worker then writes its samples there and
+/metrics aggregates all of them.
+"""
+
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from db import register_connection_hook
+
+REQUEST_COUNT = Counter(
+    'workout_http_requests_total', 'HTTP requests handled',
+    ['endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'workout_http_request_duration_seconds', 'HTTP request latency',
+    ['endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+DB_STATEMENTS = Histogram(
+    'workout_db_statements_per_request', 'SQL statements executed per request',
+    ['endpoint'],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+)
+DB_CHECKOUTS = Counter(
+    'workout_db_connections_total', 'Connections opened through db.get_db'
+)
+HASH_SECONDS = Histogram(
+    'workout_password_hash_seconds', 'Time spent hashing or checking passwords',
+    ['operation'],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2)
+)
+ADMISSION_DECISIONS = Counter(
+    'workout_admission_total', 'API requests admitted or shed by admission control',
+    ['priority', 'decision']
+)
+QUEUE_WAIT = Histogram(
+    'workout_request_queue_wait_seconds', 'Time from proxy accept to the worker picking the request up',
+    ['priority'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+EMAIL_QUEUE_DEPTH = Gauge(
+    'workout_email_queue_depth', 'Emails waiting to be sent',
+    multiprocess_mode='livesum'
+)
+
+def _count_statement(statement):
+    if has_request_context():
+        g.db_statements = g.get('db_statements', 0) + 1
+
+def _instrument_connection(conn):
+    DB_CHECKOUTS.inc()
+    conn.set_trace_callback(_count_statement)
+
+@contextmanager
+def time_hash(operation):
+    """Time a password hash ('generate') or verification ('check')."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        HASH_SECONDS.labels(operation).observe(time.perf_counter() - started)
+
+# Emails in flight in this process (the gauge above aggregates all workers)
+_emails_pending = 0
+_emails_lock = threading.Lock()
+
+@contextmanager
+def track_email():
+    """Count an email as queued until it has been handed to the SMTP server."""
+    global _emails_pending
+    EMAIL_QUEUE_DEPTH.inc()
+    with _emails_lock:
+        _emails_pending += 1
+    try:
+        yield
+    finally:
+        EMAIL_QUEUE_DEPTH.dec()
+        with _emails_lock:
+            _emails_pending -= 1
+
+def email_backlog():
+    """Emails this process is still waiting to hand to the SMTP server."""
+    return _emails_pending
+
+def _endpoint_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+def _collect():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+def init_metrics(app, token=None, limiter=None):
+    """
+    Wire request instrumentation and the /metrics endpoint into the app.
+    The endpoint is exempt from limiter: behind nginx every scrape shares
+    one client address, and scrapes matter most under load.
+    """
+    register_connection_hook(_instrument_connection)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.db_statements = 0
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = _endpoint_label()
+            REQUEST_LATENCY.labels(endpoint, request.method).observe(time.perf_counter() - started)
+            REQUEST_COUNT.labels(endpoint, request.method, str(response.status_code)).inc()
+            DB_STATEMENTS.labels(endpoint).observe(g.get('db_statements', 0))
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        supplied = request.headers.get('Authorization', '')
+        if not token or not hmac.compare_digest(supplied, f'Bearer {token}'):
+            return Response('Not found\n', status=404, mimetype='text/plain')
+        return Response(_collect(), mimetype=CONTENT_TYPE_LATEST)
+
+    if limiter is not None:
+        limiter.exempt(metrics)
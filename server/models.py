@@ -1,40 +1,72 @@
 from werkzeug.security import generate_password_hash, check_password_hash
-from db import get_db
+from db import get_db, fetch_dicts
+from metrics import time_hash
+from tracing import trace_methods
 import sqlite3
 import re
 import os
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 
+_LOWERCASE = re.compile(r'[a-z]')
+_UPPERCASE = re.compile(r'[A-Z]')
+_DIGIT = re.compile(r'\d')
+_SPECIAL = re.compile(r'[!@#$%^&*(),.?":{}|<>+\-=]')
+
+WEAK_PASSWORDS = frozenset([
+    'password', 'password123', '12345678', 'qwerty123', 'admin123',
+    'letmein', 'welcome123', 'monkey123', '123456789', 'password1',
+    '123456', 'admin', 'guest', 'test', 'user'
+])
+
+def _hash_password(password):
+    with time_hash('generate'):
+        return generate_password_hash(password)
+
+def _check_password(password_hash, password):
+    with time_hash('check'):
+        return check_password_hash(password_hash, password)
+
+@lru_cache(maxsize=None)
+def _load_password_policy(config_name):
+    """
+    Read the password policy once per config name. The policy settings are
+    class attributes, so the config class is not instantiated (which would
+    re-run secret validation on every password check).
+    """
+    from config import config
+    
+    if config_name in config:
+        config_cls = config[config_name]
+        policy = {
+            'min_length': config_cls.PASSWORD_MIN_LENGTH,
+            'max_length': config_cls.PASSWORD_MAX_LENGTH,
+            'require_uppercase': config_cls.PASSWORD_REQUIRE_UPPERCASE,
+            'require_lowercase': config_cls.PASSWORD_REQUIRE_LOWERCASE,
+            'require_numbers': config_cls.PASSWORD_REQUIRE_NUMBERS,
+            'require_special': config_cls.PASSWORD_REQUIRE_SPECIAL,
+            'block_common': config_cls.PASSWORD_BLOCK_COMMON,
+        }
+    else:
+        # Fallback defaults
+        policy = {
+            'min_length': 8,
+            'max_length': 128,
+            'require_uppercase': True,
+            'require_lowercase': True,
+            'require_numbers': True,
+            'require_special': True,
+            'block_common': True,
+        }
+    return MappingProxyType(policy)
+
+@trace_methods
 class User:
     @staticmethod
     def get_password_policy():
-        """Get password policy from configuration."""
-        from config import config
-        config_name = os.environ.get('FLASK_ENV', 'development')
-        
-        # Get config instance to access password policy
-        if config_name in config:
-            config_obj = config[config_name]()
-            return {
-                'min_length': config_obj.PASSWORD_MIN_LENGTH,
-                'max_length': config_obj.PASSWORD_MAX_LENGTH,
-                'require_uppercase': config_obj.PASSWORD_REQUIRE_UPPERCASE,
-                'require_lowercase': config_obj.PASSWORD_REQUIRE_LOWERCASE,
-                'require_numbers': config_obj.PASSWORD_REQUIRE_NUMBERS,
-                'require_special': config_obj.PASSWORD_REQUIRE_SPECIAL,
-                'block_common': config_obj.PASSWORD_BLOCK_COMMON,
-            }
-        else:
-            # Fallback defaults
-            return {
-                'min_length': 8,
-                'max_length': 128,
-                'require_uppercase': True,
-                'require_lowercase': True,
-                'require_numbers': True,
-                'require_special': True,
-                'block_common': True,
-            }
+        """Get the (read-only, cached) password policy from configuration."""
+        return _load_password_policy(os.environ.get('FLASK_ENV', 'development'))
     
     @staticmethod
     def validate_password_strength(password):
@@ -53,19 +85,19 @@ class User:
         requirements = []
         
         # Check for lowercase letter
-        if policy['require_lowercase'] and not re.search(r'[a-z]', password):
+        if policy['require_lowercase'] and not _LOWERCASE.search(password):
             requirements.append("one lowercase letter")
         
         # Check for uppercase letter
-        if policy['require_uppercase'] and not re.search(r'[A-Z]', password):
+        if policy['require_uppercase'] and not _UPPERCASE.search(password):
             requirements.append("one uppercase letter")
         
         # Check for digit
-        if policy['require_numbers'] and not re.search(r'\d', password):
+        if policy['require_numbers'] and not _DIGIT.search(password):
             requirements.append("one number")
         
         # Check for special character
-        if policy['require_special'] and not re.search(r'[!@#$%^&*(),.?":{}|<>+\-=]', password):
+        if policy['require_special'] and not _SPECIAL.search(password):
             requirements.append("one special character (!@#$%^&*(),.?\":{}|<>+-=)")
         
         if requirements:
@@ -73,12 +105,7 @@ class User:
         
         # Check for common weak passwords
         if policy['block_common']:
-            weak_passwords = [
-                'password', 'password123', '12345678', 'qwerty123', 'admin123',
-                'letmein', 'welcome123', 'monkey123', '123456789', 'password1',
-                '123456', 'admin', 'guest', 'test', 'user'
-            ]
-            if password.lower() in weak_passwords:
+            if password.lower() in WEAK_PASSWORDS:
                 return False, "Password is too common and easily guessable"
         
         return True, "Password meets security requirements"
@@ -90,7 +117,7 @@ class User:
         if not is_valid:
             raise ValueError(error_message)
         
-        password_hash = generate_password_hash(password)
+        password_hash = _hash_password(password)
         with get_db() as conn:
             try:
                 cursor = conn.execute(
@@ -113,7 +140,7 @@ class User:
     @staticmethod
     def verify_password(username, password):
         user = User.get_by_username(username)
-        if user and check_password_hash(user['password_hash'], password):
+        if user and not user['disabled_at'] and _check_password(user['password_hash'], password):
             return user
         return None
     
@@ -133,7 +160,7 @@ class User:
                 return False, "User not found"
             
             # Verify current password
-            if not check_password_hash(user['password_hash'], current_password):
+            if not _check_password(user['password_hash'], current_password):
                 return False, "Current password is incorrect"
             
             # Validate new password strength
@@ -142,11 +169,11 @@ class User:
                 return False, error_message
             
             # Check that new password is different from current
-            if check_password_hash(user['password_hash'], new_password):
+            if _check_password(user['password_hash'], new_password):
                 return False, "New password must be different from current password"
             
             # Update password and clear must_change_password flag
-            new_password_hash = generate_password_hash(new_password)
+            new_password_hash = _hash_password(new_password)
             conn.execute(
                 "UPDATE users SET password_hash = ?, must_change_password = 0 WHERE id = ?",
                 (new_password_hash, user_id)
@@ -173,14 +200,84 @@ class User:
             ).fetchone()
             return dict(user) if user else None
     
+    @staticmethod
+    def is_active(user_id):
+        """Whether the user exists and is not disabled (checked for every access token)."""
+        with get_db() as conn:
+            user = conn.execute(
+                "SELECT disabled_at FROM users WHERE id = ?", (user_id,)
+            ).fetchone()
+            return user is not None and user['disabled_at'] is None
+    
     @staticmethod
     def get_all_users():
         """Get all users (admin only)."""
         with get_db() as conn:
-            users = conn.execute(
+            return fetch_dicts(
+                conn,
                 "SELECT id, username, email, role, created_at, must_change_password FROM users ORDER BY created_at DESC"
-            ).fetchall()
-            return [dict(user) for user in users]
+            )
+    
+    @staticmethod
+    def list_users(limit=50, cursor=None, search=None, role=None, count_cap=10000):
+        """
+        Keyset-paginated user listing (admin only), newest first.
+        
+        search is a case-insensitive prefix match on username or email, and
+        cursor is the last id of the previous page. Returns
+        (users, next_cursor, total, total_capped). Unfiltered and role
+        counts come from an index; search counts stop at count_cap.
+        """
+        conditions, params = [], []
+        page_conditions, page_params = [], []
+        
+        if search:
+            prefix = search.lower()
+            prefix_end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            # One index range per column, merged by id. OR-ing the ranges, or
+            # putting the cursor outside the subquery, lets SQLite walk the
+            # whole table by rowid instead.
+            matches = ("id IN (SELECT id FROM users WHERE lower(username) >= ? AND lower(username) < ?{0} "
+                       "UNION SELECT id FROM users WHERE lower(email) >= ? AND lower(email) < ?{0})")
+            conditions.append(matches.format(''))
+            params.extend([prefix, prefix_end, prefix, prefix_end])
+            if cursor:
+                page_conditions.append(matches.format(' AND id < ?'))
+                page_params.extend([prefix, prefix_end, cursor, prefix, prefix_end, cursor])
+            else:
+                page_conditions.append(conditions[-1])
+                page_params.extend(params)
+        elif cursor:
+            page_conditions.append("id < ?")
+            page_params.append(cursor)
+        if role:
+            conditions.append("role = ?")
+            params.append(role)
+            page_conditions.append("role = ?")
+            page_params.append(role)
+        
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        page_where = f"WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+        
+        with get_db() as conn:
+            users = fetch_dicts(
+                conn,
+                f"SELECT id, username, email, role, created_at, must_change_password, disabled_at FROM users {page_where} ORDER BY id DESC LIMIT ?",
+                page_params + [limit + 1]
+            )
+            if search:
+                total = conn.execute(
+                    f"SELECT COUNT(*) FROM (SELECT 1 FROM users {where} LIMIT ?)",
+                    params + [count_cap]
+                ).fetchone()[0]
+            else:
+                total = conn.execute(f"SELECT COUNT(*) FROM users {where}", params).fetchone()[0]
+        
+        next_cursor = None
+        if len(users) > limit:
+            users = users[:limit]
+            next_cursor = users[-1]['id']
+        return users, next_cursor, total, bool(search) and total >= count_cap
     
     @staticmethod
     def update_user(user_id, username=None, email=None, role=None):
@@ -216,11 +313,34 @@ class User:
     
     @staticmethod
     def delete_user(user_id):
-        """Delete user (admin only)."""
+        """
+        Disable a user and queue their data for background deletion (admin only).
+        Returns the purge job id, or None if the user does not exist.
+        """
         with get_db() as conn:
-            cursor = conn.execute("DELETE FROM users WHERE id = ?", (user_id,))
+            user = conn.execute(
+                "SELECT username, disabled_at FROM users WHERE id = ?", (user_id,)
+            ).fetchone()
+            if not user:
+                return None
+            
+            existing = conn.execute(
+                "SELECT id FROM purge_jobs WHERE user_id = ? AND status IN ('pending', 'running')",
+                (user_id,)
+            ).fetchone()
+            if existing:
+                return existing['id']
+            
+            conn.execute(
+                "UPDATE users SET disabled_at = CURRENT_TIMESTAMP WHERE id = ? AND disabled_at IS NULL",
+                (user_id,)
+            )
+            cursor = conn.execute(
+                "INSERT INTO purge_jobs (user_id, username) VALUES (?, ?)",
+                (user_id, user['username'])
+            )
             conn.commit()
-            return cursor.rowcount > 0
+            return cursor.lastrowid
     
     @staticmethod
     def reset_user_password(user_id, new_password):
@@ -229,7 +349,7 @@ class User:
         if not is_valid:
             return False, error_message
         
-        password_hash = generate_password_hash(new_password)
+        password_hash = _hash_password(new_password)
         with get_db() as conn:
             cursor = conn.execute(
                 "UPDATE users SET password_hash = ?, must_change_password = 1 WHERE id = ?",
@@ -239,6 +359,7 @@ class User:
             return cursor.rowcount > 0, "Password reset successfully"
 
 
+@trace_methods
 class PasswordResetToken:
     @staticmethod
     def create(user_id):
@@ -297,7 +418,7 @@ class PasswordResetToken:
         if not is_valid:
             return False, error_message
         
-        password_hash = generate_password_hash(new_password)
+        password_hash = _hash_password(new_password)
         with get_db() as conn:
             cursor = conn.execute(
                 "UPDATE users SET password_hash = ?, must_change_password = 0 WHERE id = ?",
@@ -306,6 +427,7 @@ class PasswordResetToken:
             conn.commit()
             return cursor.rowcount > 0, "Password reset successfully"
 
+@trace_methods
 class Template:
     @staticmethod
     def create(user_id, name):
@@ -323,11 +445,11 @@ class Template:
     @staticmethod
     def get_all_by_user(user_id):
         with get_db() as conn:
-            templates = conn.execute(
+            return fetch_dicts(
+                conn,
                 "SELECT * FROM templates WHERE user_id = ? ORDER BY name",
                 (user_id,)
-            ).fetchall()
-            return [dict(t) for t in templates]
+            )
 
     @staticmethod
     def get_by_id(template_id, user_id):
@@ -358,6 +480,7 @@ class Template:
             conn.commit()
             return cursor.rowcount > 0
 
+@trace_methods
 class TemplateExercise:
     @staticmethod
     def create(template_id, name, order_idx):
@@ -372,11 +495,11 @@ class TemplateExercise:
     @staticmethod
     def get_by_template(template_id):
         with get_db() as conn:
-            exercises = conn.execute(
+            return fetch_dicts(
+                conn,
                 "SELECT * FROM template_exercises WHERE template_id = ? ORDER BY order_idx",
                 (template_id,)
-            ).fetchall()
-            return [dict(e) for e in exercises]
+            )
 
     @staticmethod
     def delete_by_template(template_id):
@@ -406,6 +529,7 @@ class TemplateExercise:
             ).fetchone()
             return dict(exercise) if exercise else None
 
+@trace_methods
 class Session:
     @staticmethod
     def create(user_id, template_id, session_date=None):
@@ -424,22 +548,44 @@ class Session:
     def get_by_user(user_id, template_id=None):
         with get_db() as conn:
             if template_id:
-                sessions = conn.execute("""
+                return fetch_dicts(conn, """
                     SELECT s.*, t.name as template_name 
                     FROM sessions s 
                     JOIN templates t ON s.template_id = t.id 
                     WHERE s.user_id = ? AND s.template_id = ? 
                     ORDER BY s.session_date DESC
-                """, (user_id, template_id)).fetchall()
-            else:
-                sessions = conn.execute("""
-                    SELECT s.*, t.name as template_name 
-                    FROM sessions s 
-                    JOIN templates t ON s.template_id = t.id 
-                    WHERE s.user_id = ? 
-                    ORDER BY s.session_date DESC
-                """, (user_id,)).fetchall()
-            return [dict(s) for s in sessions]
+                """, (user_id, template_id))
+            return fetch_dicts(conn, """
+                SELECT s.*, t.name as template_name 
+                FROM sessions s 
+                JOIN templates t ON s.template_id = t.id 
+                WHERE s.user_id = ? 
+                ORDER BY s.session_date DESC
+            """, (user_id,))
+
+    @staticmethod
+    def iter_history(user_id, batch_size=500):
+        """
+        Yield a user's full history in batches of rows, one row per session
+        exercise, read straight from the cursor (used by exports).
+        """
+        with get_db() as conn:
+            cursor = conn.execute("""
+                SELECT s.id AS session_id, s.session_date, s.template_id,
+                       t.name AS template_name, se.id AS session_exercise_id,
+                       te.name AS exercise_name, se.weight_kg, se.reps, se.sets
+                FROM sessions s
+                JOIN templates t ON s.template_id = t.id
+                LEFT JOIN session_exercises se ON se.session_id = s.id
+                LEFT JOIN template_exercises te ON se.template_exercise_id = te.id
+                WHERE s.user_id = ?
+                ORDER BY s.session_date, s.id, te.order_idx
+            """, (user_id,))
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
 
     @staticmethod
     def delete(session_id, user_id):
@@ -451,6 +597,7 @@ class Session:
             conn.commit()
             return cursor.rowcount > 0
 
+@trace_methods
 class SessionExercise:
     @staticmethod
     def create(session_id, template_exercise_id, weight_kg, reps, sets):
@@ -478,11 +625,10 @@ class SessionExercise:
     @staticmethod
     def get_by_session(session_id):
         with get_db() as conn:
-            exercises = conn.execute("""
+            return fetch_dicts(conn, """
                 SELECT se.*, te.name as exercise_name 
                 FROM session_exercises se
                 JOIN template_exercises te ON se.template_exercise_id = te.id
                 WHERE se.session_id = ?
                 ORDER BY te.order_idx
-            """, (session_id,)).fetchall()
-            return [dict(e) for e in exercises]
+            """, (session_id,))
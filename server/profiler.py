@@ -0,0 +1,124 @@
+"""
+Sampling request profiler for live traffic.
+
+A WSGI middleware profiles a random PROFILE_SAMPLE_RATE fraction of requests,
+plus any request carrying a valid signed X-Profile-Request header (admins get
+one from POST /api/admin/profiles/token). Each profiled request, including
+streaming its response body, is written as a cProfile/pstats file into
+PROFILE_DIR, which keeps only the newest PROFILE_KEEP files.
+
+Requests that are not sampled only pay for one random() call and one
+header lookup.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import os
+import random
+import re
+import time
+from datetime import datetime
+
+PROFILE_HEADER = 'X-Profile-Request'
+_ENVIRON_HEADER = 'HTTP_X_PROFILE_REQUEST'
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9]+')
+
+def _signature(secret, expires):
+    return hmac.new(secret.encode('utf-8'), f'profile:{expires}'.encode('utf-8'), hashlib.sha256).hexdigest()
+
+def create_profile_token(secret, ttl_seconds=600):
+    """Signed header value that forces profiling until it expires."""
+    expires = int(time.time()) + ttl_seconds
+    return f'{expires}.{_signature(secret, expires)}', expires
+
+def verify_profile_token(secret, token):
+    try:
+        expires, signature = token.split('.', 1)
+        expires = int(expires)
+    except ValueError:
+        return False
+    return expires >= time.time() and hmac.compare_digest(signature, _signature(secret, expires))
+
+class ProfilerMiddleware:
+    """Profile sampled or explicitly requested requests into a rotating directory."""
+
+    def __init__(self, wsgi_app, profile_dir, sample_rate=0.0, keep=50, secret=None):
+        self.wsgi_app = wsgi_app
+        self.profile_dir = profile_dir
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.secret = secret
+
+    def _should_profile(self, environ):
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        token = environ.get(_ENVIRON_HEADER)
+        return bool(token and self.secret and verify_profile_token(self.secret, token))
+
+    def __call__(self, environ, start_response):
+        if not self._should_profile(environ):
+            return self.wsgi_app(environ, start_response)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            app_iter = self.wsgi_app(environ, start_response)
+        except Exception:
+            profiler.disable()
+            self._dump(profiler, environ, started)
+            raise
+        return self._profiled_body(app_iter, profiler, environ, started)
+
+    def _profiled_body(self, app_iter, profiler, environ, started):
+        try:
+            for chunk in app_iter:
+                yield chunk
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+            profiler.disable()
+            self._dump(profiler, environ, started)
+
+    def _dump(self, profiler, environ, started):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        path = _UNSAFE_CHARS.sub('_', environ.get('PATH_INFO', '/')).strip('_') or 'root'
+        filename = '{}-{}-{}-{:.0f}ms-{}.prof'.format(
+            datetime.utcnow().strftime('%Y%m%dT%H%M%S%f'),
+            environ.get('REQUEST_METHOD', 'GET'),
+            path[:80],
+            elapsed_ms,
+            os.getpid()
+        )
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, filename))
+            self._rotate()
+        except OSError:
+            # Profiling must never break the request it observes
+            pass
+
+    def _rotate(self):
+        profiles = list_profiles(self.profile_dir)
+        for profile in profiles[self.keep:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, profile['name']))
+            except OSError:
+                pass
+
+def list_profiles(profile_dir):
+    """Profiles in profile_dir, newest first."""
+    try:
+        entries = [entry for entry in os.scandir(profile_dir) if entry.name.endswith('.prof')]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    return [
+        {
+            'name': entry.name,
+            'size': entry.stat().st_size,
+            'created_at': datetime.utcfromtimestamp(entry.stat().st_mtime).isoformat(),
+        }
+        for entry in entries
+    ]
@@ -0,0 +1,154 @@
+"""
+Background deletion of user accounts.
+
+User.delete_user only disables the account and queues a purge job. This
+module deletes the account's data in bounded chunks, each in its own short
+transaction with a pause in between, so deleting a heavy user never holds
+the write lock for long. Progress is recorded on the purge_jobs row.
+
+A job that fails goes back to pending with its error and a retry_at that
+doubles after each attempt. After PURGE_MAX_ATTEMPTS it is marked failed
+and stays that way until an admin deletes the user again.
+"""
+
+import time
+from db import get_db
+
+# Rows deleted per transaction
+PURGE_CHUNK_SIZE = 2000
+
+# Seconds to sleep between chunks so other writers can get in
+PURGE_CHUNK_PAUSE = 0.05
+
+# Running jobs with no progress for this long are considered abandoned
+PURGE_STALE_MINUTES = 10
+
+# Failed jobs are retried after 5, 10, 20, ... minutes, this many times in all
+PURGE_RETRY_MINUTES = 5
+PURGE_MAX_ATTEMPTS = 5
+
+# Deletion order: children first so no single cascade touches many rows
+PURGE_STEPS = [
+    ("session_exercises", """
+        DELETE FROM session_exercises WHERE id IN (
+            SELECT se.id FROM sessions s
+            JOIN session_exercises se ON se.session_id = s.id
+            WHERE s.user_id = ? LIMIT ?
+        )
+    """),
+    ("sessions", """
+        DELETE FROM sessions WHERE id IN (
+            SELECT id FROM sessions WHERE user_id = ? LIMIT ?
+        )
+    """),
+    ("template_exercises", """
+        DELETE FROM template_exercises WHERE id IN (
+            SELECT te.id FROM templates t
+            JOIN template_exercises te ON te.template_id = t.id
+            WHERE t.user_id = ? LIMIT ?
+        )
+    """),
+    ("templates", """
+        DELETE FROM templates WHERE id IN (
+            SELECT id FROM templates WHERE user_id = ? LIMIT ?
+        )
+    """),
+    ("password_reset_tokens", """
+        DELETE FROM password_reset_tokens WHERE id IN (
+            SELECT id FROM password_reset_tokens WHERE user_id = ? LIMIT ?
+        )
+    """),
+]
+
+def _claim_job(conn):
+    """
+    Mark the oldest pending job that is due as running and return it (None
+    if idle). Running jobs that stopped reporting progress (worker killed
+    mid-purge) are picked up again; deletion is idempotent so they resume
+    cleanly.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    job = conn.execute(f"""
+        SELECT * FROM purge_jobs
+        WHERE (status = 'pending' AND (retry_at IS NULL OR retry_at <= datetime('now')))
+           OR (status = 'running' AND updated_at < datetime('now', '-{PURGE_STALE_MINUTES} minutes'))
+        ORDER BY id LIMIT 1
+    """).fetchone()
+    if job:
+        conn.execute(
+            "UPDATE purge_jobs SET status = 'running', updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (job['id'],)
+        )
+    conn.commit()
+    return job
+
+def _delete_chunk(conn, job_id, sql, user_id, chunk_size):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        deleted = conn.execute(sql, (user_id, chunk_size)).rowcount
+        conn.execute(
+            "UPDATE purge_jobs SET rows_deleted = rows_deleted + ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (deleted, job_id)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return deleted
+
+def purge_user(conn, job, chunk_size=PURGE_CHUNK_SIZE, pause=PURGE_CHUNK_PAUSE):
+    """Delete everything owned by the job's user in bounded chunks, then the user."""
+    for table, sql in PURGE_STEPS:
+        while _delete_chunk(conn, job['id'], sql, job['user_id'], chunk_size) >= chunk_size:
+            time.sleep(pause)
+        time.sleep(pause)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        deleted = conn.execute("DELETE FROM users WHERE id = ?", (job['user_id'],)).rowcount
+        conn.execute(
+            "UPDATE purge_jobs SET status = 'done', rows_deleted = rows_deleted + ?, retry_at = NULL, "
+            "updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (deleted, job['id'])
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def _record_failure(conn, job_id, error):
+    """Schedule a retry with backoff, or mark the job failed after the last attempt."""
+    conn.execute("""
+        UPDATE purge_jobs SET
+            attempts = attempts + 1,
+            status = CASE WHEN attempts + 1 < ? THEN 'pending' ELSE 'failed' END,
+            retry_at = CASE WHEN attempts + 1 < ?
+                THEN datetime('now', '+' || (? << attempts) || ' minutes') END,
+            error = ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """, (PURGE_MAX_ATTEMPTS, PURGE_MAX_ATTEMPTS, PURGE_RETRY_MINUTES, str(error), job_id))
+    conn.commit()
+
+def run_purge_jobs(chunk_size=PURGE_CHUNK_SIZE, pause=PURGE_CHUNK_PAUSE):
+    """Process queued purge jobs until the queue is empty. Returns jobs completed."""
+    completed = 0
+    with get_db() as conn:
+        while True:
+            job = _claim_job(conn)
+            if not job:
+                break
+            try:
+                purge_user(conn, job, chunk_size, pause)
+                completed += 1
+            except Exception as e:
+                _record_failure(conn, job['id'], e)
+    return completed
+
+def get_purge_jobs(limit=50):
+    """Most recent purge jobs with their progress (admin only)."""
+    with get_db() as conn:
+        jobs = conn.execute(
+            "SELECT * FROM purge_jobs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [dict(job) for job in jobs]
@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Continuous replication of the SQLite write-ahead log into REPLICA_DIR.
+
+With REPLICA_DIR set the database runs in WAL mode, and one process copies
+every committed transaction out of the -wal file into a replica directory.
+A restore can then bring the database back to within REPLICA_SYNC_INTERVAL
+seconds of a failure, or of any earlier point in the retention window,
+instead of to the last nightly backup.
+
+Replica layout (every file is written once and never changed, so the
+directory can live on a mounted object store):
+
+    generations/<UTC start>-<id>/snapshot.db.gz    full copy where it starts
+    generations/<UTC start>-<id>/snapshot.json     checksum, size, page size
+    generations/<UTC start>-<id>/wal/00000001.wal.gz, .json
+                                                   WAL frames shipped per sync
+
+A segment holds whole transactions only: verified WAL frames up to the last
+commit frame. Its .json sidecar records the SHA-256 of the .gz file, when the
+WAL was read (no transaction in the segment is later) and the WAL position
+reached, and is written last, so a segment without one is incomplete.
+Restoring replays segments over the snapshot in order. A point-in-time
+restore stops at the last segment read at or before the requested time: it
+never includes a later transaction, but can miss those of the seconds just
+before it.
+
+How the request path stays out of it:
+- The replicator only reads the -wal file and holds a read transaction. In
+  WAL mode neither blocks a writer.
+- App connections turn off automatic checkpoints (disable_autocheckpoint).
+  The replicator runs PASSIVE checkpoints itself, which never wait for
+  writers. Commits therefore no longer include checkpoint work.
+- Each sync starts a read transaction before reading the WAL and checkpoints
+  after shipping, so SQLite cannot copy back, and then discard, frames not
+  yet shipped.
+
+A generation lasts until REPLICA_SNAPSHOT_INTERVAL has passed, or until the
+replicator cannot prove that no frame was missed, whichever comes first.
+That happens on first start, after the app restarts (closing the last
+connection checkpoints and deletes the WAL), or when another tool
+checkpoints the database. A worker taking over from one that exited
+continues the same generation while the WAL is intact. A new generation
+starts with a fresh snapshot, copied inside a read transaction without
+blocking writers.
+Generations are deleted REPLICA_RETENTION seconds after the next one starts.
+
+In the app, the replicator runs as a background job. An flock on
+REPLICA_DIR makes one worker the replicator and lets another take over when
+it exits. It can also run on its own:
+
+    python replicate.py --watch                   # replicate continuously
+    python replicate.py --list
+    python replicate.py --restore --to restored.db [--at 2025-01-31T12:00:00Z]
+"""
+
+import argparse
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import sqlite3
+import struct
+import time
+from datetime import datetime, timezone
+import db
+from backup import write_json, integrity_check, use_rollback_journal, discard_wal
+
+logger = logging.getLogger('replicate')
+
+WAL_HEADER_SIZE = 32
+FRAME_HEADER_SIZE = 24
+
+# WAL frames shipped before the replicator checkpoints them into the database
+# (the page count SQLite's automatic checkpoint would use)
+REPLICA_CHECKPOINT_PAGES = 1000
+
+LOCK_FILE = '.replicate.lock'
+CHUNK_SIZE = 1024 * 1024
+
+class ReplicaError(Exception):
+    """The replica is missing, incomplete or fails its checksums."""
+
+def disable_autocheckpoint(conn):
+    """Connection hook: leave checkpoints to the replicator."""
+    conn.execute("PRAGMA wal_autocheckpoint = 0")
+
+def _now():
+    return datetime.now(timezone.utc)
+
+def _timestamp(moment):
+    return moment.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+def _parse_time(value):
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def wal_checksum(data, s0, s1, big_endian):
+    """SQLite's running WAL checksum over data (a multiple of 8 bytes)."""
+    for first, second in struct.iter_unpack('>2I' if big_endian else '<2I', data):
+        s0 = (s0 + first + s1) & 0xFFFFFFFF
+        s1 = (s1 + second + s0) & 0xFFFFFFFF
+    return s0, s1
+
+def read_wal_header(wal_path):
+    """Position at the start of a WAL file, or None when it has no valid header."""
+    try:
+        with open(wal_path, 'rb') as f:
+            header = f.read(WAL_HEADER_SIZE)
+    except FileNotFoundError:
+        return None
+    if len(header) < WAL_HEADER_SIZE:
+        return None
+    magic, _, page_size, _, salt1, salt2, check1, check2 = struct.unpack('>8I', header)
+    if magic not in (0x377f0682, 0x377f0683):
+        return None
+    big_endian = bool(magic & 1)
+    if wal_checksum(header[:24], 0, 0, big_endian) != (check1, check2):
+        return None
+    return {'salt': [salt1, salt2], 'page_size': page_size, 'big_endian': big_endian,
+            'offset': WAL_HEADER_SIZE, 'checksum': [check1, check2]}
+
+def read_frames(wal_path, position):
+    """
+    Committed frames in the WAL after position.
+
+    Returns (frame bytes, new position, frame count, db size in pages after
+    the last commit). Reading stops at the first frame with other salts or a
+    broken checksum (not yet fully written, or left from before a restart),
+    and frames after the last commit frame are left for the next call.
+    """
+    frame_size = FRAME_HEADER_SIZE + position['page_size']
+    try:
+        with open(wal_path, 'rb') as f:
+            f.seek(position['offset'])
+            data = f.read()
+    except FileNotFoundError:
+        return b'', position, 0, None
+    s0, s1 = position['checksum']
+    salt1, salt2 = position['salt']
+    committed, frames, committed_frames, db_pages = 0, 0, 0, None
+    new_checksum = position['checksum']
+    view = memoryview(data)
+    for start in range(0, len(data) - frame_size + 1, frame_size):
+        header = view[start:start + FRAME_HEADER_SIZE]
+        _, commit_size, frame_salt1, frame_salt2, check1, check2 = struct.unpack('>6I', header)
+        if (frame_salt1, frame_salt2) != (salt1, salt2):
+            break
+        s0, s1 = wal_checksum(header[:8], s0, s1, position['big_endian'])
+        s0, s1 = wal_checksum(view[start + FRAME_HEADER_SIZE:start + frame_size], s0, s1, position['big_endian'])
+        if (s0, s1) != (check1, check2):
+            break
+        frames += 1
+        if commit_size:
+            committed = start + frame_size
+            committed_frames = frames
+            db_pages = commit_size
+            new_checksum = [s0, s1]
+    new_position = dict(position, offset=position['offset'] + committed, checksum=new_checksum)
+    return data[:committed], new_position, committed_frames, db_pages
+
+def _gzip_file(source_path, target_path, level):
+    """Compress source_path into target_path; return the SHA-256 of the output."""
+    digest = hashlib.sha256()
+    with open(source_path, 'rb') as src, open(target_path, 'wb') as raw:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=level, mtime=0) as out:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                out.write(chunk)
+        raw.flush()
+        os.fsync(raw.fileno())
+    with open(target_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class _HashingReader:
+    """File wrapper hashing what is read through it."""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        chunk = self._f.read(size)
+        self.digest.update(chunk)
+        return chunk
+
+def _write_bytes(path, data):
+    partial = path + '.partial'
+    with open(partial, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+class Replicator:
+    """Ship committed WAL frames of one database into a replica directory."""
+
+    def __init__(self, replica_dir, db_path=None, snapshot_interval=86400, retention=259200, level=1):
+        self.replica_dir = replica_dir
+        self.db_path = db_path or db.DB_PATH
+        self.wal_path = self.db_path + '-wal'
+        self.snapshot_interval = snapshot_interval
+        self.retention = retention
+        self.level = level
+        self.generation = None
+        self.generation_started = None
+        self.seq = 0
+        self.position = None
+        # True when every frame of the current WAL is shipped and checkpointed,
+        # so SQLite starting the WAL over (new salts) loses nothing
+        self.restart_expected = False
+        self._lock = None
+        self._reader = None
+
+    @classmethod
+    def from_config(cls, config_obj):
+        return cls(config_obj.REPLICA_DIR, snapshot_interval=config_obj.REPLICA_SNAPSHOT_INTERVAL,
+                   retention=config_obj.REPLICA_RETENTION)
+
+    def sync(self):
+        """Ship new transactions; return the segment written, if any."""
+        if not self._acquire():
+            return None
+        if self._reader is None:
+            self._open()
+        if self.generation is None or (_now() - self.generation_started).total_seconds() >= self.snapshot_interval:
+            return self._start_generation()
+        if not self._continuous(read_wal_header(self.wal_path)):
+            logger.warning("WAL continuity lost in generation %s, starting a new one", self.generation)
+            return self._start_generation()
+        # Read transaction first: the checkpoint after shipping can then only
+        # copy back frames that were committed before it began, all shipped
+        self._begin_read()
+        segment = self._ship()
+        self._checkpoint()
+        return segment
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    def _acquire(self):
+        """Become the one process replicating into replica_dir (held until exit)."""
+        if self._lock is not None:
+            return True
+        os.makedirs(self.replica_dir, exist_ok=True)
+        lock = open(os.path.join(self.replica_dir, LOCK_FILE), 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+        self._lock = lock
+        return True
+
+    def _open(self):
+        # Read-only, so closing it last never checkpoints and deletes the WAL.
+        # Opened first, so the connection switching modes is not the last either.
+        self._reader = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, isolation_level=None)
+        if self._reader.execute("PRAGMA journal_mode").fetchone()[0] != 'wal':
+            conn = sqlite3.connect(self.db_path)
+            try:
+                mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            finally:
+                conn.close()
+            if mode != 'wal':
+                self._reader.close()
+                self._reader = None
+                raise ReplicaError(f"Could not switch {self.db_path} to WAL mode (still {mode})")
+        self._begin_read()
+        self._resume()
+
+    def _begin_read(self):
+        """Move the held read transaction to the newest commit."""
+        if self._reader.in_transaction:
+            self._reader.execute("COMMIT")
+        self._reader.execute("BEGIN")
+        self._reader.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchone()
+
+    def _resume(self):
+        """Continue the newest generation if the WAL still matches where it stopped."""
+        generations = list_generations(self.replica_dir)
+        if not generations:
+            return
+        latest = generations[-1]
+        segments = list_segments(self.replica_dir, latest['generation'])
+        position = segments[-1]['position'] if segments else latest['position']
+        header = read_wal_header(self.wal_path)
+        if not position or not header or header['salt'] != position['salt']:
+            return
+        frame_size = FRAME_HEADER_SIZE + position['page_size']
+        with open(self.wal_path, 'rb') as f:
+            if position['offset'] == WAL_HEADER_SIZE:
+                checksum = header['checksum']
+            else:
+                f.seek(position['offset'] - frame_size + 16)
+                tail = f.read(8)
+                if len(tail) < 8:
+                    return
+                checksum = list(struct.unpack('>2I', tail))
+        if checksum != position['checksum']:
+            return
+        self.generation = latest['generation']
+        self.generation_started = _parse_time(latest['created_at'])
+        self.seq = segments[-1]['seq'] if segments else 0
+        self.position = position
+        logger.info("Resuming generation %s at segment %s", self.generation, self.seq)
+
+    def _continuous(self, header):
+        """Whether the WAL still continues what was shipped (moving on to a new WAL if so)."""
+        if header is not None and self.position is not None and header['salt'] == self.position['salt']:
+            return True
+        if not self.restart_expected:
+            return False
+        # SQLite started the WAL over (or truncated it) after a checkpoint of
+        # everything shipped
+        self.position = header
+        return True
+
+    def _generation_dir(self, generation=None):
+        return os.path.join(self.replica_dir, 'generations', generation or self.generation)
+
+    def _ship(self):
+        """Write the committed frames after the current position as the next segment."""
+        if self.position is None:
+            return None
+        data, position, frames, db_pages = read_frames(self.wal_path, self.position)
+        # Stamped after reading: no commit in the segment is later
+        read_at = _now()
+        if not frames:
+            return None
+        segment = self._write_segment(self._generation_dir(), self.seq + 1, read_at, data, position, frames, db_pages)
+        self.seq = segment['seq']
+        self.position = position
+        self.restart_expected = False
+        return segment
+
+    def _write_segment(self, directory, seq, created_at, data, position, frames, db_pages):
+        wal_dir = os.path.join(directory, 'wal')
+        os.makedirs(wal_dir, exist_ok=True)
+        blob = gzip.compress(data, compresslevel=self.level, mtime=0)
+        name = f'{seq:08d}.wal.gz'
+        _write_bytes(os.path.join(wal_dir, name), blob)
+        segment = {
+            'seq': seq,
+            'file': name,
+            'created_at': _timestamp(created_at),
+            'sha256': hashlib.sha256(blob).hexdigest(),
+            'size': len(blob),
+            'frames': frames,
+            'db_pages': db_pages,
+            'position': position,
+        }
+        write_json(os.path.join(wal_dir, f'{seq:08d}.json'), segment)
+        return segment
+
+    def _checkpoint(self):
+        """Copy shipped frames into the database once the WAL has grown."""
+        if self.position is None or self.restart_expected:
+            return
+        frame_size = FRAME_HEADER_SIZE + self.position['page_size']
+        shipped = (self.position['offset'] - WAL_HEADER_SIZE) // frame_size
+        if shipped < REPLICA_CHECKPOINT_PAGES:
+            return
+        # The read transaction begun before shipping caps this at shipped frames;
+        # closing this connection is never the last close (the reader is open)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            busy, log, checkpointed = conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        finally:
+            conn.close()
+        self.restart_expected = busy == 0 and log == checkpointed == shipped
+        if self.restart_expected:
+            # Everything is shipped and copied back: let the next writer start the WAL over
+            self._reader.execute("COMMIT")
+
+    def _start_generation(self):
+        """Snapshot the database and ship the WAL it was taken from."""
+        self._begin_read()
+        for _ in range(3):
+            header = read_wal_header(self.wal_path)
+            wal = read_frames(self.wal_path, header) if header else (b'', None, 0, None)
+            # The WAL must not have started over while it was read
+            if read_wal_header(self.wal_path) == header:
+                break
+        else:
+            raise ReplicaError("WAL kept restarting while a generation started")
+        data, position, frames, db_pages = wal
+        # Stamped after reading, like every segment
+        started = _now()
+
+        generation = started.strftime('%Y%m%dT%H%M%SZ') + '-' + secrets.token_hex(4)
+        root = os.path.join(self.replica_dir, 'generations')
+        partial_dir = os.path.join(root, generation + '.partial')
+        os.makedirs(partial_dir)
+        try:
+            copy_path = os.path.join(partial_dir, 'snapshot.db')
+            target = sqlite3.connect(copy_path)
+            try:
+                # One step inside the held read transaction: the snapshot is the
+                # database as of that transaction, without blocking writers
+                self._reader.backup(target, pages=-1)
+            finally:
+                target.close()
+            snapshot = {
+                'generation': generation,
+                'created_at': _timestamp(started),
+                'db_bytes': os.path.getsize(copy_path),
+                'position': header,
+            }
+            snapshot['sha256'] = _gzip_file(copy_path, os.path.join(partial_dir, 'snapshot.db.gz'), self.level)
+            snapshot['size'] = os.path.getsize(os.path.join(partial_dir, 'snapshot.db.gz'))
+            os.remove(copy_path)
+
+            # Segment 0: the frames from the start of the WAL, read after the
+            # snapshot's transaction began, so at least up to the snapshot. Replayed
+            # over it they rewrite the same pages and carry it to the WAL's end.
+            snapshot['first_seq'] = 1
+            if frames:
+                self._write_segment(partial_dir, 0, started, data, position, frames, db_pages)
+                snapshot['first_seq'] = 0
+            write_json(os.path.join(partial_dir, 'snapshot.json'), snapshot)
+            os.replace(partial_dir, os.path.join(root, generation))
+        except BaseException:
+            shutil.rmtree(partial_dir, ignore_errors=True)
+            self.generation = self.position = None
+            raise
+
+        self.generation = generation
+        self.generation_started = started
+        self.seq = 0
+        self.position = position if frames else header
+        # With no WAL yet the first header SQLite writes continues the snapshot
+        self.restart_expected = header is None
+        logger.info("Started generation %s (%s bytes)", generation, snapshot['size'])
+        self._begin_read()
+        prune_generations(self.replica_dir, self.retention)
+        return snapshot
+
+def list_generations(replica_dir):
+    """Snapshot metadata of complete generations, oldest first."""
+    root = os.path.join(replica_dir, 'generations')
+    generations = []
+    for name in sorted(os.listdir(root)) if os.path.isdir(root) else []:
+        try:
+            with open(os.path.join(root, name, 'snapshot.json')) as f:
+                generations.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return generations
+
+def list_segments(replica_dir, generation):
+    """Metadata of a generation's shipped segments, in order."""
+    wal_dir = os.path.join(replica_dir, 'generations', generation, 'wal')
+    segments = []
+    for name in sorted(os.listdir(wal_dir)) if os.path.isdir(wal_dir) else []:
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(wal_dir, name)) as f:
+                    segments.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return segments
+
+def prune_generations(replica_dir, retention):
+    """Delete generations replaced more than retention seconds ago; return their names."""
+    root = os.path.join(replica_dir, 'generations')
+    for name in os.listdir(root) if os.path.isdir(root) else []:
+        if name.endswith('.partial'):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    generations = list_generations(replica_dir)
+    cutoff = _now().timestamp() - retention
+    removed = []
+    for current, successor in zip(generations, generations[1:]):
+        if _parse_time(successor['created_at']).timestamp() < cutoff:
+            shutil.rmtree(os.path.join(root, current['generation']), ignore_errors=True)
+            removed.append(current['generation'])
+    return removed
+
+def _apply_segment(path, segment, target):
+    with open(path, 'rb') as f:
+        blob = f.read()
+    if hashlib.sha256(blob).hexdigest() != segment['sha256']:
+        raise ReplicaError(f"Segment {segment['seq']} fails its checksum")
+    data = gzip.decompress(blob)
+    page_size = segment['position']['page_size']
+    frame_size = FRAME_HEADER_SIZE + page_size
+    for start in range(0, len(data), frame_size):
+        page_number = struct.unpack('>I', data[start:start + 4])[0]
+        target.seek((page_number - 1) * page_size)
+        target.write(data[start + FRAME_HEADER_SIZE:start + frame_size])
+
+def restore(replica_dir, target_path, at=None, verify=True):
+    """
+    Rebuild the database into target_path (which must not be in use) as of
+    the newest shipped transaction, or the last one shipped at or before at.
+    """
+    started = time.monotonic()
+    generations = list_generations(replica_dir)
+    if at is not None:
+        generations = [g for g in generations if _parse_time(g['created_at']) <= at]
+    if not generations:
+        raise ReplicaError(f"No generation in {replica_dir} to restore from")
+    generation = generations[-1]
+    gen_dir = os.path.join(replica_dir, 'generations', generation['generation'])
+
+    partial = target_path + '.partial'
+    with open(os.path.join(gen_dir, 'snapshot.db.gz'), 'rb') as raw, open(partial, 'wb') as out:
+        hashing = _HashingReader(raw)
+        with gzip.GzipFile(fileobj=hashing, mode='rb') as src:
+            shutil.copyfileobj(src, out, CHUNK_SIZE)
+    if hashing.digest.hexdigest() != generation['sha256']:
+        os.remove(partial)
+        raise ReplicaError(f"Snapshot of {generation['generation']} fails its checksum")
+    snapshot_seconds = time.monotonic() - started
+
+    applied, size, restored_to = 0, None, generation['created_at']
+    expected = generation['first_seq']
+    try:
+        with open(partial, 'r+b') as target:
+            for segment in list_segments(replica_dir, generation['generation']):
+                # Segment 0 is always applied: the snapshot alone is not a consistent point
+                if segment['seq'] and at is not None and _parse_time(segment['created_at']) > at:
+                    break
+                if segment['seq'] != expected:
+                    raise ReplicaError(f"Segment {expected} of {generation['generation']} is missing")
+                _apply_segment(os.path.join(gen_dir, 'wal', segment['file']), segment, target)
+                applied += 1
+                expected += 1
+                size = segment['db_pages'] * segment['position']['page_size']
+                restored_to = segment['created_at']
+            if size is not None:
+                # The database size after the last replayed commit
+                target.truncate(size)
+            target.flush()
+            os.fsync(target.fileno())
+        use_rollback_journal(partial)
+        result = {
+            'generation': generation['generation'],
+            'segments': applied,
+            'restored_to': restored_to,
+            'snapshot_seconds': round(snapshot_seconds, 2),
+            'replay_seconds': round(time.monotonic() - started - snapshot_seconds, 2),
+        }
+        if verify:
+            checked = time.monotonic()
+            result['integrity'], result['page_count'] = integrity_check(partial)
+            result['verify_seconds'] = round(time.monotonic() - checked, 2)
+            if result['integrity'] != 'ok':
+                raise ReplicaError(f"Restored database fails integrity_check: {result['integrity']}")
+    except BaseException:
+        os.remove(partial)
+        raise
+    # A stale WAL would be replayed onto the restored file
+    discard_wal(target_path)
+    os.replace(partial, target_path)
+    result['seconds'] = round(time.monotonic() - started, 2)
+    return result
+
+def main():
+    from config import config
+
+    parser = argparse.ArgumentParser(description='Continuous SQLite WAL replication')
+    parser.add_argument('--watch', action='store_true', help='Replicate continuously')
+    parser.add_argument('--list', action='store_true', help='List generations and their time ranges')
+    parser.add_argument('--restore', action='store_true', help='Restore the database (use with --to)')
+    parser.add_argument('--to', help='Database path to restore into (the app must be stopped)')
+    parser.add_argument('--at', help='Restore as of this UTC time (ISO 8601), default latest')
+    parser.add_argument('--no-verify', action='store_true', help='Skip integrity_check after restoring')
+    args = parser.parse_args()
+
+    config_obj = config[os.environ.get('FLASK_ENV', 'development')]()
+    if not config_obj.REPLICA_DIR:
+        raise SystemExit("❌ REPLICA_DIR is not set")
+    replica_dir = config_obj.REPLICA_DIR
+
+    if args.list:
+        for generation in list_generations(replica_dir):
+            segments = list_segments(replica_dir, generation['generation'])
+            until = segments[-1]['created_at'] if segments else generation['created_at']
+            print(f"🧬 {generation['generation']}  {generation['created_at']} .. {until}  "
+                  f"snapshot {generation['size'] / 1024 / 1024:.1f} MB, {len(segments)} segments")
+        return
+    if args.restore:
+        if not args.to:
+            raise SystemExit("❌ --restore needs --to PATH")
+        at = _parse_time(args.at) if args.at else None
+        result = restore(replica_dir, args.to, at=at, verify=not args.no_verify)
+        print(f"✅ Restored {args.to} as of {result['restored_to']} from generation {result['generation']} "
+              f"({result['segments']} segments, {result['seconds']}s)")
+        return
+    if args.watch:
+        replicator = Replicator.from_config(config_obj)
+        print(f"🔁 Replicating {replicator.db_path} into {replica_dir} every {config_obj.REPLICA_SYNC_INTERVAL}s")
+        try:
+            while True:
+                try:
+                    replicator.sync()
+                except ReplicaError as e:
+                    logger.error("Replication failed: %s", e)
+                time.sleep(config_obj.REPLICA_SYNC_INTERVAL)
+        except KeyboardInterrupt:
+            replicator.close()
+        return
+    parser.print_help()
+
+if __name__ == '__main__':
+    try:
+        main()
+    except ReplicaError as e:
+        raise SystemExit(f"❌ {e}")
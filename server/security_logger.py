@@ -8,16 +8,26 @@ import os
 from datetime import datetime
 from flask import request, g
 from functools import wraps
+from tracing import current_trace_id
 
 # Configure security logger
 security_logger = logging.getLogger('security')
 security_logger.setLevel(logging.INFO)
 
-# Create file handler for security events
+class _LazyFileHandler(logging.FileHandler):
+    """FileHandler that creates its directory and opens the file on the first event."""
+
+    def __init__(self, filename):
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+# Create file handler for security events (nothing touches the disk at import)
 log_dir = os.environ.get('LOG_DIR', 'logs')
-os.makedirs(log_dir, exist_ok=True)
 
-security_file_handler = logging.FileHandler(os.path.join(log_dir, 'security.log'))
+security_file_handler = _LazyFileHandler(os.path.join(log_dir, 'security.log'))
 security_file_handler.setLevel(logging.INFO)
 
 # Create console handler for development
@@ -39,6 +49,7 @@ class SecurityFormatter(logging.Formatter):
             'endpoint': getattr(record, 'endpoint', None),
             'method': getattr(record, 'method', None),
             'status_code': getattr(record, 'status_code', None),
+            'trace_id': getattr(record, 'trace_id', None) or current_trace_id(),
             'additional_data': getattr(record, 'additional_data', {})
         }
         return json.dumps(log_entry)
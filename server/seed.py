@@ -90,7 +90,6 @@ def seed_data():
     
     init_db()
     
-<<<<<<< HEAD
     # Create admin user - use password from env if available (from generate-secrets.py)
     admin_password = os.environ.get('ADMIN_TEMP_PASSWORD', generate_temp_password())
     admin_id = User.create('admin', admin_password, 'admin@example.com', 'admin', must_change_password=True)
@@ -102,14 +101,6 @@ def seed_data():
     
     # Create test user
     user_id = User.create('testuser', 'TestPassword123!', 'testuser@example.com')
-=======
-    # Create test user
-user_id = User.create(
-    username='testuser',
-    email='test@example.com',
-    password='TestPass123!',
-    role='user'
-)
     if user_id:
         print(f"Created test user with ID: {user_id}")
         
@@ -128,5 +119,35 @@ user_id = User.create(
             TemplateExercise.create(pull_template_id, 'Deadlift', 2)
             print(f"Created Pull Day template with exercises")
 
+def seed_synthetic(profile, users=None, years=None, seed=0, end_date=None):
+    """Add a generated production-scale dataset (see synthetic.py)."""
+    from synthetic import generate, PROFILES, SYNTHETIC_PASSWORD
+    settings = PROFILES[profile]
+    print(f"🏗️  Generating '{profile}' dataset: {users or settings['users']} users, "
+          f"{years or settings['years']} years of history (seed {seed})")
+
+    def report(stats):
+        print(f"⏳ {stats['users']} users, {stats['sessions']} sessions, "
+              f"{stats['session_exercises']} session exercises")
+
+    stats = generate(profile, users=users, years=years, seed=seed, end_date=end_date, progress=report)
+    print(f"✅ Generated {stats['users']} users, {stats['templates']} templates, "
+          f"{stats['sessions']} sessions and {stats['session_exercises']} session exercises "
+          f"in {stats['seconds']}s")
+    print(f"💡 Synthetic users log in with password {SYNTHETIC_PASSWORD}")
+
 if __name__ == '__main__':
+    import argparse
+    from datetime import date
+    from synthetic import PROFILES
+    parser = argparse.ArgumentParser(description='Seed the database with sample or synthetic data')
+    parser.add_argument('--profile', choices=sorted(PROFILES), help='Also generate a synthetic dataset of this size')
+    parser.add_argument('--users', type=int, help='Override the number of synthetic users')
+    parser.add_argument('--years', type=float, help='Override the years of history per user')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed, same dataset)')
+    parser.add_argument('--end-date', type=date.fromisoformat, help='Last day of generated history (default: today)')
+    args = parser.parse_args()
+
     seed_data()
+    if args.profile:
+        seed_synthetic(args.profile, args.users, args.years, args.seed, args.end_date)
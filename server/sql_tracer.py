@@ -0,0 +1,185 @@
+"""
+Opt-in per-request SQL tracer.
+
+When enabled (SQL_TRACE=true), every connection from db.get_db is a
+TracedConnection whose cursors time each statement, including the time spent
+fetching its rows. Per request the tracer:
+
+- adds X-DB-Queries and X-DB-Time-Ms response headers (non-production only);
+- writes statements slower than SQL_SLOW_QUERY_MS to LOG_DIR/slow-queries.log
+  as JSON, with the EXPLAIN QUERY PLAN output attached.
+
+Statement parameters are kept in memory only long enough to run EXPLAIN and
+are never logged.
+"""
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from flask import g, has_request_context, request
+import db
+
+# Statements recorded individually per request; later ones are only counted
+MAX_RECORDED_STATEMENTS = 10000
+
+_WHITESPACE = re.compile(r'\s+')
+
+slow_query_logger = logging.getLogger('slow_queries')
+
+class _StatementRecord:
+    __slots__ = ('sql', 'params', 'seconds', 'rows')
+
+    def __init__(self, sql, params):
+        self.sql = sql
+        self.params = params
+        self.seconds = 0.0
+        self.rows = 0
+
+def _trace():
+    if not has_request_context():
+        return None
+    trace = g.get('sql_trace')
+    if trace is None:
+        trace = g.sql_trace = {'count': 0, 'seconds': 0.0, 'statements': []}
+    return trace
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that attributes execute and fetch time to its current statement."""
+
+    _record = None
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            trace = _trace()
+            if trace is not None:
+                trace['seconds'] += elapsed
+                if self._record is not None:
+                    self._record.seconds += elapsed
+
+    def _start(self, sql, params):
+        self._record = None
+        trace = _trace()
+        if trace is not None:
+            trace['count'] += 1
+            if len(trace['statements']) < MAX_RECORDED_STATEMENTS:
+                self._record = _StatementRecord(sql, params)
+                trace['statements'].append(self._record)
+
+    def execute(self, sql, parameters=()):
+        self._start(sql, parameters)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        self._start(sql, seq_of_parameters[0] if seq_of_parameters else ())
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        self._start(sql_script, None)
+        return self._timed(super().executescript, sql_script)
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is not None and self._record is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._record is not None:
+            self._record.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._record is not None:
+            self._record.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        row = self._timed(super().__next__)
+        if self._record is not None:
+            self._record.rows += 1
+        return row
+
+class TracedConnection(sqlite3.Connection):
+    """Connection whose shortcut execute methods go through TracedCursor."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+def explain(sql, params):
+    """EXPLAIN QUERY PLAN for a statement, on a separate untraced connection."""
+    try:
+        conn = sqlite3.connect(db.DB_PATH)
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+            return [row[3] for row in rows]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return [f"EXPLAIN failed: {e}"]
+
+class _JSONLineFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.msg)
+
+def _configure_slow_query_log(log_dir):
+    if slow_query_logger.handlers:
+        return
+    os.makedirs(log_dir, exist_ok=True)
+    handler = logging.FileHandler(os.path.join(log_dir, 'slow-queries.log'))
+    handler.setFormatter(_JSONLineFormatter())
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.setLevel(logging.INFO)
+    slow_query_logger.propagate = False
+
+def init_sql_tracer(app, slow_query_ms=100, expose_headers=False, log_dir='logs'):
+    """Trace every get_db connection and report per request."""
+    db.set_connection_factory(TracedConnection)
+    _configure_slow_query_log(log_dir)
+    threshold = slow_query_ms / 1000.0
+
+    @app.after_request
+    def add_sql_trace_headers(response):
+        trace = g.get('sql_trace')
+        if expose_headers:
+            response.headers['X-DB-Queries'] = str(trace['count'] if trace else 0)
+            response.headers['X-DB-Time-Ms'] = f"{trace['seconds'] * 1000:.2f}" if trace else '0.00'
+        return response
+
+    @app.teardown_request
+    def log_slow_queries(exc):
+        trace = g.pop('sql_trace', None)
+        if not trace:
+            return
+        for record in trace['statements']:
+            if record.seconds < threshold:
+                continue
+            slow_query_logger.info({
+                'timestamp': datetime.utcnow().isoformat(),
+                'endpoint': request.endpoint,
+                'method': request.method,
+                'path': request.path,
+                'duration_ms': round(record.seconds * 1000, 2),
+                'rows': record.rows,
+                'sql': _WHITESPACE.sub(' ', record.sql).strip(),
+                'query_plan': explain(record.sql, record.params) if record.params is not None else [],
+            })
@@ -0,0 +1,61 @@
+"""
+Static file serving for the PWA.
+
+When STATIC_DIR points at the output of build_static.py:
+- fingerprinted assets listed in asset-manifest.json get a one-year immutable
+  Cache-Control;
+- everything else (index.html, sw.js, manifest.json) is revalidated by ETag;
+- a precompressed .br or .gz sibling is sent when the client accepts it.
+
+Bodies go out through wsgi.file_wrapper, so gunicorn sends them with
+sendfile(). Without a build, public/ is served the same way, without
+fingerprints or compressed variants.
+"""
+
+import json
+import mimetypes
+import os
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+
+ASSET_MANIFEST = 'asset-manifest.json'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Precompressed siblings written by build_static.py, preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+class StaticFiles:
+    """Serve files from static_dir with precompressed variants and cache headers."""
+
+    def __init__(self, static_dir):
+        self.static_dir = os.path.abspath(static_dir)
+        self.fingerprinted = set()
+        try:
+            with open(os.path.join(self.static_dir, ASSET_MANIFEST)) as f:
+                self.fingerprinted = set(json.load(f).values())
+        except FileNotFoundError:
+            pass
+
+    def send(self, path):
+        full_path = safe_join(self.static_dir, path)
+        if full_path is None or not os.path.isfile(full_path) or path == ASSET_MANIFEST:
+            abort(404)
+
+        served, encoding = full_path, None
+        for name, suffix in ENCODINGS:
+            if request.accept_encodings[name] and os.path.isfile(full_path + suffix):
+                served, encoding = full_path + suffix, name
+                break
+
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        # ETag comes from the served file, so each encoding has its own
+        response = send_file(served, mimetype=mimetype, download_name=os.path.basename(path),
+                             conditional=True, etag=True)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        if encoding or any(os.path.isfile(full_path + suffix) for _, suffix in ENCODINGS):
+            response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = IMMUTABLE if path in self.fingerprinted else REVALIDATE
+        return response
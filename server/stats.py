@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Precomputed usage statistics for the admin dashboard.
+
+A rollup job reads rows added since its last run (by primary key, so it never
+scans the big tables; ids are AUTOINCREMENT, so none is handed out twice)
+and folds them into per-day rows in daily_stats: sessions logged, exercises
+logged and a HyperLogLog sketch of the users who logged a session. Storage
+figures are snapshotted into table_stats once per day by one worker, without
+counting rows. The /api/admin/stats endpoint reads only these rollup tables.
+
+Run it from cron with `python stats.py`, or let the app run it every
+STATS_ROLLUP_INTERVAL seconds.
+"""
+
+import hashlib
+import math
+import sqlite3
+from datetime import datetime, timedelta
+from db import get_db, next_row_id
+
+# Rows folded into the rollups per transaction
+ROLLUP_BATCH_SIZE = 5000
+
+# Tables whose size is tracked in table_stats
+TRACKED_TABLES = ['users', 'templates', 'template_exercises', 'sessions', 'session_exercises']
+
+class HyperLogLog:
+    """HyperLogLog distinct counter with 2**precision one-byte registers."""
+
+    def __init__(self, precision=12, registers=None):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = bytearray(registers) if registers else bytearray(self.size)
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        x = int.from_bytes(digest, 'big')
+        index = x >> (64 - self.precision)
+        remaining = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.size)
+        estimate = alpha * self.size * self.size / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.size and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = self.size * math.log(self.size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data, precision=12):
+        return cls(precision, data) if data else cls(precision)
+
+def _day(session_date):
+    return str(session_date)[:10]
+
+def _get_watermark(conn, name):
+    row = conn.execute("SELECT value FROM rollup_state WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+def _set_watermark(conn, name, value):
+    conn.execute(
+        "INSERT INTO rollup_state (name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+        (name, value)
+    )
+
+def _rollup_sessions(conn):
+    """Fold one batch of new sessions into daily_stats. Returns rows processed."""
+    watermark = _get_watermark(conn, 'sessions')
+    rows = conn.execute(
+        "SELECT id, user_id, session_date FROM sessions WHERE id > ? ORDER BY id LIMIT ?",
+        (watermark, ROLLUP_BATCH_SIZE)
+    ).fetchall()
+    if not rows:
+        return 0
+
+    per_day = {}
+    for row in rows:
+        entry = per_day.setdefault(_day(row['session_date']), [0, set()])
+        entry[0] += 1
+        entry[1].add(row['user_id'])
+
+    for day, (count, users) in per_day.items():
+        existing = conn.execute(
+            "SELECT active_users_sketch FROM daily_stats WHERE day = ?", (day,)
+        ).fetchone()
+        sketch = HyperLogLog.from_bytes(existing[0] if existing else None)
+        for user_id in users:
+            sketch.add(user_id)
+        conn.execute("""
+            INSERT INTO daily_stats (day, sessions_logged, active_users_sketch) VALUES (?, ?, ?)
+            ON CONFLICT(day) DO UPDATE SET
+                sessions_logged = sessions_logged + excluded.sessions_logged,
+                active_users_sketch = excluded.active_users_sketch
+        """, (day, count, sketch.to_bytes()))
+
+    _set_watermark(conn, 'sessions', rows[-1]['id'])
+    return len(rows)
+
+def _rollup_session_exercises(conn):
+    """Fold one batch of new session exercises into daily_stats."""
+    watermark = _get_watermark(conn, 'session_exercises')
+    rows = conn.execute("""
+        SELECT se.id, s.session_date
+        FROM session_exercises se
+        JOIN sessions s ON se.session_id = s.id
+        WHERE se.id > ?
+        ORDER BY se.id
+        LIMIT ?
+    """, (watermark, ROLLUP_BATCH_SIZE)).fetchall()
+    if not rows:
+        return 0
+
+    per_day = {}
+    for row in rows:
+        day = _day(row['session_date'])
+        per_day[day] = per_day.get(day, 0) + 1
+
+    conn.executemany("""
+        INSERT INTO daily_stats (day, exercises_logged) VALUES (?, ?)
+        ON CONFLICT(day) DO UPDATE SET exercises_logged = exercises_logged + excluded.exercises_logged
+    """, per_day.items())
+
+    _set_watermark(conn, 'session_exercises', rows[-1]['id'])
+    return len(rows)
+
+def _has_snapshot(conn, day):
+    return conn.execute("SELECT 1 FROM table_stats WHERE day = ? LIMIT 1", (day,)).fetchone() is not None
+
+def _snapshot_tables(conn, day):
+    """
+    Record rows and on-disk bytes per table, once per day. Rows are the ids
+    handed out so far (deleted rows included), read from the id sequence
+    instead of counted. Inserting the day's rows claims the snapshot under
+    BEGIN IMMEDIATE, so only that worker then sizes the tables with dbstat,
+    one table per read transaction.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if _has_snapshot(conn, day):
+            conn.rollback()
+            return
+        conn.executemany(
+            "INSERT INTO table_stats (day, table_name, row_count) VALUES (?, ?, ?)",
+            [(day, table, next_row_id(conn, table) - 1) for table in TRACKED_TABLES]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    for table in TRACKED_TABLES:
+        try:
+            size = conn.execute(
+                "SELECT pgsize FROM dbstat WHERE name = ? AND aggregate = TRUE", (table,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # SQLite built without the dbstat virtual table
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE table_stats SET bytes = ? WHERE day = ? AND table_name = ?",
+                (size[0] if size else None, day, table)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+def run_rollup(snapshot=True):
+    """
+    Bring the rollup tables up to date. Each batch is its own short
+    BEGIN IMMEDIATE transaction, so concurrent runs from several workers
+    serialize instead of double counting.
+    """
+    processed = 0
+    with get_db() as conn:
+        for step in (_rollup_sessions, _rollup_session_exercises):
+            while True:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    count = step(conn)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                processed += count
+                if count < ROLLUP_BATCH_SIZE:
+                    break
+
+        if snapshot:
+            _snapshot_tables(conn, datetime.utcnow().date().isoformat())
+    return processed
+
+def get_dashboard(days=30):
+    """Build the admin dashboard from the rollup tables only."""
+    today = datetime.utcnow().date()
+    start = (today - timedelta(days=days - 1)).isoformat()
+    # MAU needs 30 days of sketches even when fewer days are shown
+    sketch_start = (today - timedelta(days=max(days, 30) - 1)).isoformat()
+
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT * FROM daily_stats WHERE day >= ? ORDER BY day", (sketch_start,)
+        ).fetchall()
+        table_rows = conn.execute(
+            "SELECT * FROM table_stats WHERE day >= ? ORDER BY day, table_name", (start,)
+        ).fetchall()
+
+    sketches = {row['day']: HyperLogLog.from_bytes(row['active_users_sketch']) for row in rows}
+
+    def distinct_users(end_day, window):
+        merged = HyperLogLog()
+        for offset in range(window):
+            sketch = sketches.get((end_day - timedelta(days=offset)).isoformat())
+            if sketch:
+                merged.merge(sketch)
+        return merged.count()
+
+    daily = []
+    for row in rows:
+        if row['day'] < start:
+            continue
+        daily.append({
+            'day': row['day'],
+            'active_users': sketches[row['day']].count(),
+            'sessions_logged': row['sessions_logged'],
+            'exercises_logged': row['exercises_logged'],
+        })
+
+    storage = {}
+    for row in table_rows:
+        storage.setdefault(row['day'], {})[row['table_name']] = {
+            'rows': row['row_count'],
+            'bytes': row['bytes'],
+        }
+
+    return {
+        'dau': distinct_users(today, 1),
+        'wau': distinct_users(today, 7),
+        'mau': distinct_users(today, 30),
+        'daily': daily,
+        'storage': [{'day': day, 'tables': tables} for day, tables in storage.items()],
+    }
+
+if __name__ == '__main__':
+    from db import init_db
+    init_db()
+    processed = run_rollup()
+    print(f"✅ Rolled up {processed} new rows")
@@ -0,0 +1,210 @@
+"""
+Synthetic dataset generator for benchmarking and capacity planning.
+
+Creates users with a realistic number of templates (one to five, drawn from
+common training splits) and multi-year session histories. Each exercise follows
+a progressive-overload curve: quick early gains that level off, a deload week
+every few weeks and a little day-to-day noise. Rows are written with
+executemany in large transactions using explicit row IDs, so the huge preset
+(about 10M session_exercises rows) takes minutes rather than hours.
+
+Apart from the password hash salt, output depends only on the profile, the
+seed and the end date, so a dataset can be reproduced exactly. Run it through
+seed.py:
+
+    python seed.py --profile medium --seed 42
+"""
+
+import math
+import random
+import time
+from datetime import date, datetime, timedelta
+from db import get_db, init_db, next_row_id
+from models import _hash_password
+
+# users, years of history and mean workouts per week for each preset.
+# Rough session_exercises counts: small ~100k, medium ~1.5M, huge ~11M.
+PROFILES = {
+    'small': {'users': 200, 'years': 1, 'sessions_per_week': 3.0},
+    'medium': {'users': 1500, 'years': 2, 'sessions_per_week': 3.0},
+    'huge': {'users': 8000, 'years': 3, 'sessions_per_week': 3.0},
+}
+
+# Rows buffered before a transaction is committed
+GENERATE_BATCH_ROWS = 200000
+
+# Every synthetic user shares this password (hashed once, not per user)
+SYNTHETIC_PASSWORD = 'Synthetic123!'
+
+# Template name -> (exercise, typical working weight in kg, reps)
+PROGRAMS = {
+    'Push Day': [('Bench Press', 60, 5), ('Overhead Press', 40, 8), ('Incline Dumbbell Press', 22, 10),
+                 ('Lateral Raise', 8, 12), ('Triceps Pushdown', 25, 12)],
+    'Pull Day': [('Deadlift', 100, 5), ('Barbell Row', 60, 8), ('Pull-ups', 0, 8),
+                 ('Face Pull', 20, 12), ('Biceps Curl', 12, 10)],
+    'Leg Day': [('Squat', 80, 5), ('Romanian Deadlift', 70, 8), ('Leg Press', 120, 10),
+                ('Leg Curl', 35, 12), ('Calf Raise', 60, 12)],
+    'Upper Body': [('Bench Press', 60, 8), ('Barbell Row', 60, 8), ('Overhead Press', 40, 10),
+                   ('Pull-ups', 0, 8)],
+    'Lower Body': [('Squat', 80, 8), ('Deadlift', 100, 5), ('Walking Lunge', 20, 12),
+                   ('Calf Raise', 60, 15)],
+    'Full Body': [('Squat', 80, 5), ('Bench Press', 60, 5), ('Barbell Row', 60, 8),
+                  ('Overhead Press', 40, 8), ('Plank', 0, 1), ('Dips', 0, 10)],
+}
+
+SPLITS = [
+    ['Full Body'],
+    ['Upper Body', 'Lower Body'],
+    ['Push Day', 'Pull Day', 'Leg Day'],
+    ['Push Day', 'Pull Day', 'Leg Day', 'Full Body'],
+    ['Push Day', 'Pull Day', 'Leg Day', 'Upper Body', 'Lower Body'],
+]
+SPLIT_WEIGHTS = [3, 3, 4, 1, 1]
+
+class SyntheticGenerator:
+    """Generate users and histories into the database in bulk transactions."""
+
+    def __init__(self, users, years, sessions_per_week=3.0, seed=0, end_date=None,
+                 prefix='synth', progress=None):
+        self.users = users
+        self.years = years
+        self.sessions_per_week = sessions_per_week
+        self.rng = random.Random(seed)
+        self.end_date = end_date or date.today()
+        self.prefix = prefix
+        self.progress = progress
+        self.stats = {'users': 0, 'templates': 0, 'template_exercises': 0,
+                      'sessions': 0, 'session_exercises': 0}
+        self._pending = {'users': [], 'templates': [], 'template_exercises': [],
+                         'sessions': [], 'session_exercises': []}
+        self._pending_rows = 0
+
+    def run(self):
+        init_db()
+        password_hash = _hash_password(SYNTHETIC_PASSWORD)
+        with get_db() as conn:
+            # Durability is irrelevant for generated data; bulk speed is not
+            conn.execute("PRAGMA synchronous = OFF")
+            conn.execute("PRAGMA cache_size = -200000")
+            if conn.execute("SELECT 1 FROM users WHERE username = ?", (self._username(1),)).fetchone():
+                raise ValueError(f"Synthetic users with prefix '{self.prefix}' already exist")
+
+            self.next_ids = {
+                table: next_row_id(conn, table)
+                for table in ('users', 'templates', 'template_exercises', 'sessions')
+            }
+            for n in range(1, self.users + 1):
+                self._generate_user(n, password_hash)
+                if self._pending_rows >= GENERATE_BATCH_ROWS:
+                    self._flush(conn)
+            self._flush(conn)
+        return self.stats
+
+    def _username(self, n):
+        return f'{self.prefix}{n:07d}'
+
+    def _next_id(self, table):
+        value = self.next_ids[table]
+        self.next_ids[table] = value + 1
+        return value
+
+    def _generate_user(self, n, password_hash):
+        rng = self.rng
+        pending = self._pending
+        user_id = self._next_id('users')
+        history_days = int(self.years * 365 * math.sqrt(rng.random())) + 14
+        start = self.end_date - timedelta(days=history_days)
+        pending['users'].append((user_id, self._username(n), f'{self._username(n)}@example.test',
+                                 password_hash, 'user', 0, f'{start.isoformat()}T00:00:00'))
+
+        # Per-user constants of the weight curve
+        strength = rng.uniform(0.6, 1.4)
+        gain = rng.uniform(0.2, 0.6)
+        deload_every = rng.randint(4, 8)
+
+        templates = []
+        for name in SPLITS[rng.choices(range(len(SPLITS)), SPLIT_WEIGHTS)[0]]:
+            template_id = self._next_id('templates')
+            pending['templates'].append((template_id, user_id, name))
+            exercises = []
+            for order_idx, (exercise, base_kg, reps) in enumerate(PROGRAMS[name]):
+                template_exercise_id = self._next_id('template_exercises')
+                pending['template_exercises'].append((template_exercise_id, template_id, exercise, order_idx))
+                exercises.append((template_exercise_id, base_kg * strength * rng.uniform(0.85, 1.15), reps,
+                                  rng.choice((3, 3, 4, 4, 5))))
+            templates.append((template_id, exercises))
+
+        # Workouts rotate through the split with irregular gaps between them
+        mean_gap = 7.0 / max(0.5, rng.gauss(self.sessions_per_week, 0.8))
+        day = 0.0
+        rotation = 0
+        sessions = pending['sessions']
+        session_exercises = pending['session_exercises']
+        while day < history_days:
+            weeks = day / 7
+            level = 1 + gain * math.log1p(weeks / 12)
+            if int(weeks) % deload_every == deload_every - 1:
+                level *= 0.9
+            template_id, exercises = templates[rotation % len(templates)]
+            rotation += 1
+
+            session_id = self._next_id('sessions')
+            session_date = datetime.combine(start + timedelta(days=int(day)), datetime.min.time()) \
+                + timedelta(hours=rng.randint(6, 21), minutes=rng.randint(0, 59))
+            sessions.append((session_id, user_id, template_id, session_date.isoformat()))
+            for template_exercise_id, base_kg, reps, sets in exercises:
+                weight = round(base_kg * level * (1 + (rng.random() - 0.5) * 0.05) / 2.5) * 2.5
+                session_exercises.append((session_id, template_exercise_id, weight,
+                                          reps + rng.randint(-1, 1) if reps > 1 else reps, sets))
+
+            day += max(1.0, rng.expovariate(1 / mean_gap))
+
+        self.stats['users'] += 1
+        self._pending_rows = sum(len(rows) for rows in pending.values())
+
+    def _flush(self, conn):
+        pending = self._pending
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO users (id, username, email, password_hash, role, must_change_password, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", pending['users'])
+            conn.executemany("INSERT INTO templates (id, user_id, name) VALUES (?, ?, ?)", pending['templates'])
+            conn.executemany(
+                "INSERT INTO template_exercises (id, template_id, name, order_idx) VALUES (?, ?, ?, ?)",
+                pending['template_exercises'])
+            conn.executemany(
+                "INSERT INTO sessions (id, user_id, template_id, session_date) VALUES (?, ?, ?, ?)",
+                pending['sessions'])
+            conn.executemany(
+                "INSERT INTO session_exercises (session_id, template_exercise_id, weight_kg, reps, sets) "
+                "VALUES (?, ?, ?, ?, ?)", pending['session_exercises'])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        for table in ('templates', 'template_exercises', 'sessions', 'session_exercises'):
+            self.stats[table] += len(pending[table])
+            pending[table].clear()
+        pending['users'].clear()
+        self._pending_rows = 0
+        if self.progress:
+            self.progress(self.stats)
+
+def generate(profile='small', users=None, years=None, seed=0, end_date=None, prefix='synth', progress=None):
+    """Generate a dataset from a preset, optionally overriding its size."""
+    settings = PROFILES[profile]
+    generator = SyntheticGenerator(
+        users=users or settings['users'],
+        years=years or settings['years'],
+        sessions_per_week=settings['sessions_per_week'],
+        seed=seed,
+        end_date=end_date,
+        prefix=prefix,
+        progress=progress
+    )
+    started = time.time()
+    stats = generator.run()
+    stats['seconds'] = round(time.time() - started, 1)
+    return stats
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Lightweight request tracing with an OpenTelemetry-compatible span model.
+
+Each request gets a root span (continuing an incoming W3C traceparent when
+present) and child spans for validation, JWT verification, model calls and
+JSON serialization. Finished traces are handed to a background thread that
+writes them as JSON lines (TRACING_EXPORTER=jsonl) or posts them in OTLP/HTTP
+JSON format (TRACING_EXPORTER=otlp). No collector is required; for local
+testing, `python tracing.py --receive 4318` runs a stand-in OTLP receiver
+that prints every span it gets.
+
+When tracing is disabled span() returns a shared no-op context manager.
+"""
+
+import inspect
+import json
+import logging
+import os
+import queue
+import re
+import secrets
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from functools import wraps
+
+SERVICE_NAME = 'workout-tracker'
+
+# Finished traces waiting for export; traces are dropped when it is full
+EXPORT_QUEUE_SIZE = 1000
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-[0-9a-f]{2}$')
+
+logger = logging.getLogger('tracing')
+
+_current_span = ContextVar('current_span', default=None)
+_exporter = None
+
+class Span:
+    """A timed operation; field names follow the OpenTelemetry data model."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_span_id', 'name', 'kind',
+                 'start_time_unix_nano', 'end_time_unix_nano', 'attributes',
+                 'status', 'root', 'finished', '_token')
+
+    def __init__(self, name, parent=None, trace_id=None, parent_span_id=None, kind='internal', attributes=None):
+        self.trace_id = parent.trace_id if parent else (trace_id or secrets.token_hex(16))
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_time_unix_nano = time.time_ns()
+        self.end_time_unix_nano = None
+        self.attributes = attributes or {}
+        self.status = 'unset'
+        # The first span in this process owns the trace's list of finished spans
+        self.root = parent.root if parent else self
+        self.finished = [] if parent is None else None
+        self._token = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def start(self):
+        """Make this the current span (for spans not used as a context manager)."""
+        self._token = _current_span.set(self)
+        return self
+
+    def end(self, error=None):
+        if error is not None:
+            self.status = 'error'
+            self.attributes['exception.type'] = type(error).__name__
+        self.end_time_unix_nano = time.time_ns()
+        if self._token is not None:
+            _current_span.reset(self._token)
+            self._token = None
+        self.root.finished.append(self)
+        if self.root is self and _exporter is not None:
+            _exporter.submit(self.finished)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end(exc)
+        return False
+
+    def to_dict(self):
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_span_id': self.parent_span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_time_unix_nano': self.start_time_unix_nano,
+            'end_time_unix_nano': self.end_time_unix_nano,
+            'duration_ms': round((self.end_time_unix_nano - self.start_time_unix_nano) / 1e6, 3),
+            'attributes': self.attributes,
+            'status': self.status,
+        }
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+def span(name, **attributes):
+    """Context manager timing a child of the current span (no-op when disabled)."""
+    if _exporter is None:
+        return _NOOP_SPAN
+    return Span(name, parent=_current_span.get(), attributes=attributes)
+
+def traced(name):
+    """Decorator wrapping a function call in a span."""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return f(*args, **kwargs)
+            with Span(name, parent=_current_span.get()):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def trace_methods(cls):
+    """Class decorator tracing every public static method (generators excluded)."""
+    for name, attr in list(vars(cls).items()):
+        if isinstance(attr, staticmethod) and not name.startswith('_') \
+                and not inspect.isgeneratorfunction(attr.__func__):
+            setattr(cls, name, staticmethod(traced(f'{cls.__name__}.{name}')(attr.__func__)))
+    return cls
+
+def current_trace_id():
+    current = _current_span.get()
+    return current.trace_id if current else None
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+_OTLP_KINDS = {'internal': 1, 'server': 2, 'client': 3}
+_OTLP_STATUS = {'unset': 0, 'ok': 1, 'error': 2}
+
+def to_otlp(spans):
+    """Encode spans as an OTLP/HTTP JSON ExportTraceServiceRequest."""
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': SERVICE_NAME}}]},
+            'scopeSpans': [{
+                'scope': {'name': SERVICE_NAME},
+                'spans': [{
+                    'traceId': s.trace_id,
+                    'spanId': s.span_id,
+                    'parentSpanId': s.parent_span_id or '',
+                    'name': s.name,
+                    'kind': _OTLP_KINDS.get(s.kind, 1),
+                    'startTimeUnixNano': str(s.start_time_unix_nano),
+                    'endTimeUnixNano': str(s.end_time_unix_nano),
+                    'attributes': [{'key': k, 'value': _otlp_value(v)} for k, v in s.attributes.items()],
+                    'status': {'code': _OTLP_STATUS[s.status]},
+                } for s in spans],
+            }],
+        }],
+    }
+
+class _BackgroundExporter:
+    """Export finished traces from a daemon thread, off the request path."""
+
+    def __init__(self, write):
+        self.write = write
+        self.queue = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self.thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self.thread.start()
+
+    def submit(self, spans):
+        try:
+            self.queue.put_nowait(spans)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        while True:
+            spans = self.queue.get()
+            try:
+                self.write(spans)
+            except Exception:
+                logger.exception("Trace export failed")
+
+def _jsonl_writer(path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(spans):
+        with open(path, 'a') as f:
+            f.write(''.join(json.dumps(s.to_dict()) + '\n' for s in spans))
+    return write
+
+def _otlp_writer(endpoint, timeout=5):
+    def write(spans):
+        body = json.dumps(to_otlp(spans)).encode('utf-8')
+        req = urllib.request.Request(endpoint, data=body, headers={'Content-Type': 'application/json'})
+        urllib.request.urlopen(req, timeout=timeout).close()
+    return write
+
+def configure_tracing(exporter, jsonl_path=None, otlp_endpoint=None):
+    """Enable tracing with the 'jsonl' or 'otlp' exporter ('' disables it)."""
+    global _exporter
+    if exporter == 'jsonl':
+        _exporter = _BackgroundExporter(_jsonl_writer(jsonl_path))
+    elif exporter == 'otlp':
+        _exporter = _BackgroundExporter(_otlp_writer(otlp_endpoint))
+    else:
+        _exporter = None
+    return _exporter is not None
+
+def reset_after_fork():
+    """Restart the exporter thread in a forked worker (threads do not survive fork)."""
+    global _exporter
+    if _exporter is not None:
+        _exporter = _BackgroundExporter(_exporter.write)
+
+def init_tracing(app, exporter, jsonl_path=None, otlp_endpoint=None):
+    """Open a server span per request and export it when the request ends."""
+    if not configure_tracing(exporter, jsonl_path, otlp_endpoint):
+        return
+
+    from flask import g, request
+
+    # jsonify() goes through app.json.response(); time serialization there
+    serialize = app.json.response
+
+    def traced_response(*args, **kwargs):
+        with span('jsonify'):
+            return serialize(*args, **kwargs)
+    app.json.response = traced_response
+
+    @app.before_request
+    def start_request_span():
+        trace_id = parent_span_id = None
+        match = _TRACEPARENT.match(request.headers.get('traceparent', ''))
+        if match:
+            trace_id, parent_span_id = match.groups()
+        g.request_span = Span(
+            f'{request.method} {request.url_rule.rule if request.url_rule else request.path}',
+            trace_id=trace_id,
+            parent_span_id=parent_span_id,
+            kind='server',
+            attributes={'http.method': request.method, 'http.target': request.path},
+        ).start()
+
+    @app.after_request
+    def add_trace_header(response):
+        request_span = g.get('request_span')
+        if request_span:
+            request_span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                request_span.status = 'error'
+            response.headers['traceparent'] = f'00-{request_span.trace_id}-{request_span.span_id}-01'
+        return response
+
+    @app.teardown_request
+    def end_request_span(exc):
+        request_span = g.pop('request_span', None)
+        if request_span:
+            request_span.end(exc)
+
+def _receive(port):
+    """Stand-in OTLP/HTTP receiver printing one line per received span."""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            for resource in payload.get('resourceSpans', []):
+                for scope in resource.get('scopeSpans', []):
+                    for s in scope.get('spans', []):
+                        duration_ms = (int(s['endTimeUnixNano']) - int(s['startTimeUnixNano'])) / 1e6
+                        print(f"{s['traceId']} {s['spanId']} <- {s['parentSpanId'] or '-':16} "
+                              f"{duration_ms:9.3f}ms {s['name']}", flush=True)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(b'{}')
+
+        def log_message(self, format, *args):
+            pass
+
+    print(f"📡 OTLP stand-in listening on http://localhost:{port}/v1/traces")
+    HTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Local OTLP/HTTP trace receiver')
+    parser.add_argument('--receive', type=int, default=4318, metavar='PORT')
+    _receive(parser.parse_args().receive)
@@ -5,10 +5,29 @@ Input validation module for API endpoints.
 import re
 from functools import wraps
 from flask import request, jsonify
+from werkzeug.exceptions import HTTPException
+from tracing import span
 
 class ValidationError(Exception):
-    """Custom exception for validation errors."""
-    pass
+    """Custom exception for validation errors. errors lists every failure found."""
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or [message]
+
+# Potential XSS/injection patterns, combined into one precompiled regex
+DANGEROUS_PATTERNS = [
+    r'<script[^>]*>.*?</script>',
+    r'javascript:',
+    r'on\w+\s*=',
+    r'<iframe[^>]*>.*?</iframe>',
+    r'<object[^>]*>.*?</object>',
+    r'<embed[^>]*>.*?</embed>',
+]
+_DANGEROUS_CONTENT = re.compile('|'.join(f'(?:{p})' for p in DANGEROUS_PATTERNS), re.IGNORECASE)
+
+_USERNAME_PATTERN = re.compile(r'^[a-zA-Z0-9_-]{3,50}$')
+RESERVED_USERNAMES = frozenset(['admin', 'root', 'system', 'test', 'api', 'www', 'mail', 'support'])
+RESERVED_TEMPLATE_NAMES = frozenset(['', 'undefined', 'null', 'default'])
 
 def validate_string(value, name, min_length=1, max_length=255, pattern=None, required=True):
     """Validate string input."""
@@ -36,60 +55,72 @@ def validate_string(value, name, min_length=1, max_length=255, pattern=None, req
         raise ValidationError(f"{name} format is invalid")
     
     # Check for potential XSS/injection patterns
-    dangerous_patterns = [
-        r'<script[^>]*>.*?</script>',
-        r'javascript:',
-        r'on\w+\s*=',
-        r'<iframe[^>]*>.*?</iframe>',
-        r'<object[^>]*>.*?</object>',
-        r'<embed[^>]*>.*?</embed>',
-    ]
-    
-    for dangerous_pattern in dangerous_patterns:
-        if re.search(dangerous_pattern, value, re.IGNORECASE):
-            raise ValidationError(f"{name} contains potentially dangerous content")
+    if _DANGEROUS_CONTENT.search(value):
+        raise ValidationError(f"{name} contains potentially dangerous content")
     
     return True
 
-def validate_integer(value, name, min_value=None, max_value=None, required=True):
-    """Validate integer input."""
+def _number_error(value, convert, kind, min_value=None, max_value=None):
+    """Return the error text for a numeric value, or None if it is valid."""
     if value is None:
-        if required:
-            raise ValidationError(f"{name} is required")
-        return True
+        return "is required"
     
-    try:
-        value = int(value)
-    except (ValueError, TypeError):
-        raise ValidationError(f"{name} must be a valid integer")
+    if type(value) is not convert:
+        try:
+            value = convert(value)
+        except (ValueError, TypeError):
+            return f"must be a valid {kind}"
     
     if min_value is not None and value < min_value:
-        raise ValidationError(f"{name} must be at least {min_value}")
+        return f"must be at least {min_value}"
     
     if max_value is not None and value > max_value:
-        raise ValidationError(f"{name} must be no greater than {max_value}")
+        return f"must be no greater than {max_value}"
+    
+    return None
+
+def validate_integer(value, name, min_value=None, max_value=None, required=True):
+    """Validate integer input."""
+    if value is None and not required:
+        return True
+    
+    error = _number_error(value, int, 'integer', min_value, max_value)
+    if error:
+        raise ValidationError(f"{name} {error}")
     
     return True
 
 def validate_float(value, name, min_value=None, max_value=None, required=True):
     """Validate float input."""
-    if value is None:
-        if required:
-            raise ValidationError(f"{name} is required")
+    if value is None and not required:
         return True
     
-    try:
-        value = float(value)
-    except (ValueError, TypeError):
-        raise ValidationError(f"{name} must be a valid number")
+    error = _number_error(value, float, 'number', min_value, max_value)
+    if error:
+        raise ValidationError(f"{name} {error}")
     
-    if min_value is not None and value < min_value:
-        raise ValidationError(f"{name} must be at least {min_value}")
+    return True
+
+class NumberInRange:
+    """Schema validator for a number within bounds, which fast paths can read."""
     
-    if max_value is not None and value > max_value:
-        raise ValidationError(f"{name} must be no greater than {max_value}")
+    def __init__(self, name, convert, min_value=None, max_value=None):
+        self.name = name
+        self.convert = convert
+        self.kind = 'integer' if convert is int else 'number'
+        self.min_value = min_value
+        self.max_value = max_value
     
-    return True
+    def error(self, value):
+        """The full error message for value, or None if it is valid."""
+        error = _number_error(value, self.convert, self.kind, self.min_value, self.max_value)
+        return f"{self.name} {error}" if error else None
+    
+    def __call__(self, value):
+        error = self.error(value)
+        if error:
+            raise ValidationError(error)
+        return True
 
 def validate_username(username):
     """Validate username format."""
@@ -97,12 +128,11 @@ def validate_username(username):
         raise ValidationError("Username is required")
     
     # Username validation: 3-50 chars, alphanumeric, underscore, hyphen
-    if not re.match(r'^[a-zA-Z0-9_-]{3,50}$', username):
+    if not _USERNAME_PATTERN.match(username):
         raise ValidationError("Username must be 3-50 characters long and contain only letters, numbers, underscore, or hyphen")
     
     # Check for reserved usernames
-    reserved_usernames = ['admin', 'root', 'system', 'test', 'api', 'www', 'mail', 'support']
-    if username.lower() in reserved_usernames:
+    if username.lower() in RESERVED_USERNAMES:
         raise ValidationError("Username is reserved and cannot be used")
     
     return True
@@ -112,7 +142,7 @@ def validate_template_name(name):
     validate_string(name, "Template name", min_length=1, max_length=100)
     
     # Additional check for template names
-    if name.strip() in ['', 'undefined', 'null', 'default']:
+    if name.strip() in RESERVED_TEMPLATE_NAMES:
         raise ValidationError("Template name cannot be a reserved word")
     
     return True
@@ -122,85 +152,170 @@ def validate_exercise_name(name):
     validate_string(name, "Exercise name", min_length=1, max_length=100)
     return True
 
+# One logged exercise: the only definition of these bounds and messages
+WORKOUT_DATA_SCHEMA = {
+    'weight_kg': [NumberInRange("Weight", float, 0, 1000)],
+    'reps': [NumberInRange("Reps", int, 1, 999)],
+    'sets': [NumberInRange("Sets", int, 1, 50)],
+}
+
 def validate_workout_data(weight_kg, reps, sets):
     """Validate workout data inputs."""
-    validate_float(weight_kg, "Weight", min_value=0, max_value=1000)
-    validate_integer(reps, "Reps", min_value=1, max_value=999)
-    validate_integer(sets, "Sets", min_value=1, max_value=50)
-    return True
+    return _validate_workout_data({'weight_kg': weight_kg, 'reps': reps, 'sets': sets})
 
 def validate_json_size(max_size_kb=100):
-    """Validate JSON request size."""
+    """
+    Cap the request body at max_size_kb. A declared Content-Length is checked
+    up front; the cap also stops reads of bodies sent without one (413).
+    """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             content_length = request.content_length
             if content_length and content_length > max_size_kb * 1024:
                 return jsonify({'error': f'Request too large (max {max_size_kb}KB)'}), 413
+            # Read by request.stream (body_limits.LimitedRequest) on first access
+            request.body_limit = max_size_kb * 1024
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
+def compile_schema(validation_schema):
+    """
+    Flatten a {field: [validators]} schema into a single validate(data)
+    function. Every field is checked (stopping at the first failure per
+    field) and all failures are raised together in one ValidationError.
+    """
+    checks = tuple(
+        (field, tuple(validators)) for field, validators in validation_schema.items()
+    )
+    
+    def validate(data):
+        errors = []
+        for field, validators in checks:
+            value = data.get(field)
+            try:
+                for validator in validators:
+                    validator(value)
+            except ValidationError as e:
+                errors.extend(e.errors)
+        if errors:
+            raise ValidationError(errors[0], errors)
+        return True
+    
+    return validate
+
+_validate_workout_data = compile_schema(WORKOUT_DATA_SCHEMA)
+
 def validate_request(validation_schema):
     """Decorator to validate request data against a schema."""
+    validate = compile_schema(validation_schema)
+    
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
             try:
                 data = request.get_json()
-                if data is None:
+                if not isinstance(data, dict):
                     return jsonify({'error': 'Invalid JSON data'}), 400
                 
-                # Apply validation schema
-                for field, validators in validation_schema.items():
-                    value = data.get(field)
-                    for validator in validators:
-                        validator(value)
+                with span('validate_request'):
+                    validate(data)
                 
                 return f(*args, **kwargs)
             
             except ValidationError as e:
-                return jsonify({'error': str(e)}), 400
+                return jsonify({'error': str(e), 'errors': e.errors}), 400
+            except HTTPException:
+                # e.g. 413 for a body over the route's cap
+                raise
             except Exception as e:
                 return jsonify({'error': 'Validation failed'}), 400
         
         return decorated_function
     return decorator
 
-# Common validation schemas
-TEMPLATE_CREATION_SCHEMA = {
-    'name': [validate_template_name],
-    'exercises': [lambda x: True if x is None else all(validate_exercise_name(ex) for ex in x)]
-}
-
-TEMPLATE_UPDATE_SCHEMA = {
-    'name': [validate_template_name]
-}
-
-SESSION_CREATION_SCHEMA = {
-    'template_id': [lambda x: validate_integer(x, "Template ID", min_value=1)],
-    'exercises': [lambda x: True if x is None else validate_exercise_list(x)]
-}
+EXERCISE_REQUIRED_FIELDS = ('template_exercise_id', 'weight_kg', 'reps', 'sets')
+_REAL_TYPES = (int, float)
+_WEIGHT, _REPS, _SETS = (WORKOUT_DATA_SCHEMA[field][0] for field in ('weight_kg', 'reps', 'sets'))
+# Fast-path bounds, read from the schema so the two cannot drift
+_WEIGHT_MIN, _WEIGHT_MAX = _WEIGHT.min_value, _WEIGHT.max_value
+_REPS_MIN, _REPS_MAX = _REPS.min_value, _REPS.max_value
+_SETS_MIN, _SETS_MAX = _SETS.min_value, _SETS.max_value
 
 def validate_exercise_list(exercises):
-    """Validate list of exercises for session creation."""
+    """Validate list of exercises for session creation, reporting every failure."""
     if not isinstance(exercises, list):
         raise ValidationError("Exercises must be a list")
     
     if len(exercises) > 50:  # Reasonable limit
         raise ValidationError("Too many exercises (max 50 per session)")
     
-    for i, exercise in enumerate(exercises):
+    errors = []
+    for i, exercise in enumerate(exercises, start=1):
         if not isinstance(exercise, dict):
-            raise ValidationError(f"Exercise {i+1} must be an object")
+            errors.append(f"Exercise {i} must be an object")
+            continue
+        
+        try:
+            template_exercise_id = exercise['template_exercise_id']
+            weight_kg = exercise['weight_kg']
+            reps = exercise['reps']
+            sets = exercise['sets']
+        except KeyError:
+            missing = next(field for field in EXERCISE_REQUIRED_FIELDS if field not in exercise)
+            errors.append(f"Exercise {i} missing required field: {missing}")
+            continue
         
-        required_fields = ['template_exercise_id', 'weight_kg', 'reps', 'sets']
-        for field in required_fields:
-            if field not in exercise:
-                raise ValidationError(f"Exercise {i+1} missing required field: {field}")
+        # Fast path: already-typed, in-range values need no conversion or messages
+        if (type(template_exercise_id) is int and template_exercise_id >= 1
+                and type(weight_kg) in _REAL_TYPES and _WEIGHT_MIN <= weight_kg <= _WEIGHT_MAX
+                and type(reps) is int and _REPS_MIN <= reps <= _REPS_MAX
+                and type(sets) is int and _SETS_MIN <= sets <= _SETS_MAX):
+            continue
         
-        # Validate each field
-        validate_integer(exercise['template_exercise_id'], f"Exercise {i+1} template_exercise_id", min_value=1)
-        validate_workout_data(exercise['weight_kg'], exercise['reps'], exercise['sets'])
+        error = _number_error(template_exercise_id, int, 'integer', 1)
+        if error:
+            errors.append(f"Exercise {i} template_exercise_id {error}")
+        for validator, value in ((_WEIGHT, weight_kg), (_REPS, reps), (_SETS, sets)):
+            error = validator.error(value)
+            if error:
+                errors.append(error)
     
+    if errors:
+        raise ValidationError(errors[0], errors)
     return True
+
+def _validate_template_id(value):
+    return validate_integer(value, "Template ID", min_value=1)
+
+def _validate_optional_exercise_names(names):
+    if names is None:
+        return True
+    errors = []
+    for name in names:
+        try:
+            validate_exercise_name(name)
+        except ValidationError as e:
+            errors.extend(e.errors)
+    if errors:
+        raise ValidationError(errors[0], errors)
+    return True
+
+def _validate_optional_exercise_list(exercises):
+    return True if exercises is None else validate_exercise_list(exercises)
+
+# Common validation schemas
+TEMPLATE_CREATION_SCHEMA = {
+    'name': [validate_template_name],
+    'exercises': [_validate_optional_exercise_names]
+}
+
+TEMPLATE_UPDATE_SCHEMA = {
+    'name': [validate_template_name]
+}
+
+SESSION_CREATION_SCHEMA = {
+    'template_id': [_validate_template_id],
+    'exercises': [_validate_optional_exercise_list]
+}
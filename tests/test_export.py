@@ -0,0 +1,92 @@
+"""
+Memory ceiling of streaming history exports.
+
+Builds a history of EXPORT_TEST_ROWS session exercises (two million by
+default) for one user and streams it through the same path the export
+endpoint uses, asserting that traced allocations stay under a fixed ceiling
+that does not depend on the history length.
+
+Run from the repository root:
+    python -m pytest tests/test_export.py
+    EXPORT_TEST_ROWS=200000 python -m unittest tests.test_export
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+
+import db
+from export import generate_export, EXPORT_BATCH_SIZE
+from models import Session
+
+ROWS = int(os.environ.get('EXPORT_TEST_ROWS', 2_000_000))
+EXERCISES_PER_SESSION = 5
+# Traced allocations while streaming, well above a few batches of rows
+MEMORY_CEILING = 16 * 1024 * 1024
+
+class ExportMemoryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.db_path = db.DB_PATH
+        db.DB_PATH = os.path.join(cls.tmp, 'workout.db')
+        db.init_db()
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.executescript(f"""
+            INSERT INTO users(id, username, password_hash) VALUES (1, 'lifter', 'x');
+            INSERT INTO templates(id, user_id, name) VALUES (1, 1, 'Full body');
+            WITH RECURSIVE k(j) AS (SELECT 1 UNION ALL SELECT j + 1 FROM k WHERE j < {EXERCISES_PER_SESSION})
+            INSERT INTO template_exercises(id, template_id, name, order_idx) SELECT j, 1, 'Exercise ' || j, j FROM k;
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROWS // EXERCISES_PER_SESSION})
+            INSERT INTO sessions(id, user_id, template_id, session_date)
+            SELECT i, 1, 1, datetime('2015-01-01', '+' || i || ' minutes') FROM n;
+            INSERT INTO session_exercises(session_id, template_exercise_id, weight_kg, reps, sets)
+            SELECT s.id, te.id, 60 + te.id * 2.5, 8, 3 FROM sessions s, template_exercises te;
+        """)
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.DB_PATH = cls.db_path
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def stream(self, fmt, compress):
+        """Consume an export like the response would; return (bytes, rows seen, peak traced bytes)."""
+        rows = 0
+        def counted(batches):
+            nonlocal rows
+            for batch in batches:
+                rows += len(batch)
+                yield batch
+
+        tracemalloc.start()
+        try:
+            size = 0
+            for chunk in generate_export(counted(Session.iter_history(1, EXPORT_BATCH_SIZE)), fmt, compress):
+                size += len(chunk)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return size, rows, peak
+
+    def test_ndjson_memory_is_bounded(self):
+        size, rows, peak = self.stream('ndjson', compress=False)
+        self.assertEqual(rows, ROWS)
+        self.assertGreater(size, MEMORY_CEILING)
+        self.assertLess(peak, MEMORY_CEILING)
+
+    def test_compressed_csv_memory_is_bounded(self):
+        size, rows, peak = self.stream('csv', compress=True)
+        self.assertEqual(rows, ROWS)
+        self.assertLess(peak, MEMORY_CEILING)
+
+if __name__ == '__main__':
+    unittest.main()
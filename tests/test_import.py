@@ -0,0 +1,124 @@
+"""
+Data integrity of bulk history imports.
+
+Covers session id allocation (never reusing the id of a deleted session the
+stats rollup has already counted), recovery after a chunk rolls back, and
+re-importing the same file.
+
+Run from the repository root:
+    python -m pytest tests/test_import.py
+"""
+
+import io
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+
+import db
+from importer import HistoryImporter, import_history, parse_rows
+from stats import run_rollup
+
+CSV = (
+    "session_date,template_name,exercise_name,weight_kg,reps,sets\n"
+    "2024-01-01T08:00:00,Push,Bench Press,60,5,3\n"
+    "2024-01-01T08:00:00,Push,Overhead Press,40,8,3\n"
+    "2024-01-02T08:00:00,Pull,Barbell Row,60,8,3\n"
+    "2024-01-03T08:00:00,Legs,Squat,80,5,3\n"
+)
+
+def ndjson(csv_text):
+    rows = [row for _, row in parse_rows(io.StringIO(csv_text), 'csv')]
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+class ImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp, 'workout.db')
+        db.init_db()
+        self.conn = sqlite3.connect(db.DB_PATH)
+        self.conn.execute("INSERT INTO users(id, username, password_hash) VALUES (1, 'lifter', 'x')")
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        db.DB_PATH = self.db_path
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def test_ids_of_deleted_sessions_are_not_reused(self):
+        self.conn.executescript("""
+            INSERT INTO templates(id, user_id, name) VALUES (1, 1, 'Push');
+            INSERT INTO template_exercises(id, template_id, name, order_idx) VALUES (1, 1, 'Bench Press', 0);
+            INSERT INTO sessions(user_id, template_id, session_date) VALUES (1, 1, '2023-12-30T08:00:00');
+            INSERT INTO sessions(user_id, template_id, session_date) VALUES (1, 1, '2023-12-31T08:00:00');
+        """)
+        run_rollup(snapshot=False)
+        self.conn.execute("DELETE FROM sessions WHERE id = 2")
+        self.conn.commit()
+
+        import_history(1, io.StringIO(CSV.splitlines(True)[0] + CSV.splitlines(True)[1]))
+        self.assertEqual(self.conn.execute("SELECT MAX(id) FROM sessions").fetchone()[0], 3)
+        self.assertEqual(
+            self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sessions'").fetchone()[0], 3
+        )
+
+        run_rollup(snapshot=False)
+        self.assertEqual(
+            self.conn.execute(
+                "SELECT day, sessions_logged, exercises_logged FROM daily_stats WHERE day = '2024-01-01'"
+            ).fetchone(),
+            ('2024-01-01', 1, 1)
+        )
+
+    def test_rolled_back_chunk_leaves_no_stale_ids(self):
+        # The third session (a new template) fails after the first chunk committed
+        self.conn.execute("""
+            CREATE TRIGGER fail_import BEFORE INSERT ON sessions
+            WHEN NEW.session_date = '2024-01-03T08:00:00'
+            BEGIN SELECT RAISE(ABORT, 'disk full'); END
+        """)
+        self.conn.commit()
+        importer = HistoryImporter(1, chunk_size=2)
+        with self.assertRaises(sqlite3.DatabaseError):
+            importer.run(parse_rows(io.StringIO(CSV), 'csv'))
+        self.assertEqual(self.count('sessions'), 2)
+        self.assertEqual(self.count('templates'), 2)
+        self.assertEqual(importer.stats['templates_created'], 2)
+
+        self.conn.execute("DROP TRIGGER fail_import")
+        self.conn.commit()
+        stats = importer.run(parse_rows(io.StringIO(CSV), 'csv'))
+        self.assertEqual(stats['duplicate_sessions'], 2)
+        self.assertEqual(self.count('sessions'), 3)
+        self.assertEqual(self.count('session_exercises'), 4)
+        self.assertEqual(self.conn.execute("""
+            SELECT COUNT(*) FROM session_exercises se
+            LEFT JOIN template_exercises te ON se.template_exercise_id = te.id
+            WHERE te.id IS NULL
+        """).fetchone()[0], 0)
+
+    def test_reimport_skips_existing_sessions(self):
+        for fmt, body in (('csv', CSV), ('ndjson', ndjson(CSV))):
+            with self.subTest(fmt=fmt):
+                stats = import_history(1, io.StringIO(body), fmt)
+                self.assertEqual(self.count('sessions'), 3)
+                self.assertEqual(self.count('session_exercises'), 4)
+                self.assertEqual(stats['sessions'] + stats['duplicate_sessions'], 3)
+                self.assertEqual(stats['rejected_rows'], 0)
+
+        stats = import_history(1, io.StringIO(CSV + "2024-01-04T08:00:00,Push,Bench Press,62.5,5,3\n"))
+        self.assertEqual((stats['sessions'], stats['duplicate_sessions']), (1, 3))
+        self.assertEqual(self.count('sessions'), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Background account deletion.
+
+Covers a purge that resumes after the worker running it died (a stale
+running job), a fresh running job being left alone, and failed purges being
+retried with backoff until PURGE_MAX_ATTEMPTS.
+
+Run from the repository root:
+    python -m pytest tests/test_purge.py
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+
+import db
+from models import User
+from purge import run_purge_jobs, get_purge_jobs, PURGE_MAX_ATTEMPTS
+
+SESSIONS = 300
+
+class PurgeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db_path = db.DB_PATH
+        db.DB_PATH = os.path.join(self.tmp, 'workout.db')
+        db.init_db()
+        self.conn = sqlite3.connect(db.DB_PATH)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        for user_id in (1, 2):
+            self.conn.executescript(f"""
+                INSERT INTO users(id, username, password_hash) VALUES ({user_id}, 'user{user_id}', 'x');
+                INSERT INTO templates(id, user_id, name) VALUES ({user_id}, {user_id}, 'Full body');
+                INSERT INTO template_exercises(id, template_id, name, order_idx) VALUES ({user_id}, {user_id}, 'Squat', 0);
+                WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {SESSIONS})
+                INSERT INTO sessions(user_id, template_id, session_date)
+                SELECT {user_id}, {user_id}, datetime('2024-01-01', '+' || i || ' days') FROM n;
+                INSERT INTO session_exercises(session_id, template_exercise_id, weight_kg, reps, sets)
+                SELECT id, {user_id}, 100, 5, 5 FROM sessions WHERE user_id = {user_id};
+            """)
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        db.DB_PATH = self.db_path
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def rows_of(self, user_id):
+        return self.conn.execute("""
+            SELECT (SELECT COUNT(*) FROM users WHERE id = :u)
+                 + (SELECT COUNT(*) FROM templates WHERE user_id = :u)
+                 + (SELECT COUNT(*) FROM sessions WHERE user_id = :u)
+                 + (SELECT COUNT(*) FROM session_exercises se JOIN sessions s ON se.session_id = s.id
+                    WHERE s.user_id = :u)
+        """, {'u': user_id}).fetchone()[0]
+
+    def job(self, job_id):
+        return next(job for job in get_purge_jobs() if job['id'] == job_id)
+
+    def test_delete_disables_and_purges(self):
+        job_id = User.delete_user(1)
+        self.assertFalse(User.is_active(1))
+        self.assertEqual(User.delete_user(1), job_id)
+
+        self.assertEqual(run_purge_jobs(chunk_size=50, pause=0), 1)
+        self.assertEqual(self.rows_of(1), 0)
+        self.assertEqual(self.rows_of(2), 1 + 1 + SESSIONS * 2)
+        self.assertEqual(self.job(job_id)['status'], 'done')
+
+    def test_stale_running_job_resumes(self):
+        job_id = User.delete_user(1)
+        # A worker died halfway through: part of the data is gone, no progress since
+        self.conn.execute("""
+            DELETE FROM session_exercises WHERE session_id IN (SELECT id FROM sessions WHERE user_id = 1 LIMIT 100)
+        """)
+        self.conn.execute("""
+            UPDATE purge_jobs SET status = 'running', rows_deleted = 100,
+                updated_at = datetime('now', '-1 hour') WHERE id = ?
+        """, (job_id,))
+        self.conn.commit()
+
+        self.assertEqual(run_purge_jobs(chunk_size=50, pause=0), 1)
+        job = self.job(job_id)
+        self.assertEqual(job['status'], 'done')
+        self.assertEqual(job['rows_deleted'], 1 + 1 + 1 + SESSIONS * 2)
+        self.assertEqual(self.rows_of(1), 0)
+        self.assertEqual(self.rows_of(2), 1 + 1 + SESSIONS * 2)
+
+    def test_running_job_with_recent_progress_is_left_alone(self):
+        job_id = User.delete_user(1)
+        self.conn.execute("UPDATE purge_jobs SET status = 'running' WHERE id = ?", (job_id,))
+        self.conn.commit()
+        self.assertEqual(run_purge_jobs(pause=0), 0)
+        self.assertEqual(self.job(job_id)['status'], 'running')
+
+    def test_failed_purge_is_retried_with_backoff(self):
+        self.conn.execute("""
+            CREATE TRIGGER fail_purge BEFORE DELETE ON templates
+            BEGIN SELECT RAISE(ABORT, 'disk I/O error'); END
+        """)
+        self.conn.commit()
+        job_id = User.delete_user(1)
+
+        self.assertEqual(run_purge_jobs(pause=0), 0)
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['attempts']), ('pending', 1))
+        self.assertIn('disk I/O error', job['error'])
+        self.assertIsNotNone(job['retry_at'])
+        # Not due yet
+        self.assertEqual(run_purge_jobs(pause=0), 0)
+        self.assertEqual(self.job(job_id)['attempts'], 1)
+
+        for attempt in range(2, PURGE_MAX_ATTEMPTS + 1):
+            self.conn.execute("UPDATE purge_jobs SET retry_at = datetime('now', '-1 second') WHERE id = ?", (job_id,))
+            self.conn.commit()
+            run_purge_jobs(pause=0)
+            self.assertEqual(self.job(job_id)['attempts'], attempt)
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['retry_at']), ('failed', None))
+        self.assertEqual(run_purge_jobs(pause=0), 0)
+
+        # Deleting the user again after the cause is fixed queues a new job
+        self.conn.execute("DROP TRIGGER fail_purge")
+        self.conn.commit()
+        self.assertNotEqual(User.delete_user(1), job_id)
+        self.assertEqual(run_purge_jobs(pause=0), 1)
+        self.assertEqual(self.rows_of(1), 0)
+
+    def test_retry_resumes_after_transient_failure(self):
+        self.conn.execute("""
+            CREATE TRIGGER fail_purge BEFORE DELETE ON templates
+            BEGIN SELECT RAISE(ABORT, 'database is locked'); END
+        """)
+        self.conn.commit()
+        job_id = User.delete_user(1)
+        run_purge_jobs(pause=0)
+        self.conn.execute("DROP TRIGGER fail_purge")
+        self.conn.execute("UPDATE purge_jobs SET retry_at = datetime('now', '-1 second') WHERE id = ?", (job_id,))
+        self.conn.commit()
+
+        self.assertEqual(run_purge_jobs(pause=0), 1)
+        job = self.job(job_id)
+        self.assertEqual((job['status'], job['attempts'], job['retry_at']), ('done', 1, None))
+        self.assertEqual(self.rows_of(1), 0)
+
+if __name__ == '__main__':
+    unittest.main()
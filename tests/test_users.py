@@ -0,0 +1,87 @@
+"""
+Keyset pagination and search of the admin user listing.
+
+Walks every page of User.list_users with and without a search prefix and a
+role filter, and checks that each matching user appears exactly once, newest
+first, and that the totals agree with the pages.
+
+Run from the repository root:
+    python -m pytest tests/test_users.py
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'server'))
+os.environ.setdefault('SKIP_SECRET_VALIDATION', 'true')
+
+import db
+from models import User
+
+USERS = 500
+
+class ListUsersTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.db_path = db.DB_PATH
+        db.DB_PATH = os.path.join(cls.tmp, 'workout.db')
+        db.init_db()
+        # Usernames and emails match different prefixes, so a search has to
+        # merge both columns
+        cls.users = [
+            (i, f"{('Zeb', 'zed', 'amy', 'bob')[i % 4]}{i}", f"{('bob', 'zeb', 'cat', 'dan')[i % 4]}{i}@example.test",
+             'admin' if i % 3 == 0 else 'user')
+            for i in range(1, USERS + 1)
+        ]
+        conn = sqlite3.connect(db.DB_PATH)
+        conn.executemany(
+            "INSERT INTO users(id, username, email, password_hash, role) VALUES (?, ?, ?, 'x', ?)", cls.users
+        )
+        conn.commit()
+        conn.close()
+
+    @classmethod
+    def tearDownClass(cls):
+        db.DB_PATH = cls.db_path
+        shutil.rmtree(cls.tmp, ignore_errors=True)
+
+    def walk(self, limit, **filters):
+        """All pages of a listing; returns (ids in order, totals reported per page)."""
+        ids, totals, cursor = [], set(), None
+        while True:
+            users, cursor, total, _ = User.list_users(limit=limit, cursor=cursor, **filters)
+            self.assertLessEqual(len(users), limit)
+            ids.extend(user['id'] for user in users)
+            totals.add(total)
+            if cursor is None:
+                return ids, totals
+
+    def expected(self, search=None, role=None):
+        return sorted((
+            user_id for user_id, username, email, user_role in self.users
+            if (not search or username.lower().startswith(search) or email.startswith(search))
+            and (not role or user_role == role)
+        ), reverse=True)
+
+    def test_pages_cover_every_match_once(self):
+        for filters in ({}, {'search': 'ze'}, {'search': 'zeb'}, {'search': 'ZEB1'},
+                        {'role': 'admin'}, {'search': 'zeb', 'role': 'admin'}, {'search': 'nobody'}):
+            for limit in (1, 7, 50):
+                with self.subTest(limit=limit, **filters):
+                    ids, totals = self.walk(limit, **filters)
+                    expected = self.expected(filters.get('search', '').lower() or None, filters.get('role'))
+                    self.assertEqual(ids, expected)
+                    self.assertEqual(totals, {len(expected)})
+
+    def test_search_count_is_capped(self):
+        users, _, total, capped = User.list_users(limit=5, search='z', count_cap=100)
+        self.assertEqual(len(users), 5)
+        self.assertEqual((total, capped), (100, True))
+
+if __name__ == '__main__':
+    unittest.main()